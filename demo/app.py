@@ -4,153 +4,138 @@ Run with: python app.py
 """
 
 from fasthtml.common import *
+import asyncio
 import json
 from pathlib import Path
-from datetime import datetime, timezone
-
-app, rt = fast_app(hdrs=[Style("""
-    body { font-family: system-ui, sans-serif; max-width: 1000px; margin: 0 auto; padding: 20px; background: #1a1a2e; color: #eee; }
-    h1, h2, h3 { color: #fff; }
-    .header { text-align: center; margin-bottom: 30px; }
-    .header h1 { margin-bottom: 5px; color: #00d4ff; }
-    .header .subtitle { color: #888; font-size: 14px; }
-    .tabs { display: flex; gap: 5px; margin-bottom: 20px; border-bottom: 2px solid #333; }
-    .tab-btn { padding: 12px 24px; background: #2a2a4a; color: #ccc; border: none; cursor: pointer; border-radius: 8px 8px 0 0; font-size: 14px; }
-    .tab-btn:hover { background: #3a3a5a; }
-    .tab-btn.active { background: #16213e; color: #00d4ff; border: 2px solid #333; border-bottom: 2px solid #16213e; margin-bottom: -2px; }
-    .tab-content { display: none; }
-    .tab-content.active { display: block; }
-    .chain { display: flex; align-items: center; gap: 10px; margin: 30px 0; flex-wrap: wrap; }
-    .agent-card { background: #16213e; border-radius: 8px; padding: 15px; min-width: 180px; box-shadow: 0 2px 8px rgba(0,0,0,0.3); cursor: pointer; transition: transform 0.2s; border: 2px solid #333; }
-    .agent-card:hover { transform: scale(1.02); border-color: #00d4ff; }
-    .agent-card.selected { border-color: #00d4ff; }
-    .agent-card h3 { margin: 0 0 5px 0; font-size: 14px; color: #fff; }
-    .agent-card .provider { color: #888; font-size: 12px; margin-bottom: 10px; }
-    .arrow { font-size: 24px; color: #555; transition: color 0.3s; }
-    .arrow.green { color: #75e6a0; }
-    .arrow.red { color: #f5c2c7; }
-    .summary-bar { display: flex; justify-content: space-between; align-items: center; background: #0f0f23; padding: 12px 20px; border-radius: 8px; margin-bottom: 20px; }
-    .summary-stat { text-align: center; }
-    .summary-stat .num { font-size: 28px; font-weight: bold; }
-    .summary-stat .label { font-size: 12px; color: #888; }
-    .summary-stat.pass .num { color: #75e6a0; }
-    .summary-stat.fail .num { color: #f5c2c7; }
-    .summary-stat.warn .num { color: #ffda6a; }
-    .tooltip { position: relative; }
-    .tooltip .tooltip-text { visibility: hidden; width: 200px; background: #333; color: #fff; text-align: left; padding: 8px; border-radius: 6px; position: absolute; z-index: 10; bottom: 105%; left: 50%; transform: translateX(-50%); font-size: 11px; box-shadow: 0 2px 8px rgba(0,0,0,0.5); }
-    .tooltip:hover .tooltip-text { visibility: visible; }
-    .agent-card.blocked { border-color: #842029; animation: pulse-red 1.5s infinite; }
-    @keyframes pulse-red { 0%, 100% { box-shadow: 0 0 0 0 rgba(132, 32, 41, 0.4); } 50% { box-shadow: 0 0 15px 5px rgba(132, 32, 41, 0.2); } }
-    .badge { display: inline-block; padding: 4px 8px; border-radius: 4px; font-size: 11px; font-weight: bold; }
-    .badge.green { background: #0f5132; color: #75e6a0; }
-    .badge.yellow { background: #664d03; color: #ffda6a; }
-    .badge.orange { background: #984c0c; color: #feb272; }
-    .badge.red { background: #842029; color: #f5c2c7; }
-    .badge.warn { background: #664d03; color: #ffda6a; }
-    .details { margin-top: 10px; font-size: 11px; }
-    .details li { margin: 3px 0; color: #aaa; }
-    .section { background: #16213e; border-radius: 8px; padding: 20px; margin: 20px 0; box-shadow: 0 2px 8px rgba(0,0,0,0.3); }
-    .policy-summary { font-size: 13px; color: #888; }
-    .policy-summary code { background: #2a2a4a; padding: 2px 5px; border-radius: 3px; color: #00d4ff; }
-    .chain-result { padding: 15px; border-radius: 8px; margin-top: 20px; }
-    .chain-result.pass { background: #0f5132; color: #75e6a0; }
-    .chain-result.fail { background: #842029; color: #f5c2c7; }
-    .detail-panel { background: #0f0f23; border: 1px solid #333; border-radius: 8px; padding: 20px; margin-top: 20px; }
-    .detail-panel h3 { margin-top: 0; }
-    .detail-panel pre { background: #1a1a2e; padding: 10px; border-radius: 4px; overflow-x: auto; font-size: 12px; color: #aaa; }
-    .detail-panel table { width: 100%; border-collapse: collapse; font-size: 13px; }
-    input[type="checkbox"] { accent-color: #00d4ff; }
-    button { background: #00d4ff; color: #000; border: none; padding: 10px 20px; border-radius: 6px; cursor: pointer; font-weight: bold; }
-    button:hover { background: #00b8e6; }
-    fieldset { border: 1px solid #333; border-radius: 8px; padding: 15px; margin-bottom: 15px; }
-    legend { color: #00d4ff; font-weight: bold; }
-    label { color: #ccc; }
-    a { color: #00d4ff; }
-    .scenario-btn { display: inline-block; padding: 8px 16px; margin-right: 10px; background: #1a1a2e; border: 1px solid #333; border-radius: 6px; color: #888; text-decoration: none; font-size: 13px; }
-    .scenario-btn:hover { background: #252542; color: #fff; }
-    .scenario-btn.active { background: #00d4ff; color: #000; border-color: #00d4ff; }
-    .detail-panel th, .detail-panel td { text-align: left; padding: 8px; border-bottom: 1px solid #333; color: #ccc; }
-    .detail-panel th { background: #1a1a2e; color: #888; }
-    .welcome { text-align: center; padding: 40px 20px; }
-    .welcome h1 { font-size: 48px; color: #00d4ff; margin-bottom: 10px; }
-    .welcome .tagline { font-size: 18px; color: #888; margin-bottom: 40px; }
-    .welcome .description { max-width: 700px; margin: 0 auto 50px; text-align: left; line-height: 1.8; color: #ccc; }
-    .path-cards { display: flex; gap: 30px; justify-content: center; flex-wrap: wrap; }
-    .path-card { background: #16213e; border: 2px solid #333; border-radius: 12px; padding: 30px; width: 320px; text-align: center; cursor: pointer; transition: all 0.3s; }
-    .path-card:hover { border-color: #00d4ff; transform: translateY(-5px); box-shadow: 0 10px 30px rgba(0, 212, 255, 0.2); }
-    .path-card .icon { font-size: 48px; margin-bottom: 15px; }
-    .path-card h2 { color: #fff; margin-bottom: 10px; font-size: 20px; }
-    .path-card p { color: #888; font-size: 14px; line-height: 1.6; }
-    .path-card .action { margin-top: 20px; display: inline-block; background: #00d4ff; color: #000; padding: 10px 25px; border-radius: 6px; font-weight: bold; }
-    .auditor-section { background: #0f0f23; border: 1px solid #333; border-radius: 8px; padding: 20px; margin-top: 15px; }
-    .auditor-section h4 { color: #00d4ff; margin-top: 0; }
-    .auditor-section input, .auditor-section textarea { width: 100%; padding: 8px; margin: 5px 0 15px; background: #1a1a2e; border: 1px solid #333; border-radius: 4px; color: #fff; }
-    .auditor-section textarea { min-height: 80px; font-family: monospace; }
-    .signature-preview { background: #1a1a2e; padding: 10px; border-radius: 4px; font-family: monospace; font-size: 11px; color: #75e6a0; word-break: break-all; }
-""")])
+
+from audit_signatures import AuditVerifier
+from chain_verifier import DirectoryFetcher, HTTPFetcher, verify_chain
+from decision_log import DecisionLog
+from expiry_scheduler import ExpiryScheduler
+from fragment_cache import FragmentCache
+from manifest_builder import ManifestBuilder
+from manifest_cache import ManifestCache
+import metrics
+from metrics import METRICS, RouteMetrics
+from policy_engine import CompiledPolicy, digest
+from policy_sweep import RECHECK_TOGGLES, recheck_policy, recheck_variants, sweep
+from registry import Registry
+from revocation import RevocationIndex
+from verdict_cache import VerdictCache
 
 DEMO_DIR = Path(__file__).parent
 
+# The stylesheet is served once and cached by browsers; its URL changes whenever its content does
+CSS = (DEMO_DIR / "static" / "app.css").read_text()
+CSS_VERSION = digest(CSS)[7:23]
+CSS_HEADERS = {"ETag": f'"{CSS_VERSION}"', "Cache-Control": "public, max-age=31536000, immutable"}
+
+app, rt = fast_app(hdrs=[Link(rel="stylesheet", href=f"/styles?v={CSS_VERSION}")])
+
+# Rule, chain hop, fetch and route latencies plus verdict counts, served from /metrics
+METRICS.enabled = metrics.env_enabled(True)
+app.add_middleware(RouteMetrics)
+
+# Policy, manifests and questionnaires are loaded once; handlers read REGISTRY.snapshot
+REGISTRY = Registry(DEMO_DIR)
+REGISTRY.start_watching()
+
+# Verdicts are memoized by (policy digest, manifest digest) across requests
+VERDICTS = VerdictCache()
+
+# Revoked agent ids, auditor DIDs and codebase hashes, from a signed list if one is deployed
+REVOCATIONS = RevocationIndex()
+if (DEMO_DIR / "revocations.json").exists():
+    REVOCATIONS.load(json.loads((DEMO_DIR / "revocations.json").read_text()))
+
+# Third-party audit signatures, verified once per manifest digest; only verified ones earn green
+AUDITS = AuditVerifier(REVOCATIONS.keys, revocations=REVOCATIONS)
+
+# Cached verdicts are dropped the moment an attestation, expiry or certificate boundary passes
+EXPIRY = ExpiryScheduler(REGISTRY.snapshot.compiled_policy, VERDICTS)
+
+def track_expiry(snap):
+    EXPIRY.update_policy(snap.compiled_policy)
+    EXPIRY.sync(snap.manifests, snap.manifest_digests)
+
+track_expiry(REGISTRY.snapshot)
+REGISTRY.listeners.append(track_expiry)
+EXPIRY.start()
+
+# Every chain decision, with its rule outcomes, is appended to demo/decisions/ by a background writer
+DECISIONS = DecisionLog(DEMO_DIR / "decisions", every_decision=True)
+
+# Rendered cards, chain views and pages, keyed by the digests of what they show. Page ETags
+# include RENDER_VERSION so a redeployed template never answers 304 with old markup
+FRAGMENTS = FragmentCache()
+RENDER_VERSION = digest(Path(__file__).read_text())[7:23]
+
+# Sub-agent manifests: mirrored ones from mock_agents/, anything else over pooled HTTP with at
+# most 4 requests per partner host in flight; a hop that takes over HOP_TIMEOUT seconds fails
+HOP_TIMEOUT = 5.0
+FETCHER = ManifestCache(DirectoryFetcher(DEMO_DIR / "mock_agents",
+                                         fallback=HTTPFetcher(timeout=HOP_TIMEOUT, max_per_host=4)))
+
+AGENT_FILES = {
+    "agent_b": "agent_b_travel",
+    "agent_c": "agent_c_airline",
+    "agent_d": "agent_d_sketchy",
+}
+
 def load_json(path):
     with open(path) as f:
         return json.load(f)
 
-def get_attestation_level(manifest: dict) -> tuple:
-    """Determine attestation tier: green/yellow/orange/red"""
-    attestations = manifest.get("compliance_attestations", {})
-    jurisdictions = attestations.get("jurisdictions", [])
-    
-    has_third_party = any(j.get("third_party_audit") for j in jurisdictions)
-    has_automated = any(j.get("automated_verification") for j in jurisdictions)
-    has_self_cert = any(j.get("compliant") for j in jurisdictions)
-    
-    if has_third_party:
-        return ("green", "🟢 Third-party audited")
-    elif has_automated:
-        return ("yellow", "🟡 Auto-verified")
-    elif has_self_cert:
-        return ("orange", "🟠 Self-certified")
-    else:
-        return ("red", "🔴 Unverified")
-
 def check_agent(manifest: dict, policy: dict) -> dict:
     """Check if an agent's manifest satisfies policy."""
-    level, level_text = get_attestation_level(manifest)
-    results = {"pass": True, "reasons": [], "warnings": [], "level": level, "level_text": level_text}
-    
-    if not manifest.get("compliance_attestations", {}).get("jurisdictions"):
-        results["pass"] = False
-        results["reasons"].append("No jurisdiction compliance declared")
-        return results
-    
-    # Check required jurisdictions
-    required = set(policy.get("regulatory_requirements", {}).get("required_jurisdictions", []))
-    declared = {j["jurisdiction"] for j in manifest.get("compliance_attestations", {}).get("jurisdictions", []) if j.get("compliant")}
-    missing = required - declared
-    if missing:
-        results["pass"] = False
-        results["reasons"].append(f"Missing required jurisdictions: {', '.join(missing)}")
-    
-    # Check model provider
-    model = manifest.get("model_provider_compliance", {})
-    if policy.get("model_provider_requirements", {}).get("require_gpai_compliance"):
-        if not model.get("gpai_compliant"):
-            results["pass"] = False
-            results["reasons"].append("Model not GPAI compliant")
-    
-    # Check cultural benchmarks (warning only)
-    if policy.get("cultural_requirements", {}).get("require_cultural_certification"):
-        cultural = manifest.get("compliance_attestations", {}).get("cultural_benchmarks")
-        if not cultural or not cultural.get("certified"):
-            results["warnings"].append("No cultural certification")
-    
-    # Check sub-agents
-    sub_agents = manifest.get("sub_agent_compliance", {}).get("declared_sub_agents", [])
-    for sub in sub_agents:
-        if not sub.get("compliance_verified"):
-            results["warnings"].append(f"Sub-agent '{sub.get('agent_id', 'unknown')}' not verified")
-    
-    return results
+    return CompiledPolicy(policy).check_agent(manifest, audit_verified=AUDITS.verified(manifest))
+
+def agent_verdict(snap, stem: str, policy: CompiledPolicy, audit_verified: bool) -> dict:
+    """Cached check_agent() verdict for a registry manifest."""
+    manifest, manifest_digest = snap.manifests[stem], snap.manifest_digests[stem]
+    result = VERDICTS.check_agent(manifest, policy, manifest_digest, audit_verified)
+    return REVOCATIONS.apply(result, manifest)
+
+async def chain_verdict(snap, stem: str, policy: CompiledPolicy) -> dict:
+    """agent_verdict(), failed by any failing sub-agent when the policy verifies sub-agents."""
+    # Verifying may resolve an auditor's did:web over the network, so it runs off the event loop
+    audit_verified = await asyncio.to_thread(AUDITS.verified, snap.manifests[stem], snap.manifest_digests[stem])
+    result = agent_verdict(snap, stem, policy, audit_verified)
+    if not policy.policy.get("sub_agent_requirements", {}).get("verify_sub_agent_compliance"):
+        return result
+    chain = await verify_chain(snap.manifests[stem], policy, FETCHER, revocations=REVOCATIONS,
+                               hop_timeout=HOP_TIMEOUT, decision_log=DECISIONS)
+    reasons = [f"Sub-agent {n['agent_id']}: {r}" for n in chain["nodes"][1:] for r in n["reasons"]]
+    if not reasons:
+        return result
+    return {**result, "pass": False, "reasons": result["reasons"] + reasons}
+
+async def chain_verdicts(snap, stems: dict, policy: CompiledPolicy) -> dict:
+    """chain_verdict() for {name: stem}, walked concurrently."""
+    results = await asyncio.gather(*(chain_verdict(snap, stem, policy) for stem in stems.values()))
+    return dict(zip(stems, results))
+
+def verdict_digest(snap, stem: str, result: dict) -> str:
+    """Digest of everything an agent's card shows: its manifest and its verdict."""
+    return digest([snap.manifest_digests[stem], result])
+
+def page_etag(request, *state) -> str:
+    """ETag for a GET rendered from state; htmx requests get the bare fragment, so they differ."""
+    tag = digest([RENDER_VERSION, CSS_VERSION, bool(request.headers.get("hx-request")), *state])
+    return f'"{tag[7:39]}"'
+
+def etag_matches(request, etag: str) -> bool:
+    """True when the request's If-None-Match already names etag."""
+    header = request.headers.get("if-none-match", "")
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(",") if tag.strip())
+
+def revalidate_headers(etag: str) -> dict:
+    # no-cache: browsers may keep the page but must revalidate, since verdicts change with time
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "HX-Request"}
+
+def cached_page(etag: str, *components):
+    """components with ETag headers, for a route that has already checked etag_matches()."""
+    return (*(HttpHeader(k, v) for k, v in revalidate_headers(etag).items()), *components)
 
 def agent_card(name: str, manifest: dict, result: dict, agent_key: str):
     provider = manifest.get("provider", {}).get("name", "Unknown")
@@ -210,20 +195,38 @@ def summary_bar(results: dict):
         cls="summary-bar"
     )
 
-@rt("/agent/{agent_key}")
-def get(agent_key: str):
-    """Return detailed compliance info for an agent."""
-    files = {
-        "agent_b": "agent_b_travel.json",
-        "agent_c": "agent_c_airline.json", 
-        "agent_d": "agent_d_sketchy.json",
-    }
-    if agent_key not in files:
-        return Div("Agent not found")
-    
-    manifest = load_json(DEMO_DIR / "mock_agents" / files[agent_key])
-    policy = load_json(DEMO_DIR / "company_a_policy.json")
-    result = check_agent(manifest, policy)
+def chain_view(snap, agent_keys: list, names: dict, results: dict, my_agent_name: str) -> tuple:
+    """(summary bar, chain with result) as cached HTML, shared by /demo and /recheck."""
+    digests = [(k, verdict_digest(snap, AGENT_FILES[k], results[names[k]])) for k in agent_keys]
+
+    def card(key, card_digest):
+        name = names[key]
+        return NotStr(FRAGMENTS.get(("card", name, key, card_digest), lambda: to_xml(
+            agent_card(name, snap.manifests[AGENT_FILES[key]], results[name], key))))
+
+    def chain():
+        chain_items = [
+            Div(H3(my_agent_name), Div("(Your Agent)", cls="provider"), Span("ORIGIN", cls="badge green"), cls="agent-card"),
+        ]
+        prev_passed = True  # Origin always passes
+        for key, card_digest in digests:
+            chain_items.append(colored_arrow(prev_passed))
+            chain_items.append(card(key, card_digest))
+            prev_passed = results[names[key]]["pass"]
+        chain_pass = all(r["pass"] for r in results.values())
+        return to_xml(Div(*chain_items, cls="chain")) + to_xml(Div(
+            H3("Chain Result: " + ("✓ ALL COMPLIANT" if chain_pass else "✗ BLOCKED")),
+            P("Transaction can proceed." if chain_pass else "Transaction blocked due to non-compliant agents in chain."),
+            cls=f"chain-result {'pass' if chain_pass else 'fail'}"
+        ))
+
+    key = tuple(digests)
+    summary = FRAGMENTS.get(("summary", key), lambda: to_xml(summary_bar(results)))
+    return NotStr(summary), NotStr(FRAGMENTS.get(("chain", my_agent_name, key), chain))
+
+def agent_detail(snap, stem: str, result: dict):
+    """The detail panel for one agent."""
+    manifest = snap.manifests[stem]
     
     # Jurisdictions table
     jurisdictions = manifest.get("compliance_attestations", {}).get("jurisdictions", [])
@@ -268,11 +271,41 @@ def get(agent_key: str):
         Ul(*[Li(f"{s.get('agent_id', '?')} — {'✓ verified' if s.get('compliance_verified') else '✗ not verified'}") for s in sub_agents]) if sub_agents else P("No sub-agents declared", style="color:#999;"),
         
         H4("Raw Manifest"),
-        Pre(json.dumps(manifest, indent=2)),
+        Pre(snap.manifest_json[stem]),
         
         cls="detail-panel"
     )
 
+@rt("/agent/{agent_key}")
+async def get(request, agent_key: str):
+    """Return detailed compliance info for an agent."""
+    if agent_key not in AGENT_FILES:
+        return Div("Agent not found")
+    
+    snap = REGISTRY.snapshot
+    stem = AGENT_FILES[agent_key]
+    result = await chain_verdict(snap, stem, snap.compiled_policy)
+    
+    card_digest = verdict_digest(snap, stem, result)
+    etag = page_etag(request, card_digest)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=revalidate_headers(etag))
+    panel = FRAGMENTS.get(("detail", card_digest), lambda: to_xml(agent_detail(snap, stem, result)))
+    # The Title marks this as a page, so a direct (non-htmx) GET is wrapped in <html> with the stylesheet
+    return cached_page(etag, Title("CBAAC Demo"), NotStr(panel))
+
+@rt("/styles")
+def get(request):
+    """The stylesheet; cacheable for a year since its URL carries its version."""
+    if etag_matches(request, CSS_HEADERS["ETag"]):
+        return Response(status_code=304, headers=CSS_HEADERS)
+    return Response(CSS, media_type="text/css", headers=CSS_HEADERS)
+
+@rt("/metrics")
+def get():
+    """Verification metrics in the Prometheus text format."""
+    return Response(METRICS.render(), media_type=metrics.CONTENT_TYPE)
+
 @rt("/")
 def get():
     """Welcome screen"""
@@ -359,46 +392,13 @@ Label(Input(type="radio", name="cert_type", value="auto_verified"), " 🟡 Auto-
         )
     )
 
-@rt("/demo")
-def get(scenario: str = "mixed"):
+def demo_main(snap, scenario: str, agent_keys: list, names: dict, results: dict):
+    """The /demo page body."""
     my_agent_name = "Internal Travel Booker"
+    policy = snap.policy
+    summary, chain = chain_view(snap, agent_keys, names, results, my_agent_name)
     
-    # Load policy from file
-    policy = load_json(DEMO_DIR / "company_a_policy.json")
-
-    # Scenario-based agent selection
-    if scenario == "compliant":
-        agents = {
-            "Agent B (Travel)": load_json(DEMO_DIR / "mock_agents/agent_b_travel.json"),
-            "Agent C (Airline)": load_json(DEMO_DIR / "mock_agents/agent_c_airline.json"),
-        }
-        agent_keys = ["agent_b", "agent_c"]
-    else:  # mixed (default) - includes non-compliant agent
-        agents = {
-            "Agent B (Travel)": load_json(DEMO_DIR / "mock_agents/agent_b_travel.json"),
-            "Agent C (Airline)": load_json(DEMO_DIR / "mock_agents/agent_c_airline.json"),
-            "Agent D (Sketchy)": load_json(DEMO_DIR / "mock_agents/agent_d_sketchy.json"),
-        }
-        agent_keys = ["agent_b", "agent_c", "agent_d"]
-    
-    # Check each agent against user's policy
-    results = {name: check_agent(m, policy) for name, m in agents.items()}
-    
-    # Overall chain result
-    chain_pass = all(r["pass"] for r in results.values())
-    
-    # Build chain visualization with colored arrows
-    agent_list = list(agents.items())
-    chain_items = [
-        Div(H3(my_agent_name), Div("(Your Agent)", cls="provider"), Span("ORIGIN", cls="badge green"), cls="agent-card"),
-    ]
-    prev_passed = True  # Origin always passes
-    for i, ((name, manifest), key) in enumerate(zip(agent_list, agent_keys)):
-        chain_items.append(colored_arrow(prev_passed))
-        chain_items.append(agent_card(name, manifest, results[name], key))
-        prev_passed = results[name]["pass"]
-    
-    return Title("CBAAC Demo"), Main(
+    return Main(
         Div(
             H1("🛂 CBAAC"),
             P("Cross-Border Agentic AI Compliance", cls="subtitle"),
@@ -450,14 +450,9 @@ def get(scenario: str = "mixed"):
                   cls="scenario-btn" + (" active" if scenario == "mixed" else "")),
                 style="margin-bottom:15px;"
             ),
-            summary_bar(results),
+            summary,
             Div(
-                Div(*chain_items, cls="chain"),
-                Div(
-                    H3("Chain Result: " + ("✓ ALL COMPLIANT" if chain_pass else "✗ BLOCKED")),
-                    P("Transaction can proceed." if chain_pass else "Transaction blocked due to non-compliant agents in chain."),
-                    cls=f"chain-result {'pass' if chain_pass else 'fail'}"
-                ),
+                chain,
                 id="chain-results"
             ),
             cls="section"
@@ -504,99 +499,91 @@ Label(Input(type="radio", name="cert_type", value="auto_verified", checked=True)
         ),  # End TAB 2
     )  # End Main
 
+@rt("/demo")
+async def get(request, scenario: str = "mixed"):
+    snap = REGISTRY.snapshot
+
+    # Scenario-based agent selection
+    if scenario == "compliant":
+        agent_keys = ["agent_b", "agent_c"]
+    else:  # mixed (default) - includes non-compliant agent
+        agent_keys = ["agent_b", "agent_c", "agent_d"]
+    names = {"agent_b": "Agent B (Travel)", "agent_c": "Agent C (Airline)", "agent_d": "Agent D (Sketchy)"}
+    
+    # Check each agent against user's policy
+    results = await chain_verdicts(snap, {names[k]: AGENT_FILES[k] for k in agent_keys}, snap.compiled_policy)
+    
+    # The page depends only on the scenario, the policy and each agent's (manifest, verdict)
+    state = [scenario, snap.compiled_policy.digest,
+             [verdict_digest(snap, AGENT_FILES[k], results[names[k]]) for k in agent_keys]]
+    etag = page_etag(request, *state)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=revalidate_headers(etag))
+    page = FRAGMENTS.get(("demo", digest(state)),
+                         lambda: to_xml(demo_main(snap, scenario, agent_keys, names, results)))
+    return cached_page(etag, Title("CBAAC Demo"), NotStr(page))
+
 @rt("/recheck")
-def post(require_gdpr: bool = False, require_ai_act: bool = False, require_gpai: bool = False, 
+async def post(require_gdpr: bool = False, require_ai_act: bool = False, require_gpai: bool = False, 
          require_hash: bool = False, require_cultural: bool = False, require_subagent_compliance: bool = False):
     """Re-check agents with updated policy"""
     
     # Build custom policy from form
-    custom_policy = {
-        "regulatory_requirements": {
-            "required_jurisdictions": ["EU"] if require_gdpr else [],
-            "require_gdpr_compliance": require_gdpr,
-            "require_ai_act_compliance": require_ai_act,
-            "require_codebase_hash": require_hash,
-            "require_hash_match": require_hash,
-        },
-        "model_provider_requirements": {
-            "require_gpai_compliance": require_gpai,
-        },
-        "cultural_requirements": {
-            "require_cultural_certification": require_cultural,
-        },
-        "sub_agent_requirements": {
-            "require_compliance_declaration": require_subagent_compliance,
-        }
-    }
+    custom_policy = recheck_policy(require_gdpr, require_ai_act, require_gpai,
+                                   require_hash, require_cultural, require_subagent_compliance)
     
-    # Load agents
-    agents = {
-        "Agent B (Travel)": load_json(DEMO_DIR / "mock_agents/agent_b_travel.json"),
-        "Agent C (Airline)": load_json(DEMO_DIR / "mock_agents/agent_c_airline.json"),
-        "Agent D (Sketchy)": load_json(DEMO_DIR / "mock_agents/agent_d_sketchy.json"),
-    }
+    my_agent_name = "Internal Travel Booker"
+    snap = REGISTRY.snapshot
+    agent_keys = ["agent_b", "agent_c", "agent_d"]
+    names = {"agent_b": "Agent B (Travel)", "agent_c": "Agent C (Airline)", "agent_d": "Agent D (Sketchy)"}
     
     # Check each agent with new policy
-    results = {name: check_agent(m, custom_policy) for name, m in agents.items()}
-    chain_pass = all(r["pass"] for r in results.values())
+    compiled = CompiledPolicy(custom_policy)
+    results = await chain_verdicts(snap, {names[k]: AGENT_FILES[k] for k in agent_keys}, compiled)
     
-    # Build chain visualization with colored arrows
-    agent_keys = ["agent_b", "agent_c", "agent_d"]
-    agent_list = list(agents.items())
-    chain_items = [
-        Div(H3(my_agent_name), Div("(Your Agent)", cls="provider"), Span("ORIGIN", cls="badge green"), cls="agent-card"),
-    ]
-    prev_passed = True
-    for i, ((name, manifest), key) in enumerate(zip(agent_list, agent_keys)):
-        chain_items.append(colored_arrow(prev_passed))
-        chain_items.append(agent_card(name, manifest, results[name], key))
-        prev_passed = results[name]["pass"]
+    # Cards and the chain are reused from earlier renders of the same verdicts
+    summary, chain = chain_view(snap, agent_keys, names, results, my_agent_name)
+    return Div(summary, chain)
+
+@rt("/recheck/sweep")
+def get():
+    """Pass counts for all 64 /recheck checkbox combinations in one pass"""
+    snap = REGISTRY.snapshot
+    manifests = [snap.manifests[AGENT_FILES[k]] for k in ["agent_b", "agent_c", "agent_d"]]
+    result = sweep(manifests, recheck_variants(), agent=True)
+    
+    rows = [Tr(*[Th(t.replace("require_", "")) for t in RECHECK_TOGGLES], Th("Compliant"))]
+    for flags, passed in result["pass_counts"].items():
+        rows.append(Tr(*[Td("✓" if f else "—") for f in flags], Td(f"{passed}/{result['total']}")))
     
     return Div(
-        summary_bar(results),
-        Div(*chain_items, cls="chain"),
-        Div(
-            H3("Chain Result: " + ("✓ ALL COMPLIANT" if chain_pass else "✗ BLOCKED")),
-            P("Transaction can proceed." if chain_pass else "Transaction blocked due to non-compliant agents in chain."),
-            cls=f"chain-result {'pass' if chain_pass else 'fail'}"
-        )
+        H3("Policy What-If: all checkbox combinations"),
+        Table(*rows),
+        cls="detail-panel"
     )
 
-@rt("/questionnaire/load")
-def post(jurisdiction: str = None, cert_type: str = "self_certified"):
-    """Load questionnaire based on selected jurisdictions"""
-    if not jurisdiction:
-        return P("Please select at least one jurisdiction.", style="color:#ff6b6b;")
-    
-    if isinstance(jurisdiction, str):
-        jurisdiction = [jurisdiction]
-    
-    questions = []
-    
-    # Map jurisdiction to questionnaire files
-    juris_map = {
-        "eu": ("eu-gdpr-aiact.json", "🇪🇺 EU GDPR & AI Act"),
-        "japan": ("japan-appi-meti.json", "🇯🇵 Japan APPI & METI"),
-        "korea": ("korea-ai-basic-act.json", "🇰🇷 Korea AI Basic Act"),
-        "cultural": ("cultural-ethical.json", "🌍 Cultural & Ethical"),
-        "security": ("security-certifications.json", "🔐 Security Certifications")
-    }
-    
-    cert_labels = {
-        "third_party": "🟢 Third-party auditor",
-        "auto_verified": "🟡 Auto-verified",
-        "self_certified": "🟠 Self-certified",
-        "sign_to_code": "🔵 Sign-to-code"
-    }
-    
-    form_fields = [
-        Input(type="hidden", name="cert_type", value=cert_type),
-        Input(type="hidden", name="jurisdictions_selected", value=",".join(jurisdiction)),
-        P(f"Certification type: {cert_labels.get(cert_type, cert_type)}", style="color:#00d4ff; font-weight:bold;"),
-    ]
+# Step 2 of certification: jurisdiction checkbox -> (questionnaire stem, heading)
+QUESTIONNAIRE_FILES = {
+    "eu": ("eu-gdpr-aiact", "🇪🇺 EU GDPR & AI Act"),
+    "japan": ("japan-appi-meti", "🇯🇵 Japan APPI & METI"),
+    "korea": ("korea-ai-basic-act", "🇰🇷 Korea AI Basic Act"),
+    "cultural": ("cultural-ethical", "🌍 Cultural & Ethical"),
+    "security": ("security-certifications", "🔐 Security Certifications")
+}
+
+CERT_LABELS = {
+    "third_party": "🟢 Third-party auditor",
+    "auto_verified": "🟡 Auto-verified",
+    "self_certified": "🟠 Self-certified",
+    "sign_to_code": "🔵 Sign-to-code"
+}
+
+def cert_type_fields(cert_type: str) -> list:
+    """The form fields a certification type adds ahead of the questions."""
+    fields = [P(f"Certification type: {CERT_LABELS.get(cert_type, cert_type)}", style="color:#00d4ff; font-weight:bold;")]
     
     if cert_type == "auto_verified":
-        form_fields.append(
+        fields.append(
             Div(
                 "⚠️ Demo Mode: Data below is auto-prefilled for testing purposes. This is mock functionality for demonstration only.",
                 style="background:#ff9800; color:#000; padding:10px 15px; border-radius:6px; margin:10px 0; font-size:13px;"
@@ -605,7 +592,7 @@ def post(jurisdiction: str = None, cert_type: str = "self_certified"):
     
     # Add auditor section if third-party selected
     if cert_type == "third_party":
-        form_fields.append(
+        fields.append(
             Div(
                 H4("🔏 Auditor Information"),
                 P("As a third-party auditor, please provide your credentials:", style="color:#888; font-size:13px;"),
@@ -627,63 +614,111 @@ def post(jurisdiction: str = None, cert_type: str = "self_certified"):
                 cls="auditor-section"
             )
         )
+    return fields
+
+def questionnaire_fields(q_data: dict, title: str, is_auto: bool) -> list:
+    """One questionnaire's heading and inputs; is_auto prefills demo answers."""
+    fields = [H3(title, style="margin-top:20px; border-bottom:2px solid #ddd; padding-bottom:10px;")]
     
-    for j in jurisdiction:
-        if j not in juris_map:
-            continue
-        filename, title = juris_map[j]
-        q_path = DEMO_DIR.parent / "questionnaires" / filename
-        if not q_path.exists():
-            continue
-        
-        q_data = load_json(q_path)
-        
-        form_fields.append(H3(title, style="margin-top:20px; border-bottom:2px solid #ddd; padding-bottom:10px;"))
-        
-        for section_key, section in q_data.get("sections", {}).items():
-            form_fields.append(H4(section.get("title", section_key), style="color:#555;"))
-            
-            for q in section.get("questions", []):
-                q_id = q.get("id", "")
-                q_text = q.get("question", q.get("text", ""))
-                q_type = q.get("type", "boolean")
-                
-                # Auto-prefill for demo
-                is_auto = cert_type == "auto_verified"
-                
-                if q_type == "boolean":
-                    form_fields.append(
-                        Div(
-                            Label(Input(type="checkbox", name=q_id, value="yes", checked=is_auto), f" {q_text}"),
-                            cls="question"
-                        )
+    for section_key, section in q_data.get("sections", {}).items():
+        fields.append(H4(section.get("title", section_key), style="color:#555;"))
+
+        for q in section.get("questions", []):
+            q_id = q.get("id", "")
+            q_text = q.get("question", q.get("text", ""))
+            q_type = q.get("type", "boolean")
+
+            if q_type == "boolean":
+                fields.append(
+                    Div(
+                        Label(Input(type="checkbox", name=q_id, value="yes", checked=is_auto), f" {q_text}"),
+                        cls="question"
                     )
-                elif q_type in ["select", "multi_select", "single_select"]:
-                    options = [Option(o, value=o, selected=(is_auto and i==0)) for i, o in enumerate(q.get("options", []))]
-                    form_fields.append(
-                        Div(
-                            Label(q_text),
-                            Select(*options, name=q_id, multiple=(q_type == "multi_select"), style="width:100%; padding:8px;"),
-                            cls="question"
-                        )
+                )
+            elif q_type in ["select", "multi_select", "single_select"]:
+                options = [Option(o, value=o, selected=(is_auto and i==0)) for i, o in enumerate(q.get("options", []))]
+                fields.append(
+                    Div(
+                        Label(q_text),
+                        Select(*options, name=q_id, multiple=(q_type == "multi_select"), style="width:100%; padding:8px;"),
+                        cls="question"
                     )
-                elif q_type in ["text", "url", "email"]:
-                    prefill = "https://sample.test/demo" if is_auto and q_type == "url" else ("demo@sample.test" if is_auto and q_type == "email" else ("Demo value" if is_auto else ""))
-                    form_fields.append(
-                        Div(
-                            Label(q_text),
-                            Input(type=q_type, name=q_id, value=prefill, style="width:100%; padding:8px;"),
-                            cls="question"
-                        )
+                )
+            elif q_type in ["text", "url", "email"]:
+                prefill = "https://sample.test/demo" if is_auto and q_type == "url" else ("demo@sample.test" if is_auto and q_type == "email" else ("Demo value" if is_auto else ""))
+                fields.append(
+                    Div(
+                        Label(q_text),
+                        Input(type=q_type, name=q_id, value=prefill, style="width:100%; padding:8px;"),
+                        cls="question"
                     )
-                elif q_type == "number":
-                    form_fields.append(
-                        Div(
-                            Label(q_text),
-                            Input(type="number", name=q_id, value="100" if is_auto else "", style="width:100px; padding:8px;"),
-                            cls="question"
-                        )
+                )
+            elif q_type == "number":
+                fields.append(
+                    Div(
+                        Label(q_text),
+                        Input(type="number", name=q_id, value="100" if is_auto else "", style="width:100px; padding:8px;"),
+                        cls="question"
                     )
+                )
+    return fields
+
+# Rendered once per registry snapshot: ("", cert_type) -> certification fields and
+# (jurisdiction, cert_type) -> questionnaire, so /questionnaire/load only joins strings
+QUESTIONNAIRE_FORMS = {}
+
+def render_fields(fields: list) -> str:
+    return "".join(to_xml(f) for f in fields)
+
+def compile_questionnaires(snap):
+    global QUESTIONNAIRE_FORMS
+    sections = {}
+    for j, (stem, title) in QUESTIONNAIRE_FILES.items():
+        q_data = snap.questionnaires.get(stem)
+        if q_data is not None:
+            # Only auto_verified differs (prefilled answers), so two renders cover every cert_type
+            for is_auto in (False, True):
+                sections[j, is_auto] = render_fields(questionnaire_fields(q_data, title, is_auto))
+    forms = {}
+    for cert_type in CERT_LABELS:
+        forms["", cert_type] = render_fields(cert_type_fields(cert_type))
+        for j in QUESTIONNAIRE_FILES:
+            if (j, False) in sections:
+                forms[j, cert_type] = sections[j, cert_type == "auto_verified"]
+    QUESTIONNAIRE_FORMS = forms
+
+compile_questionnaires(REGISTRY.snapshot)
+REGISTRY.listeners.append(compile_questionnaires)
+
+# Question id -> manifest routing table, rebuilt with the questionnaires
+BUILDER = None
+
+def compile_builder(snap):
+    global BUILDER
+    BUILDER = ManifestBuilder(snap.questionnaires)
+
+compile_builder(REGISTRY.snapshot)
+REGISTRY.listeners.append(compile_builder)
+
+@rt("/questionnaire/load")
+def post(jurisdiction: str = None, cert_type: str = "self_certified"):
+    """Load questionnaire based on selected jurisdictions"""
+    if not jurisdiction:
+        return P("Please select at least one jurisdiction.", style="color:#ff6b6b;")
+    
+    if isinstance(jurisdiction, str):
+        jurisdiction = [jurisdiction]
+    
+    forms = QUESTIONNAIRE_FORMS
+    known = cert_type in CERT_LABELS
+    form_fields = [
+        Input(type="hidden", name="cert_type", value=cert_type),
+        Input(type="hidden", name="jurisdictions_selected", value=",".join(jurisdiction)),
+        # An unrecognised cert_type is shown as given and gets the unprefilled questions
+        NotStr(forms["", cert_type] if known else render_fields(cert_type_fields(cert_type))),
+    ]
+    variant = cert_type if known else "self_certified"
+    form_fields += [NotStr(forms[j, variant]) for j in jurisdiction if (j, variant) in forms]
     
     form_fields.append(Br())
     form_fields.append(Button("Generate Manifest →", type="submit", style="background:#4CAF50; color:white; padding:12px 24px; border:none; border-radius:4px; cursor:pointer;"))
@@ -703,173 +738,8 @@ def post(jurisdiction: str = None, cert_type: str = "self_certified"):
 @rt("/questionnaire/generate")
 async def post(request):
     """Generate manifest from questionnaire answers"""
-    form = await request.form()
-    kwargs = dict(form)
-    
-    cert_type = kwargs.get("cert_type", "self_certified")
-    jurisdictions_selected = kwargs.get("jurisdictions_selected", "").split(",")
-    
-    # Certification flags based on type
-    is_third_party = cert_type == "third_party"
-    is_auto = cert_type == "auto_verified"
-    is_self = cert_type == "self_certified"
-    is_sign_to_code = cert_type == "sign_to_code"
-    
-    # Build jurisdictions from selected ones and their questionnaire responses
-    jurisdictions = []
-    
-    if "eu" in jurisdictions_selected:
-        eu_responses = {k: v for k, v in kwargs.items() if k.startswith(("gdpr_", "aiact_"))}
-        jurisdictions.append({
-            "jurisdiction": "EU",
-            "compliant": True,
-            "regulations": ["GDPR", "EU AI Act"],
-            "questionnaire_url": "https://raw.githubusercontent.com/mattpagett/CBAAC/main/questionnaires/eu-gdpr-aiact.json",
-            "third_party_audit": is_third_party,
-            "automated_verification": is_auto,
-            "self_certified": is_self,
-            "sign_to_code": is_sign_to_code,
-            "certification_date": datetime.now(timezone.utc).isoformat(),
-            "responses": eu_responses
-        })
-    
-    if "japan" in jurisdictions_selected:
-        japan_responses = {k: v for k, v in kwargs.items() if k.startswith(("appi_", "meti_"))}
-        jurisdictions.append({
-            "jurisdiction": "Japan",
-            "compliant": True,
-            "regulations": ["APPI", "METI AI Guidelines"],
-            "questionnaire_url": "https://raw.githubusercontent.com/mattpagett/CBAAC/main/questionnaires/japan-appi-meti.json",
-            "third_party_audit": is_third_party,
-            "automated_verification": is_auto,
-            "self_certified": is_self,
-            "sign_to_code": is_sign_to_code,
-            "certification_date": datetime.now(timezone.utc).isoformat(),
-            "responses": japan_responses
-        })
-    
-    if "korea" in jurisdictions_selected:
-        korea_responses = {k: v for k, v in kwargs.items() if k.startswith(("korea_", "pipa_"))}
-        jurisdictions.append({
-            "jurisdiction": "Korea",
-            "compliant": True,
-            "regulations": ["AI Basic Act", "PIPA"],
-            "questionnaire_url": "https://raw.githubusercontent.com/mattpagett/CBAAC/main/questionnaires/korea-ai-basic-act.json",
-            "third_party_audit": is_third_party,
-            "automated_verification": is_auto,
-            "self_certified": is_self,
-            "sign_to_code": is_sign_to_code,
-            "certification_date": datetime.now(timezone.utc).isoformat(),
-            "responses": korea_responses
-        })
-    
-    # Handle cultural if selected
-    cultural_benchmarks = None
-    if "cultural" in jurisdictions_selected:
-        cultural_responses = {k: v for k, v in kwargs.items() if k.startswith(("cult_", "behav_", "coop_"))}
-        cultural_benchmarks = {
-            "tested_cultures": kwargs.get("cult_02", []) if kwargs.get("cult_02") else [],
-            "certified": len(cultural_responses) > 0,
-            "certification_type": cert_type,
-            "responses": cultural_responses
-        }
-    
-    # Build NANDA-compatible manifest
-    manifest = {
-        "@context": [
-            "https://spec.projectnanda.org/agentfacts/v1",
-            "../schema/compliance-extension.json"
-        ],
-        
-        "// STANDARD NANDA AGENTFACTS FIELDS": "===",
-        "id": f"nanda:{kwargs.get('agent_id', 'your-agent-001')}",
-        "agent_name": f"urn:agent:{kwargs.get('provider_name', 'yourcompany').lower().replace(' ','')}:{kwargs.get('agent_name', 'YourAgent')}",
-        "label": kwargs.get("agent_name", "Your Agent"),
-        "description": kwargs.get("agent_description", "AI agent description"),
-        "version": kwargs.get("agent_version", "1.0.0"),
-        
-        "provider": {
-            "name": kwargs.get("provider_name", "Your Company"),
-            "url": kwargs.get("provider_url", "https://yourcompany.com"),
-            "did": f"did:web:{kwargs.get('provider_url', 'yourcompany.com').replace('https://', '').replace('http://', '')}"
-        },
-        
-        "// CBAAC COMPLIANCE EXTENSION": "===",
-        "certification_type": cert_type,
-        "compliance_attestations": {
-            "jurisdictions": jurisdictions,
-            "cultural_benchmarks": cultural_benchmarks
-        },
-        
-        "security_certifications": {
-            "iso_42001": {
-                "certified": kwargs.get("sec_iso_01") == "yes",
-                "certification_body": kwargs.get("sec_iso_02", ""),
-                "certificate_url": kwargs.get("sec_iso_03", ""),
-                "valid_until": kwargs.get("sec_iso_04", "")
-            } if kwargs.get("sec_iso_01") else None,
-            "nist_ai_rmf": {
-                "aligned": kwargs.get("sec_nist_01") == "yes",
-                "ai_600_1_assessed": kwargs.get("sec_nist_02") == "yes",
-                "functions_implemented": kwargs.get("sec_nist_03", []),
-                "report_url": kwargs.get("sec_nist_04", "")
-            } if kwargs.get("sec_nist_01") else None,
-            "mlcommons_ailuminate": {
-                "tested": kwargs.get("sec_mlc_01") == "yes",
-                "safety_grade": kwargs.get("sec_mlc_02", ""),
-                "jailbreak_tested": kwargs.get("sec_mlc_03") == "yes",
-                "test_date": kwargs.get("sec_mlc_04", ""),
-                "report_url": kwargs.get("sec_mlc_05", "")
-            } if kwargs.get("sec_mlc_01") else None,
-            "owasp_llm_top10": {
-                "tested": kwargs.get("sec_owasp_01") == "yes",
-                "vulnerabilities_tested": kwargs.get("sec_owasp_02", []),
-                "vulnerabilities_found": int(kwargs.get("sec_owasp_03", 0) or 0),
-                "report_url": kwargs.get("sec_owasp_04", "")
-            } if kwargs.get("sec_owasp_01") else None,
-            "singapore_ai_verify": {
-                "tested": kwargs.get("sec_sgv_01") == "yes",
-                "principles_tested": kwargs.get("sec_sgv_02", []),
-                "report_url": kwargs.get("sec_sgv_03", "")
-            } if kwargs.get("sec_sgv_01") else None,
-            "red_team_testing": {
-                "tested": kwargs.get("sec_red_01") == "yes",
-                "tester_type": kwargs.get("sec_red_02", ""),
-                "tester_name": kwargs.get("sec_red_03", ""),
-                "prompt_injection_resistant": kwargs.get("sec_red_04") == "yes",
-                "jailbreak_resistant": kwargs.get("sec_red_05") == "yes",
-                "test_date": kwargs.get("sec_red_06", "")
-            } if kwargs.get("sec_red_01") else None
-        } if "security" in jurisdictions_selected else None,
-        
-        "third_party_audit": {
-            "auditor_org": kwargs.get("auditor_org", ""),
-            "auditor_did": kwargs.get("auditor_did", ""),
-            "auditor_accreditation": kwargs.get("auditor_accreditation", ""),
-            "auditor_email": kwargs.get("auditor_email", ""),
-            "audit_date": datetime.now(timezone.utc).isoformat(),
-            "signature": kwargs.get("auditor_signature", ""),
-            "public_key_url": kwargs.get("auditor_pubkey_url", ""),
-            "verification_status": "signed" if kwargs.get("auditor_signature") else "pending"
-        } if is_third_party else None,
-        
-        "model_provider_compliance": {
-            "provider_name": kwargs.get("model_provider", ""),
-            "model_name": kwargs.get("model_name", ""),
-            "gpai_compliant": kwargs.get("gpai_compliant") == "on"
-        },
-        
-        "codebase_verification": {
-            "hash": kwargs.get("codebase_hash", "sha256:..."),
-            "hash_algorithm": "sha256",
-            "signed_by": f"did:web:{kwargs.get('provider_url', 'yourcompany.com').replace('https://', '').replace('http://', '')}",
-            "signed_at": datetime.now(timezone.utc).isoformat(),
-            "sign_to_code_enabled": is_sign_to_code
-        } if is_sign_to_code or kwargs.get("codebase_hash") else None
-    }
-    
-    # Clean up None values
-    manifest = {k: v for k, v in manifest.items() if v is not None}
+    built = BUILDER.build(await request.form())
+    manifest = built.manifest
     
     manifest_json = json.dumps(manifest, indent=2)
     
@@ -905,11 +775,9 @@ async def post(request):
   "codebase_verification": { "..." }
 }"""
     
-    received_count = len([k for k in kwargs.keys() if k.startswith(("gdpr_", "aiact_", "appi_", "meti_", "korea_", "pipa_", "cult_", "behav_", "coop_", "sec_"))])
-    
     return Div(
         H3("✓ Manifest Generated"),
-        P(f"Received {received_count} questionnaire responses", style="color:#888; font-size:13px;"),
+        P(f"Received {built.responses} questionnaire responses", style="color:#888; font-size:13px;"),
         
         Div(
             Div(
@@ -0,0 +1,351 @@
+"""
+Third-Party Audit Signatures
+
+Verifies the Ed25519 signature in a manifest's third_party_audit block (and
+in any per-jurisdiction third_party_audit object) over the canonical JSON of
+the manifest with every audit's signature and verification_status removed.
+An audit with "canonicalization": "cbmf-v2" signs the canonical binary
+encoding (manifest_binary) of that same manifest instead.
+Only auditors listed in trusted_auditors.json can verify: each entry pins
+an Ed25519 JWK, or is null to resolve the key from the DID itself (did:key,
+or did:web's did.json), cached with expiry so a rotated key is picked up.
+A DID that is not listed is never resolved and its audits stay unknown_key.
+
+Only a verified signature earns the green tier; see
+policy_engine.get_attestation_level(audit_verified=...).
+
+Requires the `cryptography` package.
+"""
+
+import base64
+import binascii
+import json
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+import manifest_binary
+from policy_engine import canonical_json
+
+DEMO_DIR = Path(__file__).parent
+TRUSTED_AUDITORS = DEMO_DIR / "trusted_auditors.json"
+
+DEFAULT_KEY_TTL = 3600      # seconds a resolved key is trusted before re-resolving
+NEGATIVE_KEY_TTL = 60       # seconds an unresolvable DID is remembered as such
+UNSIGNED_FIELDS = ("signature", "verification_status")
+
+# Verification outcomes, best first
+VERIFIED, INVALID, UNKNOWN_KEY, MALFORMED, UNSIGNED = "verified", "invalid", "unknown_key", "malformed", "unsigned"
+REVOKED = "revoked"  # signed by an auditor DID on the revocation list
+
+_BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_ED25519_MULTICODEC = b"\xed\x01"
+
+
+# ─────────────────────────────────────────────────────────
+# ENCODINGS
+# ─────────────────────────────────────────────────────────
+
+def _b64decode(text: str) -> bytes:
+    text = "".join(text.split())
+    return base64.urlsafe_b64decode(text.replace("+", "-").replace("/", "_") + "=" * (-len(text) % 4))
+
+
+def decode_signature(signature: str) -> bytes:
+    """The 64 signature bytes from base64, optionally wrapped in -----BEGIN/END SIGNATURE----- lines."""
+    body = "".join(line for line in signature.strip().splitlines() if not line.startswith("-----"))
+    raw = _b64decode(body)
+    if len(raw) != 64:
+        raise ValueError(f"Ed25519 signature must be 64 bytes, got {len(raw)}")
+    return raw
+
+
+def encode_signature(raw: bytes) -> str:
+    b64 = base64.b64encode(raw).decode()
+    return "-----BEGIN SIGNATURE-----\n" + b64 + "\n-----END SIGNATURE-----"
+
+
+def _base58_decode(text: str) -> bytes:
+    n = 0
+    for c in text:
+        n = n * 58 + _BASE58.index(c)
+    raw = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return b"\x00" * (len(text) - len(text.lstrip("1"))) + raw
+
+
+def _key_from_multibase(value: str) -> bytes:
+    if not value.startswith("z"):
+        raise ValueError("only base58btc multibase keys are supported")
+    raw = _base58_decode(value[1:])
+    if not raw.startswith(_ED25519_MULTICODEC):
+        raise ValueError("not an Ed25519 multicodec key")
+    return raw[len(_ED25519_MULTICODEC):]
+
+
+def _key_from_jwk(jwk: dict) -> bytes:
+    if jwk.get("kty") != "OKP" or jwk.get("crv") != "Ed25519":
+        raise ValueError("not an Ed25519 JWK")
+    return _b64decode(jwk["x"])
+
+
+# ─────────────────────────────────────────────────────────
+# KEY RESOLUTION
+# ─────────────────────────────────────────────────────────
+
+def _read_auditors(path) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load_trusted_auditors(path=TRUSTED_AUDITORS) -> dict:
+    """{auditor_did: raw public key} for the pinned (JWK) entries of a {did: JWK | null} file."""
+    return {did: _key_from_jwk(jwk) for did, jwk in _read_auditors(path).items() if jwk is not None}
+
+
+def load_accredited_auditors(path=TRUSTED_AUDITORS) -> frozenset:
+    """The DIDs listed with null in a {did: JWK | null} file, whose keys are resolved from the DID."""
+    return frozenset(did for did, jwk in _read_auditors(path).items() if jwk is None)
+
+
+def did_web_url(did: str) -> str:
+    """did:web:host[:path...] -> the URL of its did.json."""
+    parts = [urllib.request.unquote(p) for p in did.split(":")[2:]]
+    if len(parts) == 1:
+        return f"https://{parts[0]}/.well-known/did.json"
+    return f"https://{parts[0]}/{'/'.join(parts[1:])}/did.json"
+
+
+def resolve_did(did: str, timeout: float = 5.0) -> bytes:
+    """Raw Ed25519 public key for did:key or did:web; raises ValueError if none is found."""
+    if did.startswith("did:key:"):
+        return _key_from_multibase(did.split(":", 2)[2].split("#")[0])
+    if did.startswith("did:web:"):
+        try:
+            with urllib.request.urlopen(did_web_url(did), timeout=timeout) as response:
+                document = json.loads(response.read())
+        except OSError as e:
+            raise ValueError(f"could not fetch DID document for {did}: {e}") from e
+        for method in document.get("verificationMethod") or ():
+            if "publicKeyMultibase" in method:
+                return _key_from_multibase(method["publicKeyMultibase"])
+            if "publicKeyJwk" in method and method["publicKeyJwk"].get("crv") == "Ed25519":
+                return _key_from_jwk(method["publicKeyJwk"])
+        raise ValueError(f"no Ed25519 verification method in DID document for {did}")
+    raise ValueError(f"unsupported DID method: {did}")
+
+
+class KeyCache:
+    """Ed25519 public keys by auditor_did, re-resolved after ttl seconds.
+
+    Keys in trusted (e.g. load_trusted_auditors()) never expire and are never
+    resolved over the network. DIDs in accredited (load_accredited_auditors())
+    are resolved and re-resolved after ttl; any other DID has no key, so a
+    self-issued did:key cannot vouch for itself. Resolution failures are
+    remembered for negative_ttl seconds so a bad DID in a large batch is
+    looked up once.
+    """
+
+    def __init__(self, trusted: dict = None, accredited=(), resolve=resolve_did, ttl: float = DEFAULT_KEY_TTL,
+                 negative_ttl: float = NEGATIVE_KEY_TTL, max_entries: int = 10_000, clock=time.monotonic):
+        self.trusted = {did: Ed25519PublicKey.from_public_bytes(raw) for did, raw in (trusted or {}).items()}
+        self.accredited = frozenset(accredited)
+        self.resolve = resolve
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()  # did -> (expires, Ed25519PublicKey | None)
+        self.hits = self.misses = 0
+
+    def get(self, did: str):
+        """The auditor's Ed25519PublicKey, or None if it cannot be resolved."""
+        key = self.trusted.get(did)
+        if key is not None:
+            self.hits += 1
+            return key
+        if did not in self.accredited:
+            return None
+        now = self.clock()
+        entry = self.entries.get(did)
+        if entry is not None and entry[0] > now:
+            self.entries.move_to_end(did)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        try:
+            key = Ed25519PublicKey.from_public_bytes(self.resolve(did))
+            expires = now + self.ttl
+        except ValueError:
+            key, expires = None, now + self.negative_ttl
+        self.entries[did] = (expires, key)
+        self.entries.move_to_end(did)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return key
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "trusted": len(self.trusted), "accredited": len(self.accredited),
+                "hits": self.hits, "misses": self.misses}
+
+    def allowed(self) -> frozenset:
+        """Every DID this cache can return a key for."""
+        return self.accredited.union(self.trusted)
+
+
+def load_key_cache(path=TRUSTED_AUDITORS, **kwargs) -> KeyCache:
+    """A KeyCache over the pinned and accredited auditors listed in path."""
+    return KeyCache(load_trusted_auditors(path), load_accredited_auditors(path), **kwargs)
+
+
+# ─────────────────────────────────────────────────────────
+# SIGNING PAYLOAD
+# ─────────────────────────────────────────────────────────
+
+def _unsigned(audit):
+    return {k: v for k, v in audit.items() if k not in UNSIGNED_FIELDS} if isinstance(audit, dict) else audit
+
+
+def audits(manifest: dict) -> list:
+    """Every third_party_audit object in the manifest: top level first, then per jurisdiction."""
+    found = [manifest.get("third_party_audit")]
+    found += [j.get("third_party_audit") for j in (manifest.get("compliance_attestations") or {}).get("jurisdictions") or ()]
+    return [a for a in found if isinstance(a, dict)]
+
+
+def signing_payload(manifest: dict, canonicalization: str = None) -> bytes:
+    """canonical_json(manifest) with every audit's signature and verification_status removed.
+
+    With canonicalization="cbmf-v2", manifest_binary.encode() of the same
+    document instead.
+    """
+    unsigned = dict(manifest)
+    if "third_party_audit" in unsigned:
+        unsigned["third_party_audit"] = _unsigned(unsigned["third_party_audit"])
+    attestations = unsigned.get("compliance_attestations")
+    if isinstance(attestations, dict) and attestations.get("jurisdictions"):
+        unsigned["compliance_attestations"] = {
+            **attestations,
+            "jurisdictions": [{**j, "third_party_audit": _unsigned(j["third_party_audit"])}
+                              if isinstance(j.get("third_party_audit"), dict) else j
+                              for j in attestations["jurisdictions"]],
+        }
+    if canonicalization == manifest_binary.CANONICALIZATION:
+        return manifest_binary.encode(unsigned)
+    if canonicalization is not None:
+        raise ValueError(f"unsupported canonicalization: {canonicalization}")
+    return canonical_json(unsigned)
+
+
+def sign_manifest(manifest: dict, private_key: Ed25519PrivateKey, auditor_did: str, canonicalization: str = None) -> dict:
+    """A copy of manifest with its top-level third_party_audit signed by private_key.
+
+    canonicalization="cbmf-v2" signs the binary encoding and records that
+    choice in the (signed) audit block.
+    """
+    audit = {**(manifest.get("third_party_audit") or {}), "auditor_did": auditor_did}
+    if canonicalization is not None:
+        audit["canonicalization"] = canonicalization
+    signed = {**manifest, "third_party_audit": audit}
+    signature = private_key.sign(signing_payload(signed, canonicalization))
+    signed["third_party_audit"].update(signature=encode_signature(signature), verification_status="signed")
+    return signed
+
+
+# ─────────────────────────────────────────────────────────
+# VERIFICATION
+# ─────────────────────────────────────────────────────────
+
+def _verify_one(keys: KeyCache, manifest: dict) -> str:
+    found = [a for a in audits(manifest) if a.get("signature")]
+    if not found:
+        return UNSIGNED
+    payloads = {}  # canonicalization -> signing payload
+    outcomes = set()
+    for audit in found:
+        key = keys.get(audit.get("auditor_did") or "")
+        if key is None:
+            outcomes.add(UNKNOWN_KEY)
+            continue
+        try:
+            canonicalization = audit.get("canonicalization")
+            if not isinstance(canonicalization, (str, type(None))):
+                raise ValueError("canonicalization must be a string")
+            if canonicalization not in payloads:
+                payloads[canonicalization] = signing_payload(manifest, canonicalization)
+            key.verify(decode_signature(audit["signature"]), payloads[canonicalization])
+            outcomes.add(VERIFIED)
+        except (ValueError, binascii.Error):
+            outcomes.add(MALFORMED)
+        except InvalidSignature:
+            outcomes.add(INVALID)
+    # Any forged audit disqualifies the manifest, even alongside a valid one
+    for status in (INVALID, MALFORMED, VERIFIED):
+        if status in outcomes:
+            return status
+    return UNKNOWN_KEY
+
+
+class AuditVerifier:
+    """Verifies audit signatures, memoizing outcomes by manifest digest.
+
+    A verified outcome is kept for the key cache's ttl, so a rotated or
+    revoked auditor key takes effect without a restart. Auditor DIDs on a
+    revocation list (revocation.RevocationIndex) are checked on every call,
+    ahead of the memoized outcome.
+    """
+
+    def __init__(self, keys: KeyCache = None, max_entries: int = 100_000, clock=time.monotonic, revocations=None):
+        self.keys = keys if keys is not None else load_key_cache()
+        self.revocations = revocations
+        self.max_entries = max_entries
+        self.clock = clock
+        self.results = OrderedDict()  # manifest digest -> (expires, status)
+
+    def status(self, manifest: dict, manifest_digest: str = None) -> str:
+        """One of VERIFIED, REVOKED, INVALID, UNKNOWN_KEY, MALFORMED or UNSIGNED."""
+        if self._revoked(manifest):
+            return REVOKED
+        key = manifest_digest or manifest_binary.digest(manifest)
+        now = self.clock()
+        entry = self.results.get(key)
+        if entry is not None and entry[0] > now:
+            self.results.move_to_end(key)
+            return entry[1]
+        status = _verify_one(self.keys, manifest)
+        self.results[key] = (now + (self.keys.ttl if status == VERIFIED else self.keys.negative_ttl), status)
+        while len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
+        return status
+
+    def _revoked(self, manifest: dict) -> bool:
+        return self.revocations is not None and any(
+            self.revocations.auditor_revoked(a.get("auditor_did") or "") for a in audits(manifest) if a.get("signature"))
+
+    def verified(self, manifest: dict, manifest_digest: str = None) -> bool:
+        return self.status(manifest, manifest_digest) == VERIFIED
+
+    def status_many(self, manifests, workers: int = 1, chunk_size: int = 512) -> list:
+        """Verify a batch of manifests, returning their statuses in order.
+
+        Each distinct auditor key is resolved once for the whole batch and
+        manifests are verified in chunks; with workers > 1 the chunks run on
+        a thread pool.
+        """
+        manifests = list(manifests)
+        for did in {a.get("auditor_did") or "" for m in manifests for a in audits(m) if a.get("signature")}:
+            self.keys.get(did)
+        chunks = [manifests[i:i + chunk_size] for i in range(0, len(manifests), chunk_size)]
+        verify_chunk = lambda chunk: [REVOKED if self._revoked(m) else _verify_one(self.keys, m) for m in chunk]
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as pool:
+                return [status for statuses in pool.map(verify_chunk, chunks) for status in statuses]
+        return [status for chunk in chunks for status in verify_chunk(chunk)]
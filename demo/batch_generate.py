@@ -0,0 +1,221 @@
+"""
+Bulk Manifest Generation
+
+Streams stored questionnaire submissions (JSONL, one submission's fields
+per line) through a process pool: each is validated against the
+questionnaires, built into a manifest, hashed and signed, and written out
+as one JSONL record, in input order, without holding the corpus in memory.
+
+Output record:
+    {"source": "responses.jsonl:12", "id": "nanda:...", "digest": "sha256:...",
+     "canonicalization": "cbmf-v2", "signed_by": "did:web:...",
+     "signature": "<base64url Ed25519>", "manifest": {...}}
+
+digest is manifest_binary.digest(manifest), the manifest digest used
+everywhere else, and signature is over the same CBMF bytes; the manifest
+itself is written as canonical JSON. Without --key records are hashed only. Submissions that fail
+validation go to --rejects (if given) with their errors, and are counted
+by reason. Signing requires the `cryptography` package.
+
+Run with: python manifest_builder.py batch responses.jsonl --key signer.pem --signer did:web:example.com
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from batch_verify import chunked, iter_sources, peak_rss_mb, reason_key
+from manifest_builder import QUESTIONNAIRE_DIR, ManifestBuilder, load_questionnaires
+import manifest_binary
+from policy_engine import canonical_json
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Per-worker state, set once by _init_worker
+_BUILDER = None
+_NOW = None
+_KEY = None
+_SIGNER = None
+_ENCODE_SIGNATURE = None
+
+
+# ─────────────────────────────────────────────────────────
+# SIGNING
+# ─────────────────────────────────────────────────────────
+
+def load_signing_key(path):
+    """The Ed25519 private key in a PEM (PKCS#8) file."""
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+    with open(path, "rb") as f:
+        key = load_pem_private_key(f.read(), password=None)
+    if not isinstance(key, Ed25519PrivateKey):
+        raise ValueError("not an Ed25519 private key")
+    return key
+
+
+def verify_record(record: dict, public_key) -> bool:
+    """Whether an output record's digest and signature both match its manifest."""
+    import audit_signatures
+    payload = manifest_binary.encode(record["manifest"])
+    if record.get("digest") != "sha256:" + hashlib.sha256(payload).hexdigest():
+        return False
+    try:
+        public_key.verify(audit_signatures.decode_signature(record["signature"]), payload)
+    except (audit_signatures.InvalidSignature, KeyError, ValueError):
+        return False
+    return True
+
+
+# ─────────────────────────────────────────────────────────
+# WORKERS
+# ─────────────────────────────────────────────────────────
+
+def _init_worker(questionnaires, now, key_bytes=None, signer=None):
+    global _BUILDER, _NOW, _KEY, _SIGNER, _ENCODE_SIGNATURE
+    _BUILDER = ManifestBuilder(questionnaires)
+    _NOW = now
+    _SIGNER = signer
+    if key_bytes is not None:
+        import audit_signatures
+        _KEY = audit_signatures.Ed25519PrivateKey.from_private_bytes(key_bytes)
+        _ENCODE_SIGNATURE = audit_signatures.encode_signature
+
+
+def generate_chunk(chunk) -> list:
+    """Validate, build, hash and sign one work unit of (source, line) items.
+
+    Returns (True, record line) or (False, reject line) per item, serialized
+    here so the parent only writes. A submission that fails to build is
+    rejected like an invalid one.
+    """
+    out = []
+    for source, line in chunk:
+        try:
+            fields = json.loads(line if line is not None else Path(source).read_text())
+        except (OSError, ValueError) as e:
+            errors = [f"Unreadable submission: {e}"]
+        else:
+            errors = _BUILDER.validate(fields) if isinstance(fields, dict) else ["Submission is not an object"]
+        if not errors:
+            try:
+                out.append((True, _record(source, fields)))
+                continue
+            except Exception as e:      # one submission validate() missed must not end the run
+                errors = [f"Build failed: {type(e).__name__}: {e}"]
+        out.append((False, json.dumps({"source": source, "errors": errors}, separators=(",", ":")) + "\n"))
+    return out
+
+
+def _record(source, fields) -> str:
+    manifest = _BUILDER.build(fields, _NOW).manifest
+    payload = manifest_binary.encode(manifest)
+    record = {"source": source, "id": manifest["id"],
+              "digest": "sha256:" + hashlib.sha256(payload).hexdigest(),
+              "canonicalization": manifest_binary.CANONICALIZATION}
+    if _KEY is not None:
+        record["signed_by"] = _SIGNER
+        record["signature"] = _ENCODE_SIGNATURE(_KEY.sign(payload))
+    return (json.dumps(record, separators=(",", ":"))[:-1]
+            + ',"manifest":' + canonical_json(manifest).decode() + "}\n")
+
+
+# ─────────────────────────────────────────────────────────
+# PIPELINE
+# ─────────────────────────────────────────────────────────
+
+def run_generate(paths, out, questionnaires: dict = None, key=None, signer: str = None, rejects=None,
+                 workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, now: datetime = None) -> dict:
+    """Generate a manifest record for every valid submission under paths (as batch_verify.iter_sources reads them).
+
+    key is an Ed25519 private key (see load_signing_key); workers get its
+    raw bytes. Rejected submissions are written to rejects, if given.
+    At most two chunks per worker are in flight and records are written
+    in input order. Returns run statistics: submissions, manifests,
+    rejected, seconds and the per-reason rejection Counter.
+    """
+    questionnaires = questionnaires if questionnaires is not None else load_questionnaires(QUESTIONNAIRE_DIR)
+    now = now or datetime.now(timezone.utc)
+    key_bytes = key.private_bytes_raw() if key is not None else None
+    stats = {"submissions": 0, "manifests": 0, "rejected": 0, "reasons": Counter()}
+    start = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(questionnaires, now, key_bytes, signer)) as pool:
+        max_inflight = 2 * workers
+        inflight = deque()
+
+        def drain_one():
+            for ok, line in inflight.popleft().result():
+                stats["submissions"] += 1
+                if ok:
+                    stats["manifests"] += 1
+                    out.write(line)
+                    continue
+                stats["rejected"] += 1
+                stats["reasons"].update(reason_key(e) for e in json.loads(line)["errors"])
+                if rejects is not None:
+                    rejects.write(line)
+
+        for chunk in chunked(iter_sources(paths), chunk_size):
+            if len(inflight) >= max_inflight:
+                drain_one()
+            inflight.append(pool.submit(generate_chunk, chunk))
+        while inflight:
+            drain_one()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def print_report(stats: dict, out=sys.stderr):
+    seconds = stats["seconds"] or 1e-9
+    parent, children = peak_rss_mb()
+    print(f"\nGenerated {stats['manifests']:,} manifests from {stats['submissions']:,} submissions "
+          f"in {seconds:.2f}s ({stats['manifests'] / seconds:,.0f} manifests/s)", file=out)
+    print(f"Rejected: {stats['rejected']:,}", file=out)
+    for reason, count in stats["reasons"].most_common():
+        print(f"  {count:>10,}  {reason}", file=out)
+    print(f"Peak RSS: {parent:,.1f} MB (parent), {children:,.1f} MB (largest worker)", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manifest_builder.py batch",
+                                     description="Generate signed manifests from stored questionnaire responses.")
+    parser.add_argument("inputs", nargs="+", help="JSONL files (one submission's fields per line), .json files or directories")
+    parser.add_argument("--output", "-o", help="manifest record JSONL (default: stdout)")
+    parser.add_argument("--rejects", help="JSONL of submissions that failed validation, with their errors")
+    parser.add_argument("--key", help="Ed25519 private key (PEM) to sign each manifest with")
+    parser.add_argument("--signer", help="DID recorded as signed_by (required with --key)")
+    parser.add_argument("--questionnaires", default=QUESTIONNAIRE_DIR, help="questionnaire directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="submissions per work unit")
+    args = parser.parse_args(argv)
+
+    if args.key and not args.signer:
+        parser.error("--signer is required with --key")
+    try:
+        key = load_signing_key(args.key) if args.key else None
+    except (OSError, ValueError) as e:
+        sys.exit(f"{args.key}: {e}")
+    questionnaires = load_questionnaires(args.questionnaires)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    rejects = open(args.rejects, "w") if args.rejects else None
+    try:
+        stats = run_generate(args.inputs, out, questionnaires, key, args.signer, rejects,
+                             args.workers, args.chunk_size)
+    finally:
+        if args.output:
+            out.close()
+        if rejects is not None:
+            rejects.close()
+    print_report(stats)
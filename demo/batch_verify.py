@@ -0,0 +1,268 @@
+"""
+Bulk Batch Verification
+
+Streams manifests from JSONL files or directories, checks each against one
+or more policies across a process pool, and writes verdicts as JSONL or CSV
+without holding the corpus in memory.
+
+Run with: python verify_chain.py batch manifests.jsonl --policy company_a_policy.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import resource
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+from manifest_stream import load_manifest
+from policy_engine import MALFORMED, CompiledPolicy
+from schema_validator import load_validator
+
+DEMO_DIR = Path(__file__).parent
+DEFAULT_CHUNK_SIZE = 1000
+CSV_FIELDS = ["source", "agent_id", "policy", "pass", "reasons", "warnings"]
+
+# Per-worker state, set once by _init_worker
+_POLICIES = ()
+_NOW = None
+_VALIDATOR = None
+_REVOCATIONS = None
+
+
+# ─────────────────────────────────────────────────────────
+# INPUT
+# ─────────────────────────────────────────────────────────
+
+def iter_sources(paths):
+    """Yield (source, json_text_or_None) for every manifest under paths.
+
+    JSONL lines carry their text; directory entries yield None so the worker
+    reads the file itself (streaming large ones) and the parent never holds
+    manifest bodies.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            for p in sorted(path.rglob("*.json")):
+                yield str(p), None
+        elif path.suffix == ".json":
+            yield str(path), None
+        else:
+            with open(path) as f:
+                for lineno, line in enumerate(f, 1):
+                    if line.strip():
+                        yield f"{path}:{lineno}", line
+
+
+def chunked(iterable, size: int):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+# ─────────────────────────────────────────────────────────
+# WORKERS
+# ─────────────────────────────────────────────────────────
+
+def _init_worker(policies, now, validate=False, revocations=None):
+    global _POLICIES, _NOW, _VALIDATOR, _REVOCATIONS
+    _POLICIES = tuple((name, CompiledPolicy(p)) for name, p in policies)
+    _NOW = now
+    _VALIDATOR = load_validator() if validate else None
+    _REVOCATIONS = revocations
+
+
+def _failed_rows(source, agent_id, reason) -> list:
+    return [{"source": source, "agent_id": agent_id, "policy": name, "pass": False,
+             "reasons": [reason], "warnings": []} for name, _ in _POLICIES]
+
+
+def verify_chunk(chunk) -> list:
+    """Check one work unit of (source, text) items against every policy.
+
+    With a revocation filter, rows of manifests that may name something
+    revoked carry the candidates for the parent to confirm. A record that
+    cannot be checked becomes a failing row; the rest of the chunk goes on.
+    """
+    rows = []
+    for source, text in chunk:
+        try:
+            manifest = load_manifest(source) if text is None else json.loads(text)
+        except (OSError, ValueError) as e:
+            rows.extend(_failed_rows(source, None, f"Unreadable manifest: {e}"))
+            continue
+        if not isinstance(manifest, dict):
+            rows.extend(_failed_rows(source, None, "Malformed manifest: not a JSON object"))
+            continue
+        agent_id = manifest.get("id")
+        error = _VALIDATOR.first_error(manifest) if _VALIDATOR else None
+        if error is not None:
+            rows.extend(_failed_rows(source, agent_id, f"Schema violation: {error}"))
+            continue
+        try:
+            candidates = _REVOCATIONS.candidates(manifest) if _REVOCATIONS else None
+            results = [(name, policy.check(manifest, _NOW)) for name, policy in _POLICIES]
+        except MALFORMED as e:
+            rows.extend(_failed_rows(source, agent_id, f"Malformed manifest: {e}"))
+            continue
+        for name, result in results:
+            row = {"source": source, "agent_id": agent_id, "policy": name, **result}
+            if candidates:
+                row["revocation_candidates"] = candidates
+            rows.append(row)
+    return rows
+
+
+# ─────────────────────────────────────────────────────────
+# OUTPUT
+# ─────────────────────────────────────────────────────────
+
+class JSONLWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, row):
+        self.out.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+
+class CSVWriter:
+    def __init__(self, out):
+        self.writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow({**row, "reasons": "; ".join(row["reasons"]),
+                              "warnings": "; ".join(row["warnings"])})
+
+
+def reason_key(reason: str) -> str:
+    """Collapse the variable parts of a reason so failures group by kind."""
+    return re.sub(r"\d+", "N", reason)
+
+
+def run_batch(paths, policies, out, fmt: str = "jsonl", workers: int = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, now: datetime = None, validate: bool = False,
+              revocations=None) -> dict:
+    """Verify every manifest under paths against each (name, policy) pair.
+
+    With validate, a manifest that violates the compliance extension schema
+    fails every policy with its first schema error instead of being checked.
+    With revocations (a revocation.RevocationIndex), workers get only its
+    Bloom filters; their candidates are confirmed here against the exact
+    sets, and a confirmed hit fails the verdict.
+
+    At most two chunks per worker are in flight, so memory stays flat no
+    matter how large the input is. Rows are written in input order.
+    Returns run statistics: manifests, verdicts, failures, seconds and the
+    per-reason failure Counter.
+    """
+    writer = CSVWriter(out) if fmt == "csv" else JSONLWriter(out)
+    now = now or datetime.now(timezone.utc)
+    stats = {"manifests": 0, "verdicts": 0, "failures": 0, "reasons": Counter()}
+    start = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    bloom = revocations.filter() if revocations is not None else None
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(policies, now, validate, bloom)) as pool:
+        max_inflight = 2 * workers
+        inflight = deque()
+
+        def drain_one():
+            chunk_len, future = inflight.popleft()
+            stats["manifests"] += chunk_len
+            for row in future.result():
+                candidates = row.pop("revocation_candidates", None)
+                if candidates:
+                    revoked = revocations.confirm(candidates)
+                    if revoked:
+                        row["pass"] = False
+                        row["reasons"] = row["reasons"] + revoked
+                stats["verdicts"] += 1
+                if not row["pass"]:
+                    stats["failures"] += 1
+                    stats["reasons"].update(reason_key(r) for r in row["reasons"])
+                writer.write(row)
+
+        for chunk in chunked(iter_sources(paths), chunk_size):
+            if len(inflight) >= max_inflight:
+                drain_one()
+            inflight.append((len(chunk), pool.submit(verify_chunk, chunk)))
+        while inflight:
+            drain_one()
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def peak_rss_mb() -> tuple:
+    """Peak resident set size of this process and of its (reaped) workers, in MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KB on Linux
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def print_report(stats: dict, out=sys.stderr):
+    seconds = stats["seconds"] or 1e-9
+    parent, children = peak_rss_mb()
+    print(f"\nVerified {stats['manifests']:,} manifests → {stats['verdicts']:,} verdicts "
+          f"in {seconds:.2f}s ({stats['manifests'] / seconds:,.0f} manifests/s, "
+          f"{stats['verdicts'] / seconds:,.0f} verdicts/s)", file=out)
+    print(f"Failures: {stats['failures']:,}", file=out)
+    for reason, count in stats["reasons"].most_common():
+        print(f"  {count:>10,}  {reason}", file=out)
+    print(f"Peak RSS: {parent:,.1f} MB (parent), {children:,.1f} MB (largest worker)", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="verify_chain.py batch",
+                                     description="Verify manifests from JSONL files or directories in bulk.")
+    parser.add_argument("inputs", nargs="+", help="JSONL files, .json files or directories of .json manifests")
+    parser.add_argument("--policy", action="append", dest="policies",
+                        help="policy file (repeatable; default: company_a_policy.json)")
+    parser.add_argument("--output", "-o", help="verdict file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="verdict format (default: from --output suffix, else jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="manifests per work unit")
+    parser.add_argument("--validate", action="store_true",
+                        help="fail manifests that violate schema/compliance-extension.json before checking")
+    parser.add_argument("--revocations", metavar="LIST",
+                        help="signed revocation list; manifests naming a revoked id, auditor or hash fail")
+    parser.add_argument("--revocation-delta", action="append", default=[], metavar="DELTA",
+                        help="signed delta to apply on top of --revocations (repeatable, in order)")
+    args = parser.parse_args(argv)
+
+    policy_paths = [Path(p) for p in args.policies or [DEMO_DIR / "company_a_policy.json"]]
+    policies = []
+    for p in policy_paths:
+        with open(p) as f:
+            policies.append((p.stem, json.load(f)))
+    revocations = None
+    if args.revocations:
+        import revocation
+        revocations = revocation.RevocationIndex()
+        for i, path in enumerate([args.revocations] + args.revocation_delta):
+            with open(path) as f:
+                doc = json.load(f)
+            try:
+                revocations.load(doc) if i == 0 else revocations.apply_delta(doc)
+            except ValueError as e:
+                sys.exit(f"{path}: {e}")
+    fmt = args.format or ("csv" if args.output and args.output.endswith(".csv") else "jsonl")
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        stats = run_batch(args.inputs, policies, out, fmt, args.workers, args.chunk_size,
+                          validate=args.validate, revocations=revocations)
+    finally:
+        if args.output:
+            out.close()
+    print_report(stats)
@@ -0,0 +1,933 @@
+"""
+Verification Benchmarks
+
+Run with: python benchmarks.py [name ...]
+With no names, every benchmark runs.
+"""
+
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from concurrent.futures import ThreadPoolExecutor
+
+from datetime import datetime, timedelta, timezone
+
+from chain_verifier import HTTPFetcher, StubFetcher, verify_chain
+from decision_log import DecisionLog, read_decisions
+from manifest_builder import DOMAINS, ManifestBuilder
+from manifest_cache import ManifestCache
+import audit_signatures
+import batch_generate
+import codebase_hash
+import columnar
+import manifest_binary
+import metrics
+from expiry_scheduler import ExpiryScheduler
+from manifest_store import ManifestStore
+from incremental import IncrementalVerifier
+import policy_sweep
+import schema_validator
+from policy_engine import CompiledPolicy, canonical_json, digest, get_attestation_level
+from registry import Registry
+import revocation
+from verdict_cache import VerdictCache
+from verify_chain import check_compliance, load_json
+
+DEMO_DIR = Path(__file__).parent
+
+
+def load_demo():
+    """Return the sample policy and the mock agent manifests."""
+    policy = load_json(DEMO_DIR / "company_a_policy.json")
+    manifests = [load_json(p) for p in sorted((DEMO_DIR / "mock_agents").glob("*.json"))]
+    return policy, manifests
+
+
+def synthetic_manifests(n: int, seed: int = 0):
+    """Yield n varied manifests shaped like mock_agents/*.json (about 1 in 200 empty)."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    providers = ["Anthropic", "OpenAI", "Google", "Mistral", "Cohere", None]
+    for i in range(n):
+        if rng.random() < 0.005:
+            yield {}
+            continue
+        jurisdictions = []
+        for code in rng.sample(["EU", "Japan", "Korea", "USA", "UK"], rng.randint(0, 3)):
+            entry = {"jurisdiction": code, "compliant": rng.random() < 0.9,
+                     "questionnaire_url": "https://example.test/q.json"}
+            if rng.random() < 0.9:
+                entry["attestation_date"] = (now - timedelta(days=rng.randint(0, 800))).strftime("%Y-%m-%dT00:00:00Z")
+            if rng.random() < 0.3:
+                entry["third_party_audit"] = True
+            elif rng.random() < 0.3:
+                entry["automated_verification"] = True
+            jurisdictions.append(entry)
+        subs = [{"agent_id": f"nanda:sub-{rng.randrange(n)}",
+                 "compliance_url": f"https://sub{k}.example.test/.well-known/compliance.json",
+                 "compliance_verified": rng.random() < 0.8}
+                for k in range(rng.choice([0, 0, 1, 2]))]
+        current = f"sha256:{rng.getrandbits(64):016x}" if rng.random() < 0.9 else None
+        yield {
+            "id": f"nanda:agent-{i}",
+            "label": f"Agent {i}",
+            "compliance_attestations": {"jurisdictions": jurisdictions, "cultural_benchmarks": None},
+            "model_provider_compliance": {"provider_name": rng.choice(providers),
+                                          "model_name": "model-x", "gpai_compliant": rng.random() < 0.8},
+            "sub_agent_compliance": {"uses_sub_agents": bool(subs) or rng.random() < 0.1,
+                                     "declared_sub_agents": subs},
+            "codebase_verification": {"current_hash": current,
+                                      "hash_at_attestation": current if rng.random() < 0.9 else "sha256:old"},
+        }
+
+
+def rate(fn, n: int) -> float:
+    """Call fn() n times and return calls per second."""
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+def rate_over(fn, items) -> float:
+    """Call fn(item) for each item and return items per second."""
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def report(label: str, value: float, unit: str):
+    print(f"  {label:<40} {value:>14,.0f} {unit}")
+
+
+def latency_percentiles(fn, requests: int, workers: int) -> tuple:
+    """Run fn() requests times across a thread pool; return (p50, p99) in µs."""
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(workers) as pool:
+        samples = sorted(pool.map(timed, range(requests)))
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def serve_manifests(manifests: dict, delay: float = 0):
+    """Serve {path: manifest} from a local keep-alive HTTP stub, each response delay seconds late.
+
+    Returns (server, base_url).
+    """
+    bodies = {path: json.dumps(m).encode() for path, m in manifests.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            body = bodies.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            etag = f'"{hash(body):x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            if not isinstance(sys.exc_info()[1], ConnectionError):  # clients that gave up are expected
+                super().handle_error(request, client_address)
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# ─────────────────────────────────────────────────────────
+# BENCHMARKS
+# ─────────────────────────────────────────────────────────
+
+def bench_policy(n: int = 100_000):
+    """Checks per second: per-call policy walking vs a precompiled policy."""
+    policy, manifests = load_demo()
+    compiled = CompiledPolicy(policy)
+    batch = (manifests * (n // len(manifests) + 1))[:n]
+
+    def uncompiled():
+        for m in batch:
+            check_compliance(m, policy)
+
+    def precompiled():
+        for m in batch:
+            compiled.check(m)
+
+    print("policy: check_compliance vs CompiledPolicy.check")
+    report("check_compliance(manifest, policy)", rate(uncompiled, 1) * n, "checks/s")
+    report("CompiledPolicy.check(manifest)", rate(precompiled, 1) * n, "checks/s")
+
+
+def bench_fetch_cache(n: int = 2_000):
+    """Per-fetch latency of a hot partner manifest: HTTP round-trip vs ManifestCache hit."""
+    _, manifests = load_demo()
+    server, base = serve_manifests({"/.well-known/compliance.json": manifests[0]})
+    url = base + "/.well-known/compliance.json"
+
+    async def run(fetcher):
+        start = time.perf_counter()
+        for _ in range(n):
+            await fetcher.fetch(url)
+        return (time.perf_counter() - start) / n * 1e6
+
+    print("fetch_cache: hot manifest fetch latency")
+    report("HTTPFetcher.fetch", asyncio.run(run(HTTPFetcher())), "µs/fetch")
+    cache = ManifestCache(HTTPFetcher())
+    report("ManifestCache.fetch", asyncio.run(run(cache)), "µs/fetch")
+    print(f"  {cache.stats()}")
+    server.shutdown()
+
+
+def bench_verdict_cache(n: int = 100_000):
+    """Verdicts per second: CompiledPolicy.check vs VerdictCache hits (digest known / hashed per call)."""
+    policy, manifests = load_demo()
+    compiled = CompiledPolicy(policy)
+    cache = VerdictCache()
+    batch = (manifests * (n // len(manifests) + 1))[:n]
+    digests = {id(m): manifest_binary.digest(m) for m in manifests}
+
+    print("verdict_cache: recompute vs memoized verdicts")
+    report("CompiledPolicy.check", rate(lambda: [compiled.check(m) for m in batch], 1) * n, "verdicts/s")
+    report("VerdictCache.check (digest given)",
+           rate(lambda: [cache.check(m, compiled, digests[id(m)]) for m in batch], 1) * n, "verdicts/s")
+    report("VerdictCache.check (digest per call)",
+           rate(lambda: [cache.check(m, compiled) for m in batch], 1) * n, "verdicts/s")
+    print(f"  {cache.stats()}")
+
+
+def bench_registry(requests: int = 20_000, workers: int = 8):
+    """/demo data path under load: read files per request vs the startup registry."""
+    agent_files = ["agent_b_travel", "agent_c_airline", "agent_d_sketchy"]
+    registry = Registry(DEMO_DIR)
+    verdicts = VerdictCache()
+
+    def from_disk():
+        policy = CompiledPolicy(load_json(DEMO_DIR / "company_a_policy.json"))
+        for stem in agent_files:
+            policy.check_agent(load_json(DEMO_DIR / "mock_agents" / f"{stem}.json"))
+
+    def from_registry():
+        snap = registry.snapshot
+        for stem in agent_files:
+            verdicts.check_agent(snap.manifests[stem], snap.compiled_policy, snap.manifest_digests[stem])
+
+    print(f"registry: per-request latency, {requests:,} requests on {workers} threads")
+    for label, fn in [("load_json per request", from_disk), ("Registry snapshot + VerdictCache", from_registry)]:
+        p50, p99 = latency_percentiles(fn, requests, workers)
+        print(f"  {label:<40} p50 {p50:>9,.1f} µs   p99 {p99:>9,.1f} µs")
+
+
+def bench_columnar(n: int = 200_000):
+    """Fleet what-if: row-by-row CompiledPolicy.check vs one vectorized pass (parity checked first)."""
+    policy, _ = load_demo()
+    what_if = {**policy, "regulatory_requirements": {
+        **policy["regulatory_requirements"], "required_jurisdictions": ["EU", "Korea"]}}
+    manifests = list(synthetic_manifests(n))
+    now = datetime.now(timezone.utc)
+
+    start = time.perf_counter()
+    table = columnar.ManifestTable(manifests)
+    build = time.perf_counter() - start
+
+    for p in (policy, what_if):
+        mismatches = columnar.parity_mismatches(table, manifests, p, now)
+        if mismatches:
+            sys.exit(f"columnar/scalar parity failed on {len(mismatches)} rows, e.g. {mismatches[:3]}")
+
+    compiled = CompiledPolicy(what_if)
+    start = time.perf_counter()
+    scalar_pass = sum(compiled.check(m, now)["pass"] for m in manifests)
+    scalar = time.perf_counter() - start
+    start = time.perf_counter()
+    vector_pass = int(columnar.evaluate(table, what_if, now).sum())
+    vector = time.perf_counter() - start
+    assert scalar_pass == vector_pass
+
+    print(f"columnar: 'require EU + Korea' over {n:,} manifests (parity: 0 mismatches)")
+    report("CompiledPolicy.check per row", n / scalar, "manifests/s")
+    report("columnar.evaluate", n / vector, "manifests/s")
+    report("ManifestTable build (one-off)", n / build, "manifests/s")
+    print(f"  {vector_pass:,} of {n:,} agents would pass")
+
+
+def bench_sweep(n: int = 20_000):
+    """All 64 /recheck variants: one CompiledPolicy pass per variant vs a single sweep."""
+    manifests = list(synthetic_manifests(n))
+    variants = policy_sweep.recheck_variants()
+    now = datetime.now(timezone.utc)
+
+    start = time.perf_counter()
+    compiled = {label: CompiledPolicy(p) for label, p in variants.items()}
+    per_variant = {label: sum(c.check_agent(m, now)["pass"] for m in manifests) for label, c in compiled.items()}
+    naive = time.perf_counter() - start
+    start = time.perf_counter()
+    result = policy_sweep.sweep(manifests, variants, agent=True, now=now)
+    swept = time.perf_counter() - start
+    assert result["pass_counts"] == per_variant
+
+    print(f"sweep: {len(variants)} policy variants x {n:,} manifests ({len(result['checks'])} distinct checks)")
+    report("per-variant CompiledPolicy.check_agent", len(variants) * n / naive, "verdicts/s")
+    report("policy_sweep.sweep", len(variants) * n / swept, "verdicts/s")
+
+
+def bench_incremental(n: int = 20_000):
+    """Re-verification after one policy edit and one manifest edit: full re-run vs incremental."""
+    policy, _ = load_demo()
+    manifests = [m for m in synthetic_manifests(n) if m]
+    now = datetime.now(timezone.utc)
+    verifier = IncrementalVerifier(policy, manifests, now)
+
+    edited = json.loads(json.dumps(policy))
+    edited["model_provider_requirements"]["blocked_providers"] = ["Mistral"]
+    start = time.perf_counter()
+    IncrementalVerifier(edited, manifests, now)
+    full = time.perf_counter() - start
+    runs = verifier.checks_run
+    start = time.perf_counter()
+    verifier.update_policy(edited)
+    incremental = time.perf_counter() - start
+    print(f"incremental: {len(manifests):,} agents, policy edit re-ran {verifier.checks_run - runs:,} checks")
+    report("policy edit, full re-run", full * 1000, "ms")
+    report("policy edit, incremental", incremental * 1000, "ms")
+
+    versions = [manifests[0], json.loads(json.dumps(manifests[0]))]
+    versions[1]["model_provider_compliance"]["gpai_compliant"] = not versions[0]["model_provider_compliance"]["gpai_compliant"]
+    edits = iter(range(10_000))
+    report("manifest edit, incremental",
+           rate(lambda: verifier.update_manifest(versions[next(edits) % 2]), 10_000), "edits/s")
+
+
+def write_large_manifest(path, mb: int, sub_agents: int = 1_000):
+    """Write a manifest of about mb megabytes, nearly all of it audit evidence the policy never reads.
+
+    codebase_verification comes last, so a reader has to get past the evidence to reach it.
+    """
+    policy_manifest = next(m for m in synthetic_manifests(10) if m)
+    blob = "".join(random.Random(1).choices("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/", k=1000))
+    with open(path, "w") as f:
+        f.write('{"id": %s, "compliance_attestations": %s, "model_provider_compliance": %s,\n'
+                % tuple(json.dumps(policy_manifest[k]) for k in
+                        ("id", "compliance_attestations", "model_provider_compliance")))
+        f.write('"audit_evidence": [')
+        for i in range(mb * 1000):
+            f.write('%s{"document": "evidence-%d.pdf", "sha256": "%064x", "content": "%s"}'
+                    % ("," if i else "", i, i, blob[i % 64:] + blob[:i % 64]))
+        subs = [{"agent_id": f"nanda:sub-{i}", "compliance_url": f"https://sub{i}.example.test/c.json",
+                 "compliance_verified": True} for i in range(sub_agents)]
+        f.write('],\n"sub_agent_compliance": %s,\n"codebase_verification": %s}\n'
+                % (json.dumps({"uses_sub_agents": True, "declared_sub_agents": subs}),
+                   json.dumps(policy_manifest["codebase_verification"])))
+
+
+_LOAD_AND_CHECK = """
+import json, sys, time
+from manifest_stream import load_manifest
+from policy_engine import CompiledPolicy
+start = time.perf_counter()
+if sys.argv[2] == "stream":
+    manifest = load_manifest(sys.argv[1])
+else:
+    with open(sys.argv[1]) as f:
+        manifest = json.load(f)
+seconds = time.perf_counter() - start
+with open(sys.argv[3]) as f:
+    result = CompiledPolicy(json.load(f)).check(manifest)
+print(json.dumps({"seconds": seconds, "pass": result["pass"], "reasons": result["reasons"]}))
+"""
+
+
+def _load_in_child(path, mode: str) -> tuple:
+    """Load and check the manifest in a fresh interpreter; returns (result, peak RSS in MB)."""
+    proc = subprocess.Popen([sys.executable, "-c", _LOAD_AND_CHECK, str(path), mode,
+                             str(DEMO_DIR / "company_a_policy.json")],
+                            cwd=DEMO_DIR, stdout=subprocess.PIPE, text=True)
+    out = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode:
+        raise RuntimeError(f"{mode} loader exited with {proc.returncode}")
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return json.loads(out), usage.ru_maxrss / scale
+
+
+def bench_stream(mb: int = 500):
+    """Peak memory and time to load a huge manifest: json.load vs the streaming reader."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "large_manifest.json"
+        write_large_manifest(path, mb)
+        size = path.stat().st_size / 1e6
+        streamed, stream_rss = _load_in_child(path, "stream")
+        loaded, load_rss = _load_in_child(path, "json")
+    assert (streamed["pass"], streamed["reasons"]) == (loaded["pass"], loaded["reasons"])
+
+    print(f"stream: one {size:,.0f} MB manifest, same verdict from both readers")
+    report("json.load, peak RSS", load_rss, "MB")
+    report("manifest_stream, peak RSS", stream_rss, "MB")
+    report("json.load", size / loaded["seconds"], "MB/s")
+    report("manifest_stream", size / streamed["seconds"], "MB/s")
+
+
+def write_tree(root: Path, gb: float, seed: int = 0):
+    """Fill root with about gb gigabytes: thousands of source-sized files plus a few large artifacts."""
+    rng = random.Random(seed)
+    block = rng.randbytes(1 << 20)
+    target, written, i = int(gb * 1e9), 0, 0
+    while written < target:
+        size = rng.choice([64 << 20, 256 << 20]) if i % 500 == 0 else rng.randint(1 << 10, 256 << 10)
+        size = min(size, target - written)
+        path = root / f"pkg{i % 50}" / f"file{i}.bin"
+        path.parent.mkdir(exist_ok=True)
+        with open(path, "wb") as f:
+            for offset in range(0, size, len(block)):
+                f.write(block[:min(len(block), size - offset)])
+            f.write(i.to_bytes(8, "little"))  # keep every file distinct
+        written += size
+        i += 1
+    return i
+
+
+def bench_merkle(gb: float = 2.0):
+    """Merkle codebase hashing: full tree, then re-hash with the leaf index after a one-file edit."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        files = write_tree(root, gb)
+        print(f"merkle: {files:,} files, {gb:g} GB")
+        for workers in (1, None):
+            start = time.perf_counter()
+            tree = codebase_hash.hash_tree(root, workers=workers)
+            seconds = time.perf_counter() - start
+            report(f"full hash, {workers or 'default'} worker(s)", tree.bytes_hashed / 1e6 / seconds, "MB/s")
+
+        edited = next(p for p in sorted(root.rglob("*.bin")) if p.stat().st_size < 1 << 20)
+        with open(edited, "ab") as f:
+            f.write(b"patch")
+        start = time.perf_counter()
+        incremental = codebase_hash.hash_tree(root, tree.leaves)
+        seconds = time.perf_counter() - start
+        assert incremental.root != tree.root and incremental.hashed == 1
+        assert incremental.root == codebase_hash.hash_tree(root).root
+        report(f"one-file edit, {incremental.reused:,} leaves reused", seconds * 1000, "ms")
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            attested = Path(index_dir) / "attested.idx"
+            codebase_hash.save_index(attested, tree)
+            start = time.perf_counter()
+            result = codebase_hash.verify_tree(root, attested)
+            seconds = time.perf_counter() - start
+            index_bytes = attested.stat().st_size
+        assert result["modified"] == [edited.relative_to(root).as_posix()] and not result["match"]
+        report("hash-match vs attested index", seconds * 1000, "ms")
+        report(f"leaf index size, {len(tree.leaves):,} leaves", index_bytes, "bytes")
+
+
+def bench_audits(n: int = 10_000):
+    """Audit signatures: single-manifest verification latency and batch verifications per second."""
+    key = audit_signatures.Ed25519PrivateKey.generate()
+    raw = key.public_key().public_bytes_raw()
+    auditor = "did:key:z" + _base58_encode(b"\xed\x01" + raw)
+    signed = [audit_signatures.sign_manifest(m, key, auditor) for m in synthetic_manifests(n) if m]
+    signed[0]["label"] = "tampered after signing"
+
+    keys = audit_signatures.KeyCache(accredited={auditor})
+    statuses = audit_signatures.AuditVerifier(keys).status_many(signed)
+    assert statuses[0] == audit_signatures.INVALID and statuses.count(audit_signatures.VERIFIED) == len(signed) - 1
+
+    print(f"audits: {len(signed):,} manifests signed by one did:key auditor")
+    report("key resolution (did:key), uncached", rate(lambda: audit_signatures.resolve_did(auditor), 10_000), "keys/s")
+    report("key resolution, KeyCache hit", rate(lambda: keys.get(auditor), 100_000), "keys/s")
+    manifests = iter(signed * 2)
+    verifier = audit_signatures.AuditVerifier(keys)
+    p50, p99 = latency_percentiles(lambda: verifier.status(next(manifests)), 5_000, 1)
+    report("single manifest, p50", p50, "µs")
+    report("single manifest, p99", p99, "µs")
+    report("single manifest, memoized by digest", rate(lambda: verifier.status(signed[1], "sha256:known"), 100_000),
+           "checks/s")
+    start = time.perf_counter()
+    audit_signatures.AuditVerifier(keys).status_many(signed)
+    report("batch status_many", len(signed) / (time.perf_counter() - start), "verifications/s")
+
+
+def _base58_encode(raw: bytes) -> str:
+    n, out = int.from_bytes(raw, "big"), ""
+    while n:
+        n, r = divmod(n, 58)
+        out = audit_signatures._BASE58[r] + out
+    return "1" * (len(raw) - len(raw.lstrip(b"\0"))) + out
+
+
+def bench_schema(n: int = 100_000):
+    """Schema validation: an interpreting validator (jsonschema, if installed) vs the compiled one."""
+    manifests = list(synthetic_manifests(n))
+    validator = schema_validator.load_validator()
+    print(f"schema: {n:,} manifests against compliance-extension.json")
+    report("compiled, fail-fast", rate_over(validator.first_error, manifests), "manifests/s")
+    report("compiled, all errors", rate_over(validator.errors, manifests), "manifests/s")
+    try:
+        import jsonschema
+    except ImportError:
+        print("  (install jsonschema to compare against an interpreting validator)")
+        return
+    interpreted = jsonschema.Draft202012Validator(validator.schema, format_checker=jsonschema.FormatChecker())
+    sample = manifests[:2_000]
+    assert [validator.first_error(m) is None for m in sample] == [interpreted.is_valid(m) for m in sample]
+    report("jsonschema, is_valid", rate_over(interpreted.is_valid, manifests), "manifests/s")
+    report("jsonschema, iter_errors", rate_over(lambda m: list(interpreted.iter_errors(m)), manifests), "manifests/s")
+
+
+def bench_binary(n: int = 100_000):
+    """Binary manifests: encode, full decode, hot-field reads and digests vs the JSON equivalents."""
+    manifests = [m for m in synthetic_manifests(n) if m]
+    texts = [json.dumps(m) for m in manifests]
+    blobs = [manifest_binary.encode(m) for m in manifests]
+    assert all(manifest_binary.decode(b) == m for b, m in zip(blobs[:2_000], manifests))
+
+    def json_fields(text):
+        m = json.loads(text)
+        codes = [j.get("jurisdiction") for j in m["compliance_attestations"]["jurisdictions"]]
+        return m.get("id"), m["model_provider_compliance"].get("provider_name"), codes
+
+    def binary_fields(blob):
+        view = manifest_binary.BinaryManifest(blob)
+        return view.id, view.provider_name, view.jurisdiction_codes()
+
+    print(f"binary: {len(manifests):,} manifests, {sum(map(len, texts)) / len(texts):,.0f} B JSON vs "
+          f"{sum(map(len, blobs)) / len(blobs):,.0f} B binary on average")
+    report("encode: canonical_json", rate_over(canonical_json, manifests), "manifests/s")
+    report("encode: binary", rate_over(manifest_binary.encode, manifests), "manifests/s")
+    report("decode: json.loads", rate_over(json.loads, texts), "manifests/s")
+    report("decode: binary", rate_over(manifest_binary.decode, blobs), "manifests/s")
+    report("id, provider, codes: json.loads", rate_over(json_fields, texts), "manifests/s")
+    report("id, provider, codes: BinaryManifest", rate_over(binary_fields, blobs), "manifests/s")
+    report("digest: canonical JSON", rate_over(digest, manifests), "manifests/s")
+    report("digest: binary", rate_over(manifest_binary.digest, manifests), "manifests/s")
+
+
+def bench_store(n: int = 200_000):
+    """Manifest store: appends, reopening (index rebuild) and indexed queries vs a scan of every manifest."""
+    manifests = [m for m in synthetic_manifests(n) if m]
+    missing_eu = lambda m: not any(j["jurisdiction"] == "EU" for j in m["compliance_attestations"]["jurisdictions"])
+    anthropic_self_cert = lambda m: (m["model_provider_compliance"]["provider_name"] == "Anthropic"
+                                     and get_attestation_level(m)[0] == "orange")
+
+    def timed_ms(fn) -> tuple:
+        start = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - start) * 1e3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "manifests.cbms"
+        print(f"store: {len(manifests):,} manifests")
+        with ManifestStore(path) as store:
+            report("put", rate_over(store.put, manifests), "manifests/s")
+            updates = [{**m, "label": "updated"} for m in manifests[:20_000]]
+            report("put (new version of a stored agent)", rate_over(store.put, updates), "manifests/s")
+        store, ms = timed_ms(lambda: ManifestStore(path))
+        report(f"reopen ({path.stat().st_size / 1e6:,.0f} MB log, indexes rebuilt)", ms, "ms")
+
+        for label, scan, query in [
+            ("missing EU", missing_eu, lambda: store.missing("EU")),
+            ("self-certified Anthropic", anthropic_self_cert,
+             lambda: store.query(provider="Anthropic", tier="orange")),
+        ]:
+            expected, scan_ms = timed_ms(lambda: {m["id"] for m in manifests if scan(m)})
+            found, query_ms = timed_ms(query)
+            assert found == expected
+            report(f"{label}: scan ({len(expected):,} agents)", scan_ms, "ms")
+            report(f"{label}: indexed", query_ms, "ms")
+        store.close()
+
+
+def bench_expiry(n: int = 200_000):
+    """Attestation expiry: heap updates and firing vs rescanning every manifest for its next boundary."""
+    policy, _ = load_demo()
+    compiled = CompiledPolicy(policy)
+    manifests = {f"agent-{i}": m for i, m in enumerate(synthetic_manifests(n))}
+    digests = {key: manifest_binary.digest(m) for key, m in manifests.items()}
+    clock = [time.time()]
+    scheduler = ExpiryScheduler(compiled, VerdictCache(), clock=lambda: clock[0])
+
+    print(f"expiry: {n:,} manifests")
+    start = time.perf_counter()
+    scheduler.sync(manifests, digests)
+    report(f"initial schedule ({len(scheduler):,} boundaries)", n / (time.perf_counter() - start), "manifests/s")
+    keys = random.Random(0).sample(list(manifests), 20_000)
+    updates = [(key, {**manifests[key], "label": "updated"}) for key in keys]
+    report("replace one manifest", rate_over(lambda u: scheduler.schedule(u[0], u[1], u[0] + ":v2"), updates),
+           "updates/s")
+
+    start = time.perf_counter()
+    now = clock[0]
+    boundaries = [compiled.valid_until(m, datetime.fromtimestamp(now, timezone.utc)) for m in manifests.values()]
+    report("full rescan (valid_until on every manifest)", (time.perf_counter() - start) * 1e3, "ms")
+
+    fired, start = 0, time.perf_counter()
+    for _ in range(365):
+        clock[0] += 86400
+        fired += len(scheduler.run_due())
+    report(f"a year of daily run_due() ({fired:,} events)", (time.perf_counter() - start) * 1e3, "ms total")
+    assert fired >= sum(1 for b in boundaries if b is not None and b <= now + 365 * 86400)
+
+
+def bench_revocation(n: int = 1_000_000, delta: int = 10_000):
+    """Revocation lookups (exact set in-process, Bloom filter as shipped to batch workers) and delta refresh."""
+    import pickle
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    issuer_key = Ed25519PrivateKey.generate()
+    issuer = "did:key:z" + _base58_encode(b"\xed\x01" + issuer_key.public_key().public_bytes_raw())
+    index = revocation.RevocationIndex(audit_signatures.KeyCache(accredited={issuer}), trusted_issuers={issuer})
+    full = {"type": revocation.LIST_TYPE, "sequence": 1,
+            "agent_ids": [f"nanda:revoked-{i}" for i in range(n)], "auditor_dids": [], "codebase_hashes": []}
+
+    print(f"revocation: {n:,}-entry list")
+    start = time.perf_counter()
+    index.load(revocation.sign(full, issuer_key, issuer))
+    report("load and verify full list", (time.perf_counter() - start) * 1e3, "ms")
+    start = time.perf_counter()
+    worker_filter = index.filter()
+    report("build Bloom filters", (time.perf_counter() - start) * 1e3, "ms")
+
+    live = [f"nanda:agent-{i}" for i in range(200_000)]
+    revoked = full["agent_ids"][:200_000]
+    bloom = worker_filter.filters["agent_ids"]
+    report("in-process lookup (exact set)", rate_over(index.agent_revoked, live), "lookups/s")
+    report("worker negative (Bloom)", rate_over(bloom.__contains__, live), "lookups/s")
+    false_positives = sum(agent_id in bloom for agent_id in live)
+    print(f"  shipped to each worker: Bloom {len(pickle.dumps(worker_filter)) / 1e6:,.1f} MB "
+          f"({false_positives / len(live):.3%} false positives) "
+          f"vs exact sets {len(pickle.dumps(index.exact)) / 1e6:,.1f} MB")
+    report("parent confirm of worker candidates",
+           rate_over(lambda agent_id: index.confirm([("agent_ids", agent_id)]), revoked), "confirms/s")
+
+    new = {**full, "sequence": 2,
+           "agent_ids": full["agent_ids"][delta // 2:] + [f"nanda:new-{i}" for i in range(delta // 2)]}
+    signed_delta = revocation.sign(revocation.make_delta(full, new), issuer_key, issuer)
+    start = time.perf_counter()
+    index.apply_delta(signed_delta)
+    report(f"apply {delta:,}-entry delta (set and filter)", (time.perf_counter() - start) * 1e3, "ms")
+    index.wait()
+    assert index.agent_revoked("nanda:new-0") and not index.agent_revoked("nanda:revoked-0")
+    assert "nanda:new-0" in index.filter().filters["agent_ids"]
+
+
+def bench_upstream(seconds: float = 5.0, clients: int = 64, slow_share: float = 0.2,
+                   slow_delay: float = 2.0, hop_timeout: float = 1.0):
+    """Chain walks under load with one slow partner host: urllib on worker threads vs the pooled async HTTPFetcher."""
+    import urllib.request
+    policy, manifests = load_demo()
+    compiled = CompiledPolicy(policy)
+    root = next(m for m in manifests if m["id"] == "nanda:travelbot-001")
+    sub = next(m for m in manifests if m["id"] == "nanda:airlinebot-001")
+    fast, fast_base = serve_manifests({"/.well-known/compliance.json": sub})
+    slow, slow_base = serve_manifests({"/.well-known/compliance.json": sub}, delay=slow_delay)
+
+    def chain_via(base):
+        declared = {**root["sub_agent_compliance"]["declared_sub_agents"][0],
+                    "compliance_url": base + "/.well-known/compliance.json"}
+        return {**root, "sub_agent_compliance": {**root["sub_agent_compliance"], "declared_sub_agents": [declared]}}
+
+    roots = {"fast": chain_via(fast_base), "slow": chain_via(slow_base)}
+
+    class ThreadedFetcher:
+        """HTTPFetcher as it was: blocking urllib calls on the default executor."""
+
+        def _get(self, url):
+            with urllib.request.urlopen(url, timeout=10) as response:
+                return json.loads(response.read())
+
+        async def fetch(self, url, agent_id=None):
+            return await asyncio.to_thread(self._get, url)
+
+    async def load(fetcher):
+        latencies, failed = {"fast": [], "slow": []}, {"fast": 0, "slow": 0}
+        rng = random.Random(0)
+        deadline = time.perf_counter() + seconds
+
+        async def client():
+            while time.perf_counter() < deadline:
+                kind = "slow" if rng.random() < slow_share else "fast"
+                start = time.perf_counter()
+                result = await verify_chain(roots[kind], compiled, fetcher, hop_timeout=hop_timeout)
+                latencies[kind].append(time.perf_counter() - start)
+                failed[kind] += not result["pass"]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return latencies, failed, time.perf_counter() - start
+
+    print(f"upstream: {clients} concurrent chain walks for {seconds:.0f}s, {slow_share:.0%} via a partner "
+          f"answering in {slow_delay:.1f}s, {hop_timeout:.1f}s hop timeout")
+    for label, fetcher in (("threaded urllib", ThreadedFetcher()), ("pooled async", HTTPFetcher(hop_timeout))):
+        latencies, failed, elapsed = asyncio.run(load(fetcher))
+        report(f"{label}: throughput", sum(map(len, latencies.values())) / elapsed, "walks/s")
+        for kind, samples in latencies.items():
+            samples.sort()
+            p50, p99 = (samples[int(len(samples) * q)] * 1e3 if samples else 0 for q in (0.5, 0.99))
+            print(f"  {'':<4}{kind} partner: p50 {p50:,.0f} ms, p99 {p99:,.0f} ms, "
+                  f"{failed[kind]:,} of {len(samples):,} failed")
+        if isinstance(fetcher, HTTPFetcher):
+            print(f"  {'':<4}connections opened {fetcher.opened:,}, reused {fetcher.reused:,}")
+    fast.shutdown()
+    slow.shutdown()
+
+
+def bench_fragments(n: int = 500):
+    """Route render time for /demo, /recheck and /agent: fragment cache cold vs warm (requires python-fasthtml)."""
+    from types import SimpleNamespace
+    import app
+    from fasthtml.common import ROUTES
+    request = SimpleNamespace(headers={})
+    calls = {
+        "/demo": lambda: ROUTES["/demo"]["get"](request=request, scenario="mixed"),
+        "/recheck": lambda: ROUTES["/recheck"]["post"](True, True, True, False, False, True),
+        "/agent/agent_b": lambda: ROUTES["/agent/{agent_key}"]["get"](request=request, agent_key="agent_b"),
+    }
+
+    async def timed(call, cold):
+        start = time.perf_counter()
+        for _ in range(n):
+            if cold:
+                app.FRAGMENTS.clear()
+            await call()
+        return (time.perf_counter() - start) / n * 1e6
+
+    print("fragments: route render time")
+    for route, call in calls.items():
+        report(f"{route} (cold: rebuild components)", asyncio.run(timed(call, True)), "µs/request")
+        report(f"{route} (warm: cached fragments)", asyncio.run(timed(call, False)), "µs/request")
+    print(f"  {app.FRAGMENTS.stats()}")
+
+
+def bench_questionnaire(n: int = 200):
+    """Render time of the full five-questionnaire form: built per request vs joined precompiled fragments (requires python-fasthtml)."""
+    import app
+    from fasthtml.common import ROUTES, Div, to_xml
+    snap = app.REGISTRY.snapshot
+    jurisdictions = list(app.QUESTIONNAIRE_FILES)
+    questions = sum(len(section.get("questions", ())) for stem, _ in app.QUESTIONNAIRE_FILES.values()
+                    for section in snap.questionnaires[stem].get("sections", {}).values())
+    load = ROUTES["/questionnaire/load"]["post"]
+
+    def rebuilt(cert_type):
+        fields = app.cert_type_fields(cert_type)
+        for stem, title in app.QUESTIONNAIRE_FILES.values():
+            fields += app.questionnaire_fields(snap.questionnaires[stem], title, cert_type == "auto_verified")
+        return to_xml(Div(*fields))
+
+    print(f"questionnaire: {len(jurisdictions)} questionnaires, {questions} questions")
+    start = time.perf_counter()
+    app.compile_questionnaires(snap)
+    report("compile all (jurisdiction, cert_type)", (time.perf_counter() - start) * 1e3, "ms")
+    for cert_type in ("self_certified", "auto_verified"):
+        report(f"{cert_type}: built per request", rate(lambda: rebuilt(cert_type), n), "forms/s")
+        report(f"{cert_type}: precompiled", rate(lambda: to_xml(load(jurisdictions, cert_type)), n), "forms/s")
+
+
+def sample_submissions(builder: ManifestBuilder, n: int, seed: int = 0, invalid_share: float = 0.02):
+    """Yield n submissions answering every question of all five domains (invalid_share of them with a bad option)."""
+    rng = random.Random(seed)
+    values = {
+        "boolean": lambda r: rng.choice(["yes", "no"]),
+        "number": lambda r: str(rng.randint(0, int(r.max or 100))),
+        "url": lambda r: f"https://example.com/{rng.randrange(10**6)}",
+        "email": lambda r: "dpo@example.com",
+        "date": lambda r: f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "text_array": lambda r: ["item"],
+        "array": lambda r: [{"agent_id": "sub-1", "compliance_url": "https://example.com/c.json"}],
+        "object_array": lambda r: [{"agent_id": "sub-1", "compliance_url": "https://example.com/c.json"}],
+    }
+    for i in range(n):
+        fields = {"agent_id": f"agent-{i:07d}", "agent_name": f"Agent{i}", "provider_name": f"Provider {i % 500}",
+                  "provider_url": f"https://provider{i % 500}.example", "cert_type": "self_certified",
+                  "jurisdictions_selected": ",".join(DOMAINS)}
+        for q_id, route in builder.routes.items():
+            if route.options:
+                options = sorted(route.options)
+                fields[q_id] = rng.sample(options, min(2, len(options))) if route.type == "multi_select" else rng.choice(options)
+            else:
+                fields[q_id] = values.get(route.type, lambda r: "Sample answer")(route)
+        if rng.random() < invalid_share:
+            fields["cult_02"] = ["Atlantis"]
+        yield fields
+
+
+def bench_generate(n: int = 20_000):
+    """Bulk manifest generation: validate, build, hash and sign per process, and the pipeline across worker processes."""
+    builder = ManifestBuilder.load()
+    key = audit_signatures.Ed25519PrivateKey.generate()
+    submissions = list(sample_submissions(builder, n))
+    rejected = sum(1 for f in submissions if builder.validate(f))
+    print(f"generate: {n:,} submissions, {len(builder.routes)} questions answered each, {rejected:,} invalid")
+
+    report("validate", rate_over(builder.validate, submissions[:2_000]), "submissions/s")
+    report("build", rate_over(builder.build, submissions[:2_000]), "manifests/s")
+    report("build + CBMF encode + Ed25519 sign",
+           rate_over(lambda f: key.sign(manifest_binary.encode(builder.build(f).manifest)), submissions[:2_000]),
+           "manifests/s")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "responses.jsonl"
+        with open(path, "w") as f:
+            for fields in submissions:
+                f.write(json.dumps(fields) + "\n")
+        for workers in sorted({1, os.cpu_count() or 1}):
+            with open(Path(tmp) / "manifests.jsonl", "w") as out:
+                stats = batch_generate.run_generate([path], out, key=key, signer="did:web:bench.example",
+                                                    workers=workers)
+            assert stats["manifests"] == n - rejected
+            report(f"pipeline, {workers} worker(s)", stats["manifests"] / stats["seconds"], "manifests/s")
+        with open(Path(tmp) / "manifests.jsonl") as f:
+            assert batch_generate.verify_record(json.loads(f.readline()), key.public_key())
+
+
+def bench_metrics(n: int = 200_000, walks: int = 5_000):
+    """Instrumentation cost: checks and chain walks with metrics disabled (no-op) vs recording, and /metrics render time."""
+    policy, _ = load_demo()
+    compiled = CompiledPolicy(policy)
+    manifests = [m for m in synthetic_manifests(n)]
+    chain_policy = CompiledPolicy({**policy, "sub_agent_requirements": {
+        **policy.get("sub_agent_requirements", {}), "verify_sub_agent_compliance": True}})
+    root = {**manifests[1], "sub_agent_compliance": {"uses_sub_agents": True, "declared_sub_agents": [
+        {"agent_id": f"sub-{i}", "compliance_url": f"https://sub{i}.example/c.json"} for i in range(4)]}}
+    fetcher = StubFetcher({f"https://sub{i}.example/c.json": manifests[i + 2] for i in range(4)})
+
+    async def walk_many():
+        for _ in range(walks):
+            await verify_chain(root, chain_policy, fetcher, fail_fast=False)
+
+    enabled = metrics.METRICS.enabled
+    print(f"metrics: {n:,} checks, {walks:,} five-agent chain walks")
+    try:
+        for label, on in (("disabled (no-op)", False), ("enabled", True)):
+            metrics.METRICS.enabled = on
+            report(f"CompiledPolicy.check, {label}", rate_over(compiled.check, manifests), "checks/s")
+            report(f"CompiledPolicy.check_agent, {label}", rate_over(compiled.check_agent, manifests), "checks/s")
+            start = time.perf_counter()
+            asyncio.run(walk_many())
+            report(f"verify_chain, {label}", walks / (time.perf_counter() - start), "walks/s")
+        start = time.perf_counter()
+        text = metrics.METRICS.render()
+        report(f"render /metrics ({text.count(chr(10)):,} lines)", (time.perf_counter() - start) * 1e3, "ms")
+    finally:
+        metrics.METRICS.enabled = enabled
+        metrics.METRICS.reset()
+
+
+def bench_decision_log(n: int = 200_000):
+    """Decision log overhead per decision: plain check vs traced check + queued record, and writer throughput per framing."""
+    policy, _ = load_demo()
+    compiled = CompiledPolicy({**policy, "on_failure": {"log": True}})
+    manifests = [m for m in synthetic_manifests(n) if m]
+    digests = [f"sha256:{i:064x}" for i in range(len(manifests))]
+    print(f"decision log: {len(manifests):,} decisions, every decision logged")
+
+    def best_ns(fn, repeat: int = 3) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best / len(manifests) * 1e9
+
+    def plain():
+        for m in manifests:
+            compiled.check(m)
+
+    def traced():
+        for m in manifests:
+            compiled.check(m, trace=True)
+
+    baseline = best_ns(plain)
+    report("CompiledPolicy.check, no log", baseline, "ns/decision")
+    report("CompiledPolicy.check(trace=True)", best_ns(traced), "ns/decision")
+    with tempfile.TemporaryDirectory() as tmp:
+        for framing in ("jsonl", "binary"):
+            # The writer sleeps through the timed loop (its work is timed separately by flush()),
+            # and the queue is sized so no record is dropped
+            log = DecisionLog(Path(tmp) / framing, framing, max_bytes=16 * 1024 * 1024, flush_interval=3600,
+                              max_pending=len(manifests), every_decision=True)
+
+            def logged():
+                for m, d in zip(manifests, digests):
+                    log.decide(compiled, compiled.check(m, trace=True), m, d, m.get("id"), ("root",))
+
+            start = time.perf_counter()
+            logged()
+            per_decision = (time.perf_counter() - start) / len(manifests) * 1e9
+            report(f"{framing}: traced check + decide()", per_decision, "ns/decision")
+            report(f"{framing}: overhead on the verification path", per_decision - baseline, "ns/decision")
+            start = time.perf_counter()
+            log.flush()
+            report(f"{framing}: writer thread (encode, write, fsync)",
+                   (time.perf_counter() - start) / len(manifests) * 1e9, "ns/record")
+            log.close()
+            stats = log.stats()
+            assert stats["written"] == len(manifests) and not stats["dropped"]
+            records = sum(1 for _ in read_decisions(Path(tmp) / framing, framing))
+            assert records == stats["written"]
+            size = sum(p.stat().st_size for p in (Path(tmp) / framing).iterdir())
+            print(f"  {framing}: {records:,} records, {size / records:,.0f} bytes each, "
+                  f"{stats['syncs']:,} fsyncs, {stats['rotations']} rotations")
+
+BENCHMARKS = {
+    "policy": bench_policy,
+    "fetch_cache": bench_fetch_cache,
+    "verdict_cache": bench_verdict_cache,
+    "registry": bench_registry,
+    "columnar": bench_columnar,
+    "sweep": bench_sweep,
+    "incremental": bench_incremental,
+    "stream": bench_stream,
+    "merkle": bench_merkle,
+    "audits": bench_audits,
+    "schema": bench_schema,
+    "binary": bench_binary,
+    "store": bench_store,
+    "expiry": bench_expiry,
+    "revocation": bench_revocation,
+    "upstream": bench_upstream,
+    "fragments": bench_fragments,
+    "questionnaire": bench_questionnaire,
+    "generate": bench_generate,
+    "metrics": bench_metrics,
+    "decision_log": bench_decision_log,
+}
+
+
+def main(names):
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark: {name} (choose from {', '.join(BENCHMARKS)})")
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,440 @@
+"""
+Recursive Chain Verification
+
+Follows each declared sub-agent's compliance_url through a pluggable fetcher
+and verifies the tree level by level, the agents of each level concurrently,
+honouring the policy's sub_agent_requirements (verify_sub_agent_compliance,
+max_chain_depth).
+"""
+
+import asyncio
+import json
+import ssl
+import time
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urljoin, urlsplit
+
+import metrics
+from manifest_stream import load_manifest
+from metrics import METRICS
+from policy_engine import MALFORMED, CompiledPolicy
+
+DEFAULT_MAX_CHAIN_DEPTH = 5
+MAX_MANIFEST_BYTES = 16 * 1024 * 1024
+
+
+class ChainBlocked(Exception):
+    """Raised inside the walk to cancel remaining branches after a failure."""
+
+
+# ─────────────────────────────────────────────────────────
+# FETCHERS
+# ─────────────────────────────────────────────────────────
+# A fetcher is any object with `async fetch(url, agent_id=None) -> dict | None`.
+
+class DirectoryFetcher:
+    """Resolves compliance_urls against a local mirror directory.
+
+    https://host/path is looked up as <root>/host/path first; otherwise the
+    manifest whose "id" matches agent_id is returned. Anything not mirrored
+    goes to the fallback fetcher, if one is given. compliance_urls come from
+    partner manifests, so a URL that resolves outside root is never read.
+    """
+
+    def __init__(self, root, fallback=None):
+        self.root = Path(root)
+        self.real_root = self.root.resolve()
+        self.fallback = fallback
+        self.by_id = {}
+        for path in sorted(self.root.glob("*.json")):
+            agent_id = load_manifest(path, ("id",)).get("id")
+            if agent_id:
+                self.by_id[agent_id] = path
+
+    def resolve(self, url: str, agent_id: str = None):
+        if url:
+            parts = urlsplit(url)
+            if parts.netloc not in ("", ".", ".."):
+                path = (self.root / parts.netloc / parts.path.lstrip("/")).resolve()
+                if path.is_relative_to(self.real_root) and path.is_file():
+                    return path
+        return self.by_id.get(agent_id)
+
+    async def fetch(self, url: str, agent_id: str = None):
+        path = self.resolve(url, agent_id)
+        if path is None:
+            return await self.fallback.fetch(url, agent_id) if self.fallback and url else None
+        return await asyncio.to_thread(_read_json, path)
+
+
+class StubFetcher:
+    """In-process fetcher serving manifests from a {url: manifest} dict."""
+
+    def __init__(self, manifests: dict, delay: float = 0):
+        self.manifests = manifests
+        self.delay = delay
+        self.requests = []
+
+    async def fetch(self, url: str, agent_id: str = None):
+        self.requests.append(url)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.manifests.get(url)
+
+
+class FetchResponse(NamedTuple):
+    """A fetched manifest plus the HTTP caching metadata that came with it."""
+    manifest: dict
+    size: int
+    etag: str = None
+    cache_control: str = ""
+    not_modified: bool = False
+
+
+class FetchError(Exception):
+    """An upstream answered, but not with a usable manifest."""
+
+
+class _Pool:
+    """Per-host state for HTTPFetcher: a concurrency limit and idle keep-alive connections."""
+
+    def __init__(self, limit: int):
+        self.limit = asyncio.Semaphore(limit)
+        self.idle = []          # (reader, writer) pairs ready for another request
+
+
+class HTTPFetcher:
+    """Fetches /.well-known/compliance.json documents over HTTP(S), natively on the event loop.
+
+    At most max_per_host requests per scheme://host:port are in flight at
+    once; further ones queue for that host alone, so one slow partner holds
+    up only its own fetches. Connections are kept alive and reused. timeout
+    bounds each fetch end to end (queueing, connecting, redirects and
+    reading the body) and raises TimeoutError.
+    """
+
+    def __init__(self, timeout: float = 10, max_per_host: int = 8, max_bytes: int = MAX_MANIFEST_BYTES,
+                 max_redirects: int = 5):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.max_bytes = max_bytes
+        self.max_redirects = max_redirects
+        self.pools = {}
+        self.loop = None
+        self.opened = self.reused = 0
+        self._ssl = None
+
+    async def fetch(self, url: str, agent_id: str = None):
+        return (await self.fetch_response(url)).manifest
+
+    async def fetch_response(self, url: str, etag: str = None) -> FetchResponse:
+        """GET url, sending If-None-Match when an etag is given."""
+        headers = {"Accept": "application/json"}
+        if etag:
+            headers["If-None-Match"] = etag
+        try:
+            async with asyncio.timeout(self.timeout):
+                for _ in range(self.max_redirects + 1):
+                    status, response_headers, body = await self._get(url, headers)
+                    if status in (301, 302, 303, 307, 308) and "location" in response_headers:
+                        url = urljoin(url, response_headers["location"])
+                        continue
+                    break
+        except TimeoutError:
+            raise TimeoutError(f"no response from {urlsplit(url).netloc} within {self.timeout}s") from None
+        if status == 304:
+            return FetchResponse(None, 0, response_headers.get("etag") or etag,
+                                 response_headers.get("cache-control", ""), not_modified=True)
+        if status != 200:
+            raise FetchError(f"HTTP {status} from {url}")
+        return FetchResponse(json.loads(body), len(body), response_headers.get("etag"),
+                             response_headers.get("cache-control", ""))
+
+    def _pool(self, key) -> _Pool:
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            # Connections and semaphores belong to one event loop
+            self.pools, self.loop = {}, loop
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = _Pool(self.max_per_host)
+        return pool
+
+    async def _get(self, url: str, headers: dict) -> tuple:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise FetchError(f"unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        pool = self._pool((parts.scheme, parts.hostname, port))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        request = (f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                   + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n").encode("latin-1")
+        async with pool.limit:
+            while pool.idle:
+                reader, writer = pool.idle.pop()
+                if reader.at_eof() or writer.is_closing():
+                    writer.close()
+                    continue
+                try:
+                    response = await self._exchange(reader, writer, request)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # The server closed an idle connection; retry on a fresh one
+                    writer.close()
+                    continue
+                except BaseException:
+                    writer.close()
+                    raise
+                self.reused += 1
+                return self._release(pool, reader, writer, *response)
+            reader, writer = await asyncio.open_connection(
+                parts.hostname, port, ssl=self._ssl_context() if parts.scheme == "https" else None)
+            self.opened += 1
+            try:
+                response = await self._exchange(reader, writer, request)
+            except BaseException:
+                writer.close()
+                raise
+            return self._release(pool, reader, writer, *response)
+
+    def _ssl_context(self):
+        if self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        return self._ssl
+
+    async def _exchange(self, reader, writer, request: bytes) -> tuple:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readuntil(b"\r\n")
+        try:
+            version, status = status_line.split(None, 2)[:2]
+            status = int(status)
+        except ValueError:
+            raise FetchError(f"malformed status line: {status_line[:80]!r}") from None
+        headers = {}
+        while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == b"HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > self.max_bytes:
+                raise FetchError(f"manifest larger than {self.max_bytes} bytes")
+            body = await reader.readexactly(length)
+        else:
+            body = await reader.read(self.max_bytes + 1)
+            keep_alive = False
+        if len(body) > self.max_bytes:
+            raise FetchError(f"manifest larger than {self.max_bytes} bytes")
+        return status, headers, body, keep_alive
+
+    async def _read_chunked(self, reader) -> bytes:
+        body = bytearray()
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                return bytes(body)
+            if len(body) + size > self.max_bytes:
+                raise FetchError(f"manifest larger than {self.max_bytes} bytes")
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+
+    def _release(self, pool, reader, writer, status, headers, body, keep_alive) -> tuple:
+        if keep_alive:
+            pool.idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, headers, body
+
+    async def aclose(self):
+        """Close every idle pooled connection."""
+        for pool in self.pools.values():
+            while pool.idle:
+                pool.idle.pop()[1].close()
+
+
+def _read_json(path):
+    # The whole document, not a manifest_stream projection: fetched manifests are
+    # digested, decision-logged and audit-verified. Capped as HTTPFetcher bodies are.
+    if path.stat().st_size > MAX_MANIFEST_BYTES:
+        raise FetchError(f"manifest larger than {MAX_MANIFEST_BYTES} bytes")
+    with open(path) as f:
+        return json.load(f)
+
+
+def _declared_sub_agents(manifest: dict):
+    section = manifest.get("sub_agent_compliance")
+    declared = section.get("declared_sub_agents") if isinstance(section, dict) else None
+    return declared if isinstance(declared, (list, tuple)) else ()
+
+
+# ─────────────────────────────────────────────────────────
+# CHAIN WALK
+# ─────────────────────────────────────────────────────────
+
+async def verify_chain(manifest: dict, policy: CompiledPolicy, fetcher, url: str = None,
+                       fail_fast: bool = True, revocations=None, hop_timeout: float = None,
+                       decision_log=None) -> dict:
+    """Verify an agent and, if the policy asks for it, every sub-agent below it.
+
+    The tree is walked level by level, each level's sub-agents fetched
+    concurrently, so an agent is always reached at its shallowest depth.
+    Each agent is fetched and checked once even when several parents declare
+    it; a sub-agent that points back at one of its ancestors is reported as a
+    cycle rather than followed. Agents below max_chain_depth fail the chain.
+    With fail_fast, the first failing agent cancels every branch still in
+    flight. With a revocation.RevocationIndex, an agent naming a revoked id,
+    auditor or codebase hash fails, and a revoked sub-agent is not fetched.
+    hop_timeout bounds each sub-agent fetch; one that overruns is reported
+    unreachable without holding up its siblings, and one whose manifest the
+    policy cannot read (not a JSON object, an impossible date) is reported
+    malformed.
+
+    Returns {"pass", "reasons", "warnings", "nodes"}, where nodes lists every
+    agent reached as {"agent_id", "url", "path", "depth", "status", "pass",
+    "reasons", "warnings"} in the order it was checked.
+
+    With metrics enabled, the walk, each hop and each fetch are timed.
+    With a decision_log.DecisionLog, every agent's decision (rule outcomes
+    and chain path included) and the chain's overall verdict are logged, as
+    the log and the policy's on_failure.log call for.
+    """
+    walk_start = time.perf_counter() if METRICS.enabled else None
+    fetcher_name = type(fetcher).__name__
+    sub_reqs = policy.policy.get("sub_agent_requirements", {})
+    recurse = sub_reqs.get("verify_sub_agent_compliance", False)
+    max_depth = sub_reqs.get("max_chain_depth", DEFAULT_MAX_CHAIN_DEPTH)
+    nodes = []
+    seen = set()
+
+    def record(agent_id, url, path, status, result, manifest=None):
+        node = {"agent_id": agent_id, "url": url, "path": list(path), "depth": len(path),
+                "status": status, **result}
+        nodes.append(node)
+        if decision_log is not None:
+            decision_log.decide(policy, node, manifest, agent_id=agent_id, path=path, status=status)
+        if fail_fast and not node["pass"]:
+            raise ChainBlocked(agent_id)
+        return node
+
+    def evaluate(manifest) -> tuple:
+        """(status, result) for one agent; a manifest the policy cannot read fails as malformed."""
+        try:
+            if manifest is not None and not isinstance(manifest, dict):
+                raise TypeError("not a JSON object")
+            result = policy.check(manifest, trace=decision_log is not None)
+            if revocations is not None:
+                amended = revocations.apply(result, manifest)
+                if amended is not result and "rules" in amended:
+                    amended["rules"] = {**amended["rules"], "revocation": "fail"}
+                result = amended
+        except MALFORMED as e:
+            return "malformed", {"pass": False, "reasons": [f"Malformed manifest: {e}"], "warnings": []}
+        return "verified", result
+
+    def expand(node, manifest, agent_id, path) -> list:
+        """Sort one checked agent's declared sub-agents; returns the (id, url, path) hops to fetch."""
+        hops = []
+        if not recurse or not manifest:
+            return hops
+        path = path + (agent_id,)
+        for sub in _declared_sub_agents(manifest):
+            sub_id = (sub.get("agent_id") or sub.get("compliance_url")) if isinstance(sub, dict) else None
+            sub_url = sub.get("compliance_url") if isinstance(sub, dict) else None
+            if not isinstance(sub, dict) or not isinstance(sub_id, (str, type(None))) \
+                    or not isinstance(sub_url, (str, type(None))):
+                record(None, None, path, "malformed", {
+                    "pass": False, "reasons": ["Malformed sub-agent declaration"], "warnings": [],
+                })
+            elif sub_id in path:
+                node["warnings"].append(f"Sub-agent cycle: {' → '.join(path)} → {sub_id}")
+                record(sub_id, sub_url, path, "cycle", {"pass": True, "reasons": [], "warnings": []})
+            elif sub_id in seen:
+                record(sub_id, sub_url, path, "duplicate", {"pass": True, "reasons": [], "warnings": []})
+            elif len(path) >= max_depth:
+                record(sub_id, sub_url, path, "depth_exceeded", {
+                    "pass": False,
+                    "reasons": [f"Chain deeper than max_chain_depth ({max_depth})"],
+                    "warnings": [],
+                })
+            elif revocations is not None and isinstance(sub_id, str) and revocations.agent_revoked(sub_id):
+                seen.add(sub_id)
+                record(sub_id, sub_url, path, "revoked", {
+                    "pass": False, "reasons": [f"Agent revoked: {sub_id}"], "warnings": [],
+                })
+            elif not sub_url:
+                seen.add(sub_id)
+                record(sub_id, sub_url, path, "unreachable", {
+                    "pass": False, "reasons": ["No compliance_url declared"], "warnings": [],
+                })
+            else:
+                seen.add(sub_id)
+                hops.append((sub_id, sub_url, path))
+        return hops
+
+    async def fetch_and_visit(agent_id, url, path):
+        """Fetch and check one sub-agent; returns its frontier entry, or None if it cannot be expanded."""
+        start = time.perf_counter() if METRICS.enabled else None
+        status = "cancelled"    # until the hop gets further; fail_fast can cut it short
+        try:
+            try:
+                async with asyncio.timeout(hop_timeout):
+                    manifest = await fetcher.fetch(url, agent_id)
+            except TimeoutError as e:
+                outcome, status = "timeout", "unreachable"
+                reason = f"Manifest fetch timed out: {e or f'no answer within {hop_timeout}s'}"
+            except Exception as e:
+                outcome, status = "error", "unreachable"
+                reason = f"Manifest fetch failed: {e}"
+            else:
+                outcome = "ok"
+            if start is not None:
+                metrics.FETCH_SECONDS.observe(time.perf_counter() - start, fetcher_name, outcome)
+            if status == "unreachable":
+                record(agent_id, url, path, "unreachable", {"pass": False, "reasons": [reason], "warnings": []})
+                return None
+            status, result = evaluate(manifest)
+            node = record(agent_id, url, path, status, result, manifest)
+            return (node, manifest, agent_id, path) if status == "verified" else None
+        finally:
+            if start is not None:
+                metrics.CHAIN_HOP_SECONDS.observe(time.perf_counter() - start, status)
+
+    root_id = (manifest.get("id") if isinstance(manifest, dict) else None) or url
+    seen.add(root_id)
+    blocked = False
+    try:
+        status, result = evaluate(manifest)
+        node = record(root_id, url, (), status, result, manifest)
+        frontier = [(node, manifest, root_id, ())] if status == "verified" else []
+        # Level by level: which fetch finishes first never decides the depth an agent is seen at
+        while frontier:
+            hops = [hop for entry in frontier for hop in expand(*entry)]
+            if not hops:
+                break
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(fetch_and_visit(*hop)) for hop in hops]
+            frontier = [entry for task in tasks if (entry := task.result()) is not None]
+    except* ChainBlocked:
+        blocked = True
+
+    reasons = [f"{n['agent_id']}: {r}" for n in nodes for r in n["reasons"]]
+    warnings = [f"{n['agent_id']}: {w}" for n in nodes for w in n["warnings"]]
+    passed = not blocked and all(n["pass"] for n in nodes)
+    if walk_start is not None:
+        metrics.CHAIN_WALK_SECONDS.observe(time.perf_counter() - walk_start, "pass" if passed else "fail")
+    if decision_log is not None:
+        decision_log.decide(policy, {"pass": passed, "reasons": reasons, "warnings": warnings}, manifest,
+                            agent_id=root_id, check="chain_walk", status="blocked" if blocked else None)
+    return {
+        "pass": passed,
+        "reasons": reasons,
+        "warnings": warnings,
+        "nodes": nodes,
+    }
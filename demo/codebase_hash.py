@@ -0,0 +1,237 @@
+"""
+Merkle-Tree Codebase Hashing
+
+Computes codebase_verification.current_hash for a repository or artifact
+directory. Every regular file is a leaf, hashed from an mmap of its contents
+across a thread pool (hashlib releases the GIL on large buffers); leaves are
+ordered by relative path and folded pairwise into a single root.
+
+    leaf = sha256(0x00 || path || 0x00 || sha256(contents))
+    node = sha256(0x01 || left || right)      an odd node is carried up as is
+
+The per-file leaf index (path, size, mtime, content digest) can be saved
+next to the attestation; passed back in, files whose size and mtime are
+unchanged reuse their recorded digest, so re-hashing after a small change
+only reads the modified files. Checked against the index saved at
+attestation time, a mismatch names exactly the files that diverged.
+
+Run with: python codebase_hash.py <directory> [--index leaves.idx] [--attested attested.idx]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import stat
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+EXCLUDE = frozenset({".git", ".hg", ".svn", "__pycache__", "node_modules"})
+INDEX_MAGIC = b"CBLI"
+INDEX_VERSION = 2
+_INDEX_HEADER = struct.Struct("<4sBI32s")  # magic, version, leaf count, root digest
+_INDEX_ENTRY = struct.Struct("<QqH32s")    # size, mtime_ns, path length, content digest; then the path
+EMPTY_DIGEST = hashlib.sha256(b"").digest()
+
+
+class Leaf(NamedTuple):
+    path: str       # relative, "/"-separated
+    size: int
+    mtime_ns: int
+    digest: bytes   # sha256 of the file contents
+
+
+class TreeHash(NamedTuple):
+    root: str       # "sha256:<hex>", the value for current_hash
+    leaves: dict    # path -> Leaf, in path order
+    hashed: int     # files read this run
+    reused: int     # files whose digest came from the previous index
+    bytes_hashed: int
+
+
+def list_files(root, exclude=EXCLUDE) -> list:
+    """(relative path, absolute path, stat) for every regular file under root, in path order."""
+    root = os.path.join(os.fspath(root), "")
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in exclude]
+        for name in filenames:
+            if name in exclude:
+                continue
+            path = os.path.join(dirpath, name)
+            st = os.stat(path, follow_symlinks=False)
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            found.append((path[len(root):].replace(os.sep, "/"), path, st))
+    found.sort(key=lambda f: f[0])
+    return found
+
+
+def hash_file(path, size: int) -> bytes:
+    """sha256 of a file's contents, read through mmap."""
+    if size == 0:
+        return EMPTY_DIGEST
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return hashlib.sha256(mm).digest()
+
+
+def leaf_hash(leaf: Leaf) -> bytes:
+    return hashlib.sha256(b"\x00" + leaf.path.encode() + b"\x00" + leaf.digest).digest()
+
+
+def merkle_root(leaves) -> str:
+    """Root over leaves in the given order; the empty tree hashes to sha256("")."""
+    level = [leaf_hash(leaf) for leaf in leaves]
+    if not level:
+        return "sha256:" + EMPTY_DIGEST.hex()
+    while len(level) > 1:
+        paired = [hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return "sha256:" + level[0].hex()
+
+
+def hash_tree(root, index: dict = None, workers: int = None, exclude=EXCLUDE) -> TreeHash:
+    """Merkle-hash every file under root.
+
+    index is a previous TreeHash.leaves (or load_index() result); files whose
+    size and mtime match their entry there are not read again.
+    """
+    index = index or {}
+    leaves, pending = {}, []
+    for rel, path, st in list_files(root, exclude):
+        known = index.get(rel)
+        if known is not None and known.size == st.st_size and known.mtime_ns == st.st_mtime_ns:
+            leaves[rel] = known
+        else:
+            leaves[rel] = None
+            pending.append((rel, path, st))
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(workers) as pool:
+        digests = pool.map(lambda f: hash_file(f[1], f[2].st_size), pending)
+        for (rel, _, st), file_digest in zip(pending, digests):
+            leaves[rel] = Leaf(rel, st.st_size, st.st_mtime_ns, file_digest)
+
+    return TreeHash(
+        root=merkle_root(leaves.values()),
+        leaves=leaves,
+        hashed=len(pending),
+        reused=len(leaves) - len(pending),
+        bytes_hashed=sum(st.st_size for _, _, st in pending),
+    )
+
+
+def save_index(path, tree: TreeHash):
+    """Write the leaf index in its compact binary form, atomically."""
+    parts = [_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(tree.leaves), bytes.fromhex(tree.root[7:]))]
+    for leaf in tree.leaves.values():
+        encoded = leaf.path.encode()
+        parts.append(_INDEX_ENTRY.pack(leaf.size, leaf.mtime_ns, len(encoded), leaf.digest))
+        parts.append(encoded)
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp, path)
+
+
+def read_index(path) -> tuple:
+    """(root, {path: Leaf}) from a leaf index file.
+
+    Also reads the JSON form ({"version": 1, "root", "leaves": [[path, size,
+    mtime_ns, hex], ...]}) that earlier versions wrote.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:1] == b"{":
+        doc = json.loads(data)
+        if doc.get("version") != 1:
+            raise ValueError(f"{path}: unsupported leaf index version {doc.get('version')}")
+        return doc["root"], {p: Leaf(p, size, mtime_ns, bytes.fromhex(h)) for p, size, mtime_ns, h in doc["leaves"]}
+
+    magic, version, count, root = _INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        raise ValueError(f"{path}: not a version {INDEX_VERSION} leaf index")
+    leaves, offset = {}, _INDEX_HEADER.size
+    for _ in range(count):
+        size, mtime_ns, length, file_digest = _INDEX_ENTRY.unpack_from(data, offset)
+        offset += _INDEX_ENTRY.size
+        rel = data[offset:offset + length].decode()
+        offset += length
+        leaves[rel] = Leaf(rel, size, mtime_ns, file_digest)
+    return "sha256:" + root.hex(), leaves
+
+
+def load_index(path) -> dict:
+    """The {path: Leaf} map of a leaf index file, for hash_tree(index=...)."""
+    return read_index(path)[1]
+
+
+def diverged(attested: dict, current: dict) -> dict:
+    """Files that differ between two leaf maps: {"modified", "added", "removed"}, each sorted."""
+    return {
+        "modified": sorted(p for p, leaf in current.items() if p in attested and attested[p].digest != leaf.digest),
+        "added": sorted(p for p in current if p not in attested),
+        "removed": sorted(p for p in attested if p not in current),
+    }
+
+
+def verify_tree(root, attested_index, cache_index=None, workers: int = None, exclude=EXCLUDE) -> dict:
+    """Re-hash root against the leaf index saved at attestation time.
+
+    Only files whose size or mtime differ from the cache index (by default
+    the attested index itself) are read, so a re-check costs time in
+    proportion to the change plus one stat per file. The refreshed leaves
+    are written back to cache_index when one is given.
+
+    Returns {"match", "current_hash", "hash_at_attestation", "modified",
+    "added", "removed", "hashed", "reused"}.
+    """
+    attested_root, attested = read_index(attested_index)
+    if merkle_root(attested.values()) != attested_root:
+        raise ValueError(f"{attested_index}: leaves do not hash to the recorded root")
+    known = load_index(cache_index) if cache_index and os.path.exists(cache_index) else attested
+    tree = hash_tree(root, known, workers, exclude)
+    if cache_index:
+        save_index(cache_index, tree)
+    return {"match": tree.root == attested_root, "current_hash": tree.root,
+            "hash_at_attestation": attested_root, **diverged(attested, tree.leaves),
+            "hashed": tree.hashed, "reused": tree.reused}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merkle-hash a codebase for codebase_verification.current_hash.")
+    parser.add_argument("directory")
+    parser.add_argument("--index", help="leaf index file: reused if present, then rewritten")
+    parser.add_argument("--attested", help="leaf index saved at attestation: report files that diverged from it")
+    parser.add_argument("--workers", type=int, default=None, help="hashing threads")
+    args = parser.parse_args(argv)
+
+    exclude = EXCLUDE | {n for p in (args.index, args.attested) if p for n in (Path(p).name, Path(p).name + ".tmp")}
+    start = time.perf_counter()
+    if args.attested:
+        result = verify_tree(args.directory, args.attested, args.index, args.workers, exclude)
+        seconds = time.perf_counter() - start
+        print(json.dumps({k: v for k, v in result.items() if k not in ("hashed", "reused")}, indent=2))
+        print(f"Hashed {result['hashed']:,} files, reused {result['reused']:,} in {seconds:.2f}s", file=sys.stderr)
+        sys.exit(0 if result["match"] else 1)
+
+    index = load_index(args.index) if args.index and os.path.exists(args.index) else None
+    tree = hash_tree(args.directory, index, args.workers, exclude)
+    seconds = time.perf_counter() - start
+    if args.index:
+        save_index(args.index, tree)
+
+    print(json.dumps({"current_hash": tree.root, "files": len(tree.leaves)}, indent=2))
+    print(f"Hashed {tree.hashed:,} files ({tree.bytes_hashed / 1e6:,.1f} MB), reused {tree.reused:,} "
+          f"in {seconds:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
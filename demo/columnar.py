@@ -0,0 +1,203 @@
+"""
+Columnar Policy Evaluation
+
+Flattens the compliance extension fields of a fleet of manifests into NumPy
+columns (jurisdictions as bitmasks, provider as a categorical, attestation
+timestamps as int64) so every check_compliance rule becomes one vectorized
+mask and a policy is evaluated over the whole fleet in a single pass.
+
+Rule names and pass/fail results match CompiledPolicy.check() exactly; see
+parity_mismatches().
+"""
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+from policy_engine import CompiledPolicy, parse_timestamp
+
+DAY_US = 86400 * 1_000_000
+NO_ATTESTATION = np.iinfo(np.int64).max
+
+# Schema enum order; codes outside it get the next free bit on first sight
+JURISDICTIONS = ["EU", "Japan", "Korea", "USA", "UK", "Other"]
+
+
+def _us(ts: float) -> int:
+    return round(ts * 1_000_000)
+
+
+class ManifestTable:
+    """Column store of the fields the policy rules read, one row per manifest.
+
+    Columns:
+      present              bool   manifest was non-empty
+      declared             uint64 bitmask of every declared jurisdiction code
+      compliant            uint64 bitmask of jurisdictions with compliant: true
+      oldest_attestation   int64  earliest attestation_date (µs since epoch)
+      provider             int32  index into provider_names, -1 if not disclosed
+      gpai_compliant       bool
+      uses_sub_agents      bool
+      declares_sub_agents  bool   non-empty declared_sub_agents
+      unverified_sub_agent bool   some declared sub-agent lacks compliance_verified
+      has_codebase_hash    bool
+      hash_mismatch        bool   current and attested hashes both set and different
+    """
+
+    def __init__(self, manifests=(), jurisdictions=None):
+        self.jurisdiction_bits = {code: i for i, code in enumerate(jurisdictions or JURISDICTIONS)}
+        self.provider_names = []
+        provider_codes = {}
+        ids, present, declared, compliant, oldest, provider = [], [], [], [], [], []
+        gpai, uses_subs, declares_subs, unverified, has_hash, mismatch = [], [], [], [], [], []
+
+        for m in manifests:
+            m = m or {}
+            attestations = m.get("compliance_attestations") or {}
+            model = m.get("model_provider_compliance") or {}
+            subs = m.get("sub_agent_compliance") or {}
+            codebase = m.get("codebase_verification") or {}
+
+            d_mask = c_mask = 0
+            first = NO_ATTESTATION
+            for j in attestations.get("jurisdictions") or ():
+                bit = 1 << self._jurisdiction_bit(j.get("jurisdiction"))
+                d_mask |= bit
+                if j.get("compliant"):
+                    c_mask |= bit
+                if j.get("attestation_date"):
+                    first = min(first, _us(parse_timestamp(j["attestation_date"])))
+
+            name = model.get("provider_name")
+            if name:
+                if name not in provider_codes:
+                    provider_codes[name] = len(self.provider_names)
+                    self.provider_names.append(name)
+                provider.append(provider_codes[name])
+            else:
+                provider.append(-1)
+
+            declared_subs = subs.get("declared_sub_agents") or ()
+            current, attested = codebase.get("current_hash"), codebase.get("hash_at_attestation")
+
+            ids.append(m.get("id"))
+            present.append(bool(m))
+            declared.append(d_mask)
+            compliant.append(c_mask)
+            oldest.append(first)
+            gpai.append(bool(model.get("gpai_compliant")))
+            uses_subs.append(bool(subs.get("uses_sub_agents")))
+            declares_subs.append(bool(declared_subs))
+            unverified.append(any(not s.get("compliance_verified") for s in declared_subs))
+            has_hash.append(bool(current))
+            mismatch.append(bool(current and attested and current != attested))
+
+        self.ids = ids
+        self.present = np.array(present, dtype=bool)
+        self.declared = np.array(declared, dtype=np.uint64)
+        self.compliant = np.array(compliant, dtype=np.uint64)
+        self.oldest_attestation = np.array(oldest, dtype=np.int64)
+        self.provider = np.array(provider, dtype=np.int32)
+        self.gpai_compliant = np.array(gpai, dtype=bool)
+        self.uses_sub_agents = np.array(uses_subs, dtype=bool)
+        self.declares_sub_agents = np.array(declares_subs, dtype=bool)
+        self.unverified_sub_agent = np.array(unverified, dtype=bool)
+        self.has_codebase_hash = np.array(has_hash, dtype=bool)
+        self.hash_mismatch = np.array(mismatch, dtype=bool)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _jurisdiction_bit(self, code) -> int:
+        bit = self.jurisdiction_bits.get(code)
+        if bit is None:
+            bit = self.jurisdiction_bits[code] = len(self.jurisdiction_bits)
+            if bit >= 64:
+                raise ValueError("more than 64 distinct jurisdiction codes")
+        return bit
+
+    def jurisdiction_mask(self, codes) -> np.uint64:
+        """Bitmask for a set of codes; codes never seen in the table map to no bit."""
+        mask = 0
+        for code in codes:
+            if code in self.jurisdiction_bits:
+                mask |= 1 << self.jurisdiction_bits[code]
+        return np.uint64(mask)
+
+
+def rule_masks(table: ManifestTable, policy: dict, now: datetime = None) -> dict:
+    """{check name: bool array of rows failing it}, for the checks the policy enables.
+
+    Names and enabling conditions mirror policy_engine._compile_chain_checks.
+    """
+    reg = policy.get("regulatory_requirements", {})
+    model_reqs = policy.get("model_provider_requirements", {})
+    sub_reqs = policy.get("sub_agent_requirements", {})
+    now_us = _us(now.timestamp() if now else time.time())
+    zero = np.uint64(0)
+    masks = {}
+
+    required = reg.get("required_jurisdictions", [])
+    if required:
+        missing = np.zeros(len(table), dtype=bool)
+        for code in required:
+            missing |= (table.declared & table.jurisdiction_mask([code])) == zero
+        masks["required_jurisdictions"] = missing
+
+    blocked = reg.get("blocked_jurisdictions", [])
+    if blocked:
+        masks["blocked_jurisdictions"] = (table.declared & table.jurisdiction_mask(blocked)) != zero
+
+    max_age = reg.get("max_attestation_age_days", 365)
+    has_date = table.oldest_attestation != NO_ATTESTATION
+    age_days = (now_us - table.oldest_attestation) // DAY_US
+    masks["attestation_freshness"] = has_date & (age_days > max_age)
+
+    if model_reqs.get("require_provider_disclosed"):
+        masks["provider_disclosed"] = table.provider < 0
+    if model_reqs.get("require_gpai_compliance"):
+        masks["gpai_compliance"] = ~table.gpai_compliant
+
+    blocked_providers = [table.provider_names.index(p) for p in model_reqs.get("blocked_providers", [])
+                         if p in table.provider_names]
+    if model_reqs.get("blocked_providers"):
+        masks["blocked_provider"] = np.isin(table.provider, blocked_providers)
+
+    if sub_reqs.get("require_sub_agent_disclosure"):
+        masks["sub_agent_disclosure"] = table.uses_sub_agents & ~table.declares_sub_agents
+
+    if reg.get("require_codebase_hash"):
+        masks["codebase_hash"] = ~table.has_codebase_hash
+    if reg.get("require_hash_match"):
+        masks["hash_match"] = table.hash_mismatch
+
+    # An empty manifest fails with "No manifest found" before any rule runs
+    for name in masks:
+        masks[name] &= table.present
+    return masks
+
+
+def evaluate(table: ManifestTable, policy: dict, now: datetime = None) -> np.ndarray:
+    """Bool array: which rows pass the policy (CompiledPolicy.check()["pass"])."""
+    passed = table.present.copy()
+    for mask in rule_masks(table, policy, now).values():
+        passed &= ~mask
+    return passed
+
+
+def parity_mismatches(table: ManifestTable, manifests: list, policy: dict, now: datetime) -> list:
+    """Rows where the columnar and scalar engines disagree, as (row, columnar, scalar).
+
+    Compares the set of failing check names per row, which also pins down
+    the pass/fail verdict.
+    """
+    compiled = CompiledPolicy(policy)
+    masks = rule_masks(table, policy, now)
+    mismatches = []
+    for row, manifest in enumerate(manifests):
+        columnar = tuple(name for name, mask in masks.items() if mask[row])
+        scalar = compiled.failed_checks(manifest, now) if manifest else ()
+        if set(columnar) != set(scalar):
+            mismatches.append((row, columnar, scalar))
+    return mismatches
@@ -0,0 +1,319 @@
+"""
+Decision Log
+
+An append-only record of verification decisions for auditors. Each record
+holds the time, the policy digest, the manifest digest, the agent, the
+outcome of every rule, the chain path that led to the agent, and the
+reasons and warnings.
+
+Callers only append a tuple to an in-memory queue. A background writer
+thread does the rest: it computes manifest digests, serializes, writes
+each batch of up to max_batch records with one write() and one fsync(),
+and rotates to a new segment file once the current one reaches max_bytes.
+Segments are never rewritten or deleted. A record that fails to encode is
+dropped on its own and counted as lost. A failed write or fsync leaves its
+segment behind and retries the same records in a fresh one, so nothing
+queued is discarded (records that reached the disk before a failed fsync
+may appear twice); close() gives up after CLOSE_RETRIES failed attempts.
+
+Two framings:
+    jsonl   one JSON object per line (decisions-000001.jsonl, ...)
+    binary  per record: uint32 length, JSON payload, uint32 CRC-32
+            (decisions-000001.cbdl), so a torn tail is detected on read
+
+What gets logged: failing decisions of policies with on_failure.log set,
+and every decision when the log is opened with every_decision=True.
+
+Run with: python decision_log.py decisions/ [--binary]   (prints the records)
+"""
+
+import argparse
+import atexit
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import manifest_binary
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.05      # seconds the writer sleeps between batches
+DEFAULT_MAX_PENDING = 100_000      # queued records beyond this are dropped (and counted), never waited on
+DEFAULT_MAX_BATCH = 4096           # records per write() + fsync(), so syncs keep coming under sustained load
+CLOSE_RETRIES = 3                  # failed writes close() tolerates before counting what is left as lost
+FRAMINGS = {"jsonl": ".jsonl", "binary": ".cbdl"}
+_FRAME = struct.Struct("<I")
+# Records are built in a fixed key order, so compact unsorted JSON is already deterministic
+_encode_json = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def _segment_number(path: Path) -> int:
+    try:
+        return int(path.stem.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return -1
+
+
+def segments(directory, framing: str = "jsonl") -> list:
+    """The log's segment files in write order."""
+    found = Path(directory).glob(f"decisions-*{FRAMINGS[framing]}")
+    return sorted((p for p in found if _segment_number(p) >= 0), key=_segment_number)
+
+
+class DecisionLog:
+    """Queue verification decisions and persist them from a background thread."""
+
+    def __init__(self, directory, framing: str = "jsonl", max_bytes: int = DEFAULT_MAX_BYTES,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_pending: int = DEFAULT_MAX_PENDING,
+                 every_decision: bool = False, max_batch: int = DEFAULT_MAX_BATCH):
+        if framing not in FRAMINGS:
+            raise ValueError(f"unknown framing: {framing!r} (choose from {', '.join(FRAMINGS)})")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.framing = framing
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.every_decision = every_decision
+        self.max_batch = max_batch
+        self.pending = deque()
+        self.frames = []        # encoded records not yet fsynced, retried after a failed write
+        self.queued = self.written = self.dropped = self.lost = self.syncs = self.rotations = 0
+        self.write_errors = 0
+        self._wake = threading.Event()
+        self._idle = threading.Condition()
+        self._closed = False
+        # Each run starts a fresh segment, so a tail torn by a crash is never appended to
+        existing = segments(self.directory, framing)
+        self._number = _segment_number(existing[-1]) + 1 if existing else 1
+        self._file = None       # opened on the first write
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="decision-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)     # queued decisions are written before the interpreter exits
+
+    # ── hot path ─────────────────────────────────────────
+
+    def wants(self, policy, passed: bool) -> bool:
+        """Whether a decision with this outcome under this policy is logged."""
+        return self.every_decision or (not passed and policy.log_on_failure)
+
+    def decide(self, policy, result: dict, manifest: dict = None, manifest_digest: str = None,
+               agent_id: str = None, path=(), check: str = "chain", status: str = None):
+        """Log one decision if wants() says so. Never blocks; drops it if the writer is max_pending behind.
+
+        result is a check()/check_agent() result (with "rules" when traced);
+        its lists are copied, so callers may keep appending to them.
+        """
+        if not self.wants(policy, result["pass"]):
+            return
+        if len(self.pending) >= self.max_pending or self._closed:
+            self.dropped += 1
+            return
+        self.pending.append((time.time(), policy.digest, manifest, manifest_digest, agent_id, tuple(path),
+                             check, status, result["pass"], tuple(result["reasons"]),
+                             tuple(result["warnings"]), result.get("rules"), result.get("level")))
+        self.queued += 1
+
+    # ── writer thread ────────────────────────────────────
+
+    def _open_segment(self):
+        path = self.directory / f"decisions-{self._number:06d}{FRAMINGS[self.framing]}"
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        self._number += 1
+        self.rotations += 1
+
+    def _abandon_segment(self):
+        """After a failed write: leave the segment (and any torn tail) behind and start a new one."""
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        self._number += 1
+
+    def _encode(self, item) -> bytes:
+        (ts, policy_digest, manifest, manifest_digest, agent_id, path, check, status,
+         passed, reasons, warnings, rules, level) = item
+        if manifest_digest is None and isinstance(manifest, dict) and manifest:
+            manifest_digest = manifest_binary.digest(manifest)
+        record = {
+            "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+            "check": check,
+            "agent_id": agent_id,
+            "pass": passed,
+            "policy_digest": policy_digest,
+            "manifest_digest": manifest_digest,
+            "chain": list(path),
+            "rules": rules or {},
+            "reasons": list(reasons),
+            "warnings": list(warnings),
+        }
+        if status is not None:
+            record["status"] = status
+        if level is not None:
+            record["level"] = level
+        payload = _encode_json(record).encode()
+        if self.framing == "binary":
+            return _FRAME.pack(len(payload)) + payload + _FRAME.pack(zlib.crc32(payload))
+        return payload + b"\n"
+
+    def _write_batch(self):
+        """Encode queued records up to max_batch unsynced frames, then write and fsync them."""
+        pending, frames = self.pending, self.frames
+        for _ in range(min(len(pending), self.max_batch - len(frames))):
+            item = pending.popleft()
+            try:
+                frames.append(self._encode(item))
+            except Exception as e:     # only this record is lost; the rest of the batch goes on
+                self.lost += 1
+                print(f"decision log: dropped a record for agent {item[4]!r}: {e!r}", file=sys.stderr)
+        while frames:
+            if self._file is None:
+                self._open_segment()
+            count, size = 0, self._size
+            while count < len(frames) and not (size and size + len(frames[count]) > self.max_bytes):
+                size += len(frames[count])
+                count += 1
+            if count:
+                self._sync(frames[:count])
+                self._size = size
+                del frames[:count]
+                self.written += count
+            if frames:
+                self._rotate()
+
+    def _sync(self, frames: list):
+        self._file.write(b"".join(frames))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.syncs += 1
+
+    def _run(self):
+        failures = 0
+        while True:
+            # A full batch goes out at once; a smaller one gets flush_interval to fill up
+            if len(self.pending) < self.max_batch and not self._closed:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            closing = self._closed
+            try:
+                self._write_batch()
+                failures = 0
+            except Exception as e:     # keep serving; the unsynced frames are retried in a fresh segment
+                failures += 1
+                self.write_errors += 1
+                print(f"decision log: write failed, retrying {len(self.frames)} records: {e!r}", file=sys.stderr)
+                if self._file is not None:
+                    self._abandon_segment()
+                if closing and failures >= CLOSE_RETRIES:
+                    self.lost += len(self.frames) + len(self.pending)
+                    self.frames.clear()
+                    self.pending.clear()
+                else:
+                    time.sleep(self.flush_interval)
+            with self._idle:
+                self._idle.notify_all()
+            if closing and not self.pending and not self.frames:
+                if self._file is not None:
+                    self._file.close()
+                return
+
+    # ── control ──────────────────────────────────────────
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is written and fsynced; False on timeout."""
+        target = self.queued
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self.written + self.lost < target and self._thread.is_alive():
+                self._wake.set()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining if remaining is not None else self.flush_interval)
+        return True
+
+    def close(self):
+        """Write what is queued, fsync, and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "lost": self.lost,
+            "pending": len(self.pending) + len(self.frames),
+            "write_errors": self.write_errors,
+            "syncs": self.syncs,
+            "rotations": self.rotations,
+            "segment": self._number,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ─────────────────────────────────────────────────────────
+# READING
+# ─────────────────────────────────────────────────────────
+
+def read_segment(path, framing: str = None):
+    """Yield the records in one segment file; a torn or corrupt tail ends the segment."""
+    path = Path(path)
+    framing = framing or ("binary" if path.suffix == FRAMINGS["binary"] else "jsonl")
+    with open(path, "rb") as f:
+        if framing == "jsonl":
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                yield json.loads(line)
+            return
+        while header := f.read(_FRAME.size):
+            if len(header) < _FRAME.size:
+                return
+            (length,) = _FRAME.unpack(header)
+            payload, trailer = f.read(length), f.read(_FRAME.size)
+            if len(payload) < length or len(trailer) < _FRAME.size or _FRAME.unpack(trailer)[0] != zlib.crc32(payload):
+                return
+            yield json.loads(payload)
+
+
+def read_decisions(directory, framing: str = "jsonl"):
+    """Yield every record in the log, oldest first."""
+    for path in segments(directory, framing):
+        yield from read_segment(path, framing)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the records in a decision log.")
+    parser.add_argument("directory", help="decision log directory")
+    parser.add_argument("--binary", action="store_true", help="read the binary framing (.cbdl segments)")
+    parser.add_argument("--failures", action="store_true", help="only failing decisions")
+    args = parser.parse_args(argv)
+    for record in read_decisions(args.directory, "binary" if args.binary else "jsonl"):
+        if not (args.failures and record["pass"]):
+            print(json.dumps(record, separators=(",", ":")))
+
+
+if __name__ == "__main__":
+    main()
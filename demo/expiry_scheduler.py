@@ -0,0 +1,234 @@
+"""
+Attestation Expiry Scheduler
+
+Keeps every future attestation boundary of the tracked manifests in one
+min-heap, so the next one to pass is always at the top:
+
+    attestation_age   attestation_date + max_attestation_age_days (as check() counts it)
+    expiry_date       a jurisdiction's expiry_date
+    valid_until       a jurisdiction's valid_until
+    certificate       security_certifications.<name>.valid_until
+
+When a boundary passes, cached verdicts on that manifest are dropped from the
+VerdictCache and listeners receive an ExpiryEvent, instead of the next
+request discovering the flip. Scheduling or replacing a manifest costs
+O(k log n) for its k boundaries; superseded heap entries are skipped when
+they surface rather than searched for.
+"""
+
+import heapq
+import itertools
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import manifest_binary
+from policy_engine import DAY, CompiledPolicy, parse_timestamp
+
+
+class ExpiryEvent(NamedTuple):
+    at: float               # POSIX time of the boundary
+    key: str                # the caller's name for the manifest (agent id, registry stem, ...)
+    kind: str               # attestation_age, expiry_date, valid_until or certificate
+    subject: str            # jurisdiction code or certification name
+    manifest_digest: str
+
+
+def _timestamp(value):
+    try:
+        return parse_timestamp(value) if isinstance(value, str) and value else None
+    except ValueError:
+        return None
+
+
+def boundaries(manifest: dict, max_age_days: int) -> list:
+    """(POSIX time, kind, subject) for every boundary in a manifest, in no particular order."""
+    found = []
+    for j in (manifest.get("compliance_attestations") or {}).get("jurisdictions") or ():
+        if not isinstance(j, dict):
+            continue
+        code = j.get("jurisdiction", "?")
+        attested = _timestamp(j.get("attestation_date"))
+        if attested is not None:
+            found.append((attested + (max_age_days + 1) * DAY, "attestation_age", code))
+        for field in ("expiry_date", "valid_until"):
+            at = _timestamp(j.get(field))
+            if at is not None:
+                found.append((at, field, code))
+    for name, cert in (manifest.get("security_certifications") or {}).items():
+        at = _timestamp(cert.get("valid_until")) if isinstance(cert, dict) else None
+        if at is not None:
+            found.append((at, "certificate", name))
+    return found
+
+
+class ExpiryScheduler:
+    """Min-heap of upcoming attestation boundaries across tracked manifests.
+
+    Call run_due() from your own loop, or start() a daemon thread that sleeps
+    until the next boundary (woken early when an earlier one is scheduled).
+    """
+
+    def __init__(self, policy: CompiledPolicy, cache=None, listeners=(), clock=time.time):
+        self.max_age_days = policy.max_attestation_age_days
+        self.cache = cache            # a VerdictCache, or None
+        self.listeners = list(listeners)
+        self.clock = clock
+        self.heap = []                # (at, seq, key, generation, kind, subject)
+        self.tracked = {}             # key -> (generation, manifest digest, manifest)
+        self.pending = {}             # key -> its live entries in the heap
+        self.generations = itertools.count(1)
+        self.seq = itertools.count()
+        self.stale = 0                # superseded entries still in the heap
+        self.fired = 0
+        self._wake = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+    def __len__(self) -> int:
+        return len(self.heap) - self.stale
+
+    # ─────────────────────────────────────────────────────
+    # TRACKING
+    # ─────────────────────────────────────────────────────
+
+    def schedule(self, key: str, manifest: dict, manifest_digest: str = None) -> int:
+        """Track (or re-track) a manifest's future boundaries; returns how many were scheduled."""
+        manifest_digest = manifest_digest or manifest_binary.digest(manifest)
+        with self._wake:
+            old = self.tracked.get(key)
+            if old is not None and old[1] == manifest_digest:
+                return 0
+            return self._schedule(key, manifest, manifest_digest)
+
+    def _schedule(self, key, manifest, manifest_digest) -> int:
+        self._forget(key)
+        generation = next(self.generations)
+        self.tracked[key] = (generation, manifest_digest, manifest)
+        now = self.clock()
+        head = self.heap[0][0] if self.heap else None
+        count = 0
+        for at, kind, subject in boundaries(manifest, self.max_age_days):
+            if at > now:
+                heapq.heappush(self.heap, (at, next(self.seq), key, generation, kind, subject))
+                count += 1
+        self.pending[key] = count
+        if count and (head is None or self.heap[0][0] < head):
+            self._wake.notify()
+        return count
+
+    def _forget(self, key):
+        if self.tracked.pop(key, None) is not None:
+            self.stale += self.pending.pop(key, 0)
+            self._compact_if_stale()
+
+    def _compact_if_stale(self):
+        if self.stale > 1024 and self.stale > len(self.heap) // 2:
+            live = {key: entry[0] for key, entry in self.tracked.items()}
+            self.heap = [e for e in self.heap if live.get(e[2]) == e[3]]
+            heapq.heapify(self.heap)
+            self.stale = 0
+
+    def remove(self, key: str):
+        with self._wake:
+            self._forget(key)
+
+    def sync(self, manifests: dict, digests: dict = None):
+        """Track exactly these {key: manifest}; unchanged digests cost nothing, vanished keys are removed."""
+        with self._wake:
+            for key in [k for k in self.tracked if k not in manifests]:
+                self._forget(key)
+            for key, manifest in manifests.items():
+                manifest_digest = (digests or {}).get(key) or manifest_binary.digest(manifest)
+                old = self.tracked.get(key)
+                if old is None or old[1] != manifest_digest:
+                    self._schedule(key, manifest, manifest_digest)
+
+    def update_policy(self, policy: CompiledPolicy):
+        """Adopt a new max_attestation_age_days; reschedules everything only if it changed."""
+        with self._wake:
+            if policy.max_attestation_age_days == self.max_age_days:
+                return
+            self.max_age_days = policy.max_attestation_age_days
+            tracked = list(self.tracked.items())
+            self.heap, self.tracked, self.pending, self.stale = [], {}, {}, 0
+            for key, (_, manifest_digest, manifest) in tracked:
+                self._schedule(key, manifest, manifest_digest)
+
+    # ─────────────────────────────────────────────────────
+    # FIRING
+    # ─────────────────────────────────────────────────────
+
+    def next_boundary(self):
+        """POSIX time of the next live boundary, or None."""
+        with self._wake:
+            self._skip_stale()
+            return self.heap[0][0] if self.heap else None
+
+    def _skip_stale(self):
+        while self.heap:
+            entry = self.heap[0]
+            tracked = self.tracked.get(entry[2])
+            if tracked is not None and tracked[0] == entry[3]:
+                return
+            heapq.heappop(self.heap)
+            self.stale -= 1
+
+    def run_due(self, now: float = None) -> list:
+        """Fire every boundary at or before now; returns the events in time order.
+
+        A listener that raises is reported and skipped, so the others still
+        run and the scheduler thread keeps firing.
+        """
+        now = self.clock() if now is None else now
+        events = []
+        with self._wake:
+            while True:
+                self._skip_stale()
+                if not self.heap or self.heap[0][0] > now:
+                    break
+                at, _, key, _, kind, subject = heapq.heappop(self.heap)
+                self.pending[key] -= 1
+                events.append(ExpiryEvent(at, key, kind, subject, self.tracked[key][1]))
+        for event in events:
+            if self.cache is not None:
+                self.cache.invalidate_manifest(event.manifest_digest)
+            for listener in self.listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"expiry: listener {getattr(listener, '__name__', listener)!s} failed: {e!r}",
+                          file=sys.stderr)
+        self.fired += len(events)
+        return events
+
+    def start(self, max_sleep: float = 60.0):
+        """Fire boundaries as they pass, from a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop = False
+
+        def loop():
+            while True:
+                with self._wake:
+                    if self._stop:
+                        return
+                    upcoming = self.heap[0][0] if self.heap else None
+                    delay = max_sleep if upcoming is None else min(max_sleep, upcoming - self.clock())
+                    if delay > 0:
+                        self._wake.wait(delay)
+                    if self._stop:
+                        return
+                self.run_due()
+
+        self._thread = threading.Thread(target=loop, name="expiry-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._wake:
+            self._stop = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
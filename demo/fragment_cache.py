@@ -0,0 +1,52 @@
+"""
+HTML Fragment Cache
+
+Rendered HTML fragments (agent cards, chain views, whole pages) keyed by
+digests of everything they were rendered from: a manifest digest, the
+verdict, the scenario. Keys change whenever the inputs do, so nothing is
+ever invalidated; fragments nobody asks for again age out of the LRU.
+"""
+
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """LRU cache of rendered HTML strings, bounded by entry count and total characters."""
+
+    def __init__(self, max_entries: int = 10_000, max_chars: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.entries = OrderedDict()
+        self.chars = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, render) -> str:
+        """The fragment cached under key, or render() stored under it."""
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = render()
+        if len(html) <= self.max_chars:
+            self.entries[key] = html
+            self.chars += len(html)
+            while len(self.entries) > self.max_entries or self.chars > self.max_chars:
+                _, evicted = self.entries.popitem(last=False)
+                self.chars -= len(evicted)
+                self.evictions += 1
+        return html
+
+    def clear(self):
+        self.entries.clear()
+        self.chars = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "chars": self.chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
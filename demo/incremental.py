@@ -0,0 +1,256 @@
+"""
+Incremental Re-verification
+
+Keeps every agent's per-check outcomes and recomputes only what a change can
+affect. Each check declares the policy keys and manifest paths it reads
+(policy_engine.CHECK_READS): a policy edit re-runs the checks that read a
+changed key, on every agent; a manifest edit re-runs the checks that read a
+changed path, on that agent alone. Chain verdicts are then refreshed for the
+agents whose verdict changed and every ancestor above them in the sub-agent
+graph.
+"""
+
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+from chain_verifier import DEFAULT_MAX_CHAIN_DEPTH
+from policy_engine import CHECK_READS, CompiledPolicy, view_manifest
+
+# Policy keys that shape the chain walk rather than any single check
+CHAIN_KEYS = ("sub_agent_requirements.verify_sub_agent_compliance", "sub_agent_requirements.max_chain_depth")
+SUB_AGENTS_PATH = "sub_agent_compliance.declared_sub_agents"
+# Checks whose outcome also depends on the clock
+CLOCK_CHECKS = frozenset({"attestation_freshness"})
+
+
+def changed_paths(old, new, prefix: str = "") -> set:
+    """Dotted paths at which two JSON documents differ.
+
+    Lists compare as a whole, so a change anywhere inside one is reported at
+    the list's path. "" means the documents differ at the root.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        paths = set()
+        for key in old.keys() | new.keys():
+            path = f"{prefix}.{key}" if prefix else key
+            if key not in old or key not in new:
+                paths.add(path)
+            else:
+                paths |= changed_paths(old[key], new[key], path)
+        return paths
+    if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)):
+        # Registry snapshots hold lists as tuples; compare element-wise
+        same = len(old) == len(new) and not any(changed_paths(a, b, prefix) for a, b in zip(old, new))
+        return set() if same else {prefix}
+    return set() if old == new else {prefix}
+
+
+def overlaps(changed, reads) -> bool:
+    """True if a change at any of the changed paths touches any path in reads."""
+    return any(not c or c == r or r.startswith(c + ".") or c.startswith(r + ".")
+               for c in changed for r in reads)
+
+
+def _sub_agent_ids(manifest: dict) -> tuple:
+    subs = (manifest.get("sub_agent_compliance") or {}).get("declared_sub_agents") or ()
+    return tuple(s.get("agent_id") or s.get("compliance_url") for s in subs)
+
+
+class IncrementalVerifier:
+    """Per-agent check outcomes and chain verdicts, kept current under edits.
+
+    Own verdicts match CompiledPolicy.check(); chain verdicts follow
+    verify_chain()'s rules over the agents held here, with a declared
+    sub-agent that is not held failing the chain. Outcomes of CLOCK_CHECKS
+    are as of the last time they ran; advance_clock() re-runs only those.
+
+    update_policy(), update_manifest() and remove_manifest() return the ids
+    of the agents whose chain verdict changed.
+    """
+
+    def __init__(self, policy: dict, manifests=(), now: datetime = None):
+        self.policy = CompiledPolicy(policy)
+        self.now = now
+        self.manifests = {}       # agent_id -> manifest
+        self.outcomes = {}        # agent_id -> {check name: (reasons, warnings)}
+        self.verdicts = {}        # agent_id -> own check() result
+        self.chain_verdicts = {}  # agent_id -> chain result
+        self.children = {}        # agent_id -> declared sub-agent ids
+        self.parents = defaultdict(set)
+        self.checks_run = self.chains_run = 0
+        for manifest in manifests:
+            self._store(manifest)
+        for agent_id in self.manifests:
+            self.chain_verdicts[agent_id] = self._chain(agent_id)
+
+    # ─────────────────────────────────────────────────────
+    # OWN VERDICTS
+    # ─────────────────────────────────────────────────────
+
+    def _ts(self) -> float:
+        return self.now.timestamp() if self.now else time.time()
+
+    def _select(self, names) -> tuple:
+        return tuple(c for c in self.policy.chain_checks if c.name in names)
+
+    def _run(self, agent_id, checks=None) -> bool:
+        """Re-run checks (all if None) on one agent; True if its verdict changed."""
+        outcomes = self.outcomes.setdefault(agent_id, {})
+        checks = self.policy.chain_checks if checks is None else checks
+        if checks:
+            v = view_manifest(self.manifests[agent_id])
+            now = self._ts()
+            for check in checks:
+                reasons, warnings = [], []
+                check.fn(v, now, reasons, warnings)
+                outcomes[check.name] = (reasons, warnings)
+            self.checks_run += len(checks)
+        return self._assemble(agent_id)
+
+    def _assemble(self, agent_id) -> bool:
+        outcomes = self.outcomes[agent_id]
+        reasons, warnings = [], []
+        for check in self.policy.chain_checks:
+            check_reasons, check_warnings = outcomes[check.name]
+            reasons += check_reasons
+            warnings += check_warnings
+        verdict = {"pass": not reasons, "reasons": reasons, "warnings": warnings}
+        changed = verdict != self.verdicts.get(agent_id)
+        self.verdicts[agent_id] = verdict
+        return changed
+
+    def _store(self, manifest) -> bool:
+        agent_id = manifest.get("id")
+        if not agent_id:
+            raise ValueError("manifest has no id")
+        self.manifests[agent_id] = manifest
+        self._link(agent_id, _sub_agent_ids(manifest))
+        return self._run(agent_id)
+
+    def _link(self, agent_id, sub_ids) -> bool:
+        old = self.children.get(agent_id)
+        self.children[agent_id] = sub_ids
+        if old == sub_ids:
+            return False
+        for sub_id in old or ():
+            self.parents[sub_id].discard(agent_id)
+        for sub_id in sub_ids:
+            self.parents[sub_id].add(agent_id)
+        return True
+
+    # ─────────────────────────────────────────────────────
+    # CHAIN VERDICTS
+    # ─────────────────────────────────────────────────────
+
+    def _chain(self, root_id) -> dict:
+        """verify_chain() over the held manifests, without fail-fast."""
+        self.chains_run += 1
+        sub_reqs = self.policy.policy.get("sub_agent_requirements", {})
+        recurse = sub_reqs.get("verify_sub_agent_compliance", False)
+        max_depth = sub_reqs.get("max_chain_depth", DEFAULT_MAX_CHAIN_DEPTH)
+        reasons, warnings = [], []
+        seen = {root_id}
+        # Breadth-first, so an agent is reached at its shallowest depth
+        queue = deque([(root_id, ())])
+        while queue:
+            agent_id, path = queue.popleft()
+            verdict = self.verdicts[agent_id]
+            reasons += (f"{agent_id}: {r}" for r in verdict["reasons"])
+            warnings += (f"{agent_id}: {w}" for w in verdict["warnings"])
+            if not recurse:
+                break
+            path = path + (agent_id,)
+            for sub_id in self.children[agent_id]:
+                if sub_id in path:
+                    warnings.append(f"{agent_id}: Sub-agent cycle: {' → '.join(path)} → {sub_id}")
+                elif sub_id in seen:
+                    continue
+                elif len(path) >= max_depth:
+                    reasons.append(f"{sub_id}: Chain deeper than max_chain_depth ({max_depth})")
+                elif sub_id not in self.manifests:
+                    seen.add(sub_id)
+                    reasons.append(f"{sub_id}: Sub-agent manifest not available")
+                else:
+                    seen.add(sub_id)
+                    queue.append((sub_id, path))
+        return {"pass": not reasons, "reasons": reasons, "warnings": warnings}
+
+    def _propagate(self, agent_ids) -> set:
+        """Recompute chain verdicts for agent_ids and all their ancestors."""
+        pending, affected = list(agent_ids), set()
+        while pending:
+            agent_id = pending.pop()
+            if agent_id in affected:
+                continue
+            affected.add(agent_id)
+            pending.extend(self.parents.get(agent_id, ()))
+        changed = set()
+        for agent_id in affected:
+            if agent_id not in self.manifests:
+                self.chain_verdicts.pop(agent_id, None)
+                continue
+            chain = self._chain(agent_id)
+            if chain != self.chain_verdicts.get(agent_id):
+                self.chain_verdicts[agent_id] = chain
+                changed.add(agent_id)
+        return changed
+
+    # ─────────────────────────────────────────────────────
+    # UPDATES
+    # ─────────────────────────────────────────────────────
+
+    def update_manifest(self, manifest: dict) -> set:
+        """Add or replace one agent's manifest, re-running only the checks it affects."""
+        agent_id = manifest.get("id")
+        old = self.manifests.get(agent_id)
+        if old is None:
+            self._store(manifest)
+            return self._propagate([agent_id])
+
+        paths = changed_paths(old, manifest)
+        checks = tuple(c for c in self.policy.chain_checks if overlaps(paths, CHECK_READS[c.name][1]))
+        self.manifests[agent_id] = manifest
+        relinked = overlaps(paths, (SUB_AGENTS_PATH,)) and self._link(agent_id, _sub_agent_ids(manifest))
+        if (checks and self._run(agent_id, checks)) or relinked:
+            return self._propagate([agent_id])
+        return set()
+
+    def remove_manifest(self, agent_id: str) -> set:
+        """Drop an agent; chains that declared it now fail."""
+        if agent_id not in self.manifests:
+            return set()
+        del self.manifests[agent_id], self.outcomes[agent_id], self.verdicts[agent_id]
+        self._link(agent_id, ())
+        del self.children[agent_id]
+        changed = self._propagate([agent_id])
+        return changed | {agent_id}
+
+    def update_policy(self, policy: dict) -> set:
+        """Swap in a new policy, re-running only the checks that read a changed key."""
+        keys = changed_paths(self.policy.policy, policy)
+        old_checks = self.policy.chain_checks
+        self.policy = CompiledPolicy(policy)
+        names = {c.name for c in old_checks + self.policy.chain_checks if overlaps(keys, CHECK_READS[c.name][0])}
+        if not names and not overlaps(keys, CHAIN_KEYS):
+            return set()
+
+        # Outcomes of checks the new policy dropped are simply no longer assembled
+        checks = self._select(names)
+        dirty = [agent_id for agent_id in self.manifests if self._run(agent_id, checks)]
+        if overlaps(keys, CHAIN_KEYS):
+            dirty = list(self.manifests)
+        return self._propagate(dirty)
+
+    def advance_clock(self, now: datetime = None) -> set:
+        """Move the evaluation time forward and re-run only the clock-dependent checks."""
+        self.now = now
+        checks = self._select(CLOCK_CHECKS)
+        dirty = [agent_id for agent_id in self.manifests if self._run(agent_id, checks)]
+        return self._propagate(dirty)
+
+    def verdict(self, agent_id: str) -> dict:
+        return self.verdicts[agent_id]
+
+    def chain_verdict(self, agent_id: str) -> dict:
+        return self.chain_verdicts[agent_id]
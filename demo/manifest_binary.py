@@ -0,0 +1,465 @@
+"""
+Binary Manifest Format
+
+A canonical, compact encoding of a manifest (CBMF). The fields the policy
+engine and registry read sit at fixed offsets or in fixed-size records:
+
+    header        108 bytes: magic, version, flags, length, id and
+                  provider_name (string indexes), record counts, section
+                  offsets, current_hash and hash_at_attestation (raw sha256)
+    jurisdictions 24 bytes each: code, flags, attestation_date and
+                  expiry_date (int64 µs since epoch), questionnaire_url
+    sub-agents    12 bytes each: agent_id, compliance_url, flags
+    strings       count, offsets, UTF-8 blob; each distinct string once
+    residual      canonical_json of everything else
+
+Jurisdiction codes in the schema enum are stored as their index, other codes
+and provider names as string indexes. BinaryManifest reads fields straight
+from bytes, a memoryview or an mmap without decoding the rest.
+
+A field only takes its typed slot when it decodes back to exactly the same
+JSON value (a bool, a timestamp that re-formats to the same text, a
+lowercase sha256 digest); anything else stays in the residual, so
+decode(encode(m)) == m for every manifest. Equal manifests encode to equal
+bytes regardless of key order, so the encoding doubles as the hashing and
+signing input (digest(), audit_signatures "canonicalization": "cbmf-v1").
+
+Run with: python manifest_binary.py manifest.json [...]
+"""
+
+import hashlib
+import json
+import re
+import struct
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from policy_engine import canonical_json
+
+MAGIC = b"CBMF"
+VERSION = 2               # 2: record counts widened from u16 to u32
+CANONICALIZATION = "cbmf-v2"
+
+# magic, version, reserved, flags, length, id, provider_name, jurisdiction count, sub-agent count,
+# jurisdictions offset, sub-agents offset, strings offset, residual offset, current_hash, hash_at_attestation
+_HEADER = struct.Struct("<4sBBHIiiIIIIII32s32s")
+_JURISDICTION = struct.Struct("<hHqqi")  # code, flags, attestation_date, expiry_date, questionnaire_url
+_SUB_AGENT = struct.Struct("<iiHxx")     # agent_id, compliance_url, flags
+_U32 = struct.Struct("<I")
+_U32_PAIR = struct.Struct("<II")
+
+# Schema enum order, as in columnar.JURISDICTIONS; index = stored code
+JURISDICTIONS = ("EU", "Japan", "Korea", "USA", "UK", "Other")
+_JURISDICTION_CODES = {code: i for i, code in enumerate(JURISDICTIONS)}
+
+# Header flags
+GPAI, GPAI_TRUE = 1 << 0, 1 << 1
+USES_SUBS, USES_SUBS_TRUE = 1 << 2, 1 << 3
+CURRENT_HASH, ATTESTED_HASH = 1 << 4, 1 << 5
+HAS_JURISDICTIONS, HAS_SUB_AGENTS = 1 << 6, 1 << 7
+
+# Jurisdiction record flags
+J_CODE = 1 << 0
+J_COMPLIANT, J_COMPLIANT_TRUE = 1 << 1, 1 << 2
+J_AUDIT, J_AUDIT_TRUE = 1 << 3, 1 << 4
+J_AUTOMATED, J_AUTOMATED_TRUE = 1 << 5, 1 << 6
+J_ATTESTED, J_ATTESTED_ISO = 1 << 7, 1 << 8
+J_EXPIRES, J_EXPIRES_ISO = 1 << 9, 1 << 10
+
+# Sub-agent record flags
+S_VERIFIED, S_VERIFIED_TRUE = 1 << 0, 1 << 1
+
+NO_STRING = -1
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_HASH_RE = re.compile(r"sha256:[0-9a-f]{64}\Z")
+
+
+class Jurisdiction(NamedTuple):
+    code: str
+    compliant: bool          # None where absent or not a bool
+    third_party_audit: bool
+    automated_verification: bool
+    attestation_us: int      # µs since epoch; None where absent or not re-formattable
+    expiry_us: int
+    questionnaire_url: str
+
+
+class SubAgent(NamedTuple):
+    agent_id: str
+    compliance_url: str
+    compliance_verified: bool
+
+
+# ─────────────────────────────────────────────────────────
+# FIELD CODECS
+# ─────────────────────────────────────────────────────────
+
+def format_timestamp(us: int, iso: bool) -> str:
+    """"2026-01-15T00:00:00Z" style, or datetime.isoformat()'s "+00:00" style when iso."""
+    dt = _EPOCH + timedelta(microseconds=us)
+    if iso:
+        return dt.isoformat()
+    return dt.strftime("%Y-%m-%dT%H:%M:%S") + (f".{dt.microsecond:06d}" if dt.microsecond else "") + "Z"
+
+
+def _timestamp(value):
+    """(µs since epoch, iso) if value is a UTC timestamp that re-formats to itself, else None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.utcoffset() != timedelta(0):
+        return None
+    us = (dt - _EPOCH) // _MICROSECOND
+    for iso in (False, True):
+        if format_timestamp(us, iso) == value:
+            return us, iso
+    return None
+
+
+def _hash(value) -> bytes:
+    return bytes.fromhex(value[7:]) if isinstance(value, str) and _HASH_RE.match(value) else None
+
+
+class _Strings:
+    def __init__(self):
+        self.index = {}
+
+    def add(self, value: str) -> int:
+        return self.index.setdefault(value, len(self.index))
+
+    def pop(self, doc: dict, key: str) -> int:
+        """Move doc[key] into the table if it is a string; its index, or NO_STRING."""
+        if isinstance(doc.get(key), str):
+            return self.add(doc.pop(key))
+        return NO_STRING
+
+    def pack(self) -> bytes:
+        encoded = [s.encode() for s in self.index]
+        offsets, end = [0], 0
+        for e in encoded:
+            end += len(e)
+            offsets.append(end)
+        return struct.pack(f"<I{len(offsets)}I", len(encoded), *offsets) + b"".join(encoded)
+
+
+def _pop_bool(doc: dict, key: str, present: int, true: int) -> int:
+    value = doc.get(key)
+    if isinstance(value, bool):
+        del doc[key]
+        return present | (true if value else 0)
+    return 0
+
+
+def _pop_timestamp(doc: dict, key: str, present: int, iso_flag: int) -> tuple:
+    parsed = _timestamp(doc.get(key))
+    if parsed is None:
+        return 0, 0
+    del doc[key]
+    us, iso = parsed
+    return present | (iso_flag if iso else 0), us
+
+
+def _records(section, key):
+    """(section copy, [record copies]) if section[key] is a list of objects, else (None, None)."""
+    if not isinstance(section, dict):
+        return None, None
+    items = section.get(key)
+    if not isinstance(items, (list, tuple)) or not all(isinstance(i, dict) for i in items):
+        return None, None
+    section = dict(section)
+    section[key] = [dict(i) for i in items]
+    return section, section[key]
+
+
+# ─────────────────────────────────────────────────────────
+# ENCODE / DECODE
+# ─────────────────────────────────────────────────────────
+
+def encode(manifest: dict) -> bytes:
+    """The canonical CBMF bytes of a manifest."""
+    if not isinstance(manifest, dict):
+        raise TypeError("a manifest must be a JSON object")
+    rest = dict(manifest)
+    strings = _Strings()
+    flags = 0
+
+    agent_id = strings.pop(rest, "id")
+    provider = NO_STRING
+    if isinstance(rest.get("model_provider_compliance"), dict):
+        model = rest["model_provider_compliance"] = dict(rest["model_provider_compliance"])
+        provider = strings.pop(model, "provider_name")
+        flags |= _pop_bool(model, "gpai_compliant", GPAI, GPAI_TRUE)
+
+    hashes = [bytes(32), bytes(32)]
+    if isinstance(rest.get("codebase_verification"), dict):
+        codebase = rest["codebase_verification"] = dict(rest["codebase_verification"])
+        for i, (key, flag) in enumerate((("current_hash", CURRENT_HASH), ("hash_at_attestation", ATTESTED_HASH))):
+            raw = _hash(codebase.get(key))
+            if raw is not None:
+                del codebase[key]
+                hashes[i] = raw
+                flags |= flag
+
+    jurisdictions = []
+    attestations, entries = _records(rest.get("compliance_attestations"), "jurisdictions")
+    if entries is not None:
+        rest["compliance_attestations"] = attestations
+        flags |= HAS_JURISDICTIONS
+        for j in entries:
+            jflags, code = 0, 0
+            value = j.get("jurisdiction")
+            if isinstance(value, str) and value in _JURISDICTION_CODES:
+                jflags, code = J_CODE, _JURISDICTION_CODES[j.pop("jurisdiction")]
+            elif isinstance(value, str) and len(strings.index) < 0x8000:
+                jflags, code = J_CODE, -1 - strings.add(j.pop("jurisdiction"))
+            jflags |= _pop_bool(j, "compliant", J_COMPLIANT, J_COMPLIANT_TRUE)
+            jflags |= _pop_bool(j, "third_party_audit", J_AUDIT, J_AUDIT_TRUE)
+            jflags |= _pop_bool(j, "automated_verification", J_AUTOMATED, J_AUTOMATED_TRUE)
+            attested_flags, attested = _pop_timestamp(j, "attestation_date", J_ATTESTED, J_ATTESTED_ISO)
+            expires_flags, expires = _pop_timestamp(j, "expiry_date", J_EXPIRES, J_EXPIRES_ISO)
+            url = strings.pop(j, "questionnaire_url")
+            jurisdictions.append(_JURISDICTION.pack(code, jflags | attested_flags | expires_flags, attested, expires, url))
+
+    sub_agents = []
+    subs, entries = _records(rest.get("sub_agent_compliance"), "declared_sub_agents")
+    if entries is not None:
+        rest["sub_agent_compliance"] = subs
+        flags |= HAS_SUB_AGENTS
+        flags |= _pop_bool(subs, "uses_sub_agents", USES_SUBS, USES_SUBS_TRUE)
+        for s in entries:
+            sub_agents.append(_SUB_AGENT.pack(strings.pop(s, "agent_id"), strings.pop(s, "compliance_url"),
+                                              _pop_bool(s, "compliance_verified", S_VERIFIED, S_VERIFIED_TRUE)))
+    elif isinstance(rest.get("sub_agent_compliance"), dict):
+        subs = rest["sub_agent_compliance"] = dict(rest["sub_agent_compliance"])
+        flags |= _pop_bool(subs, "uses_sub_agents", USES_SUBS, USES_SUBS_TRUE)
+
+    jurisdictions_at = _HEADER.size
+    sub_agents_at = jurisdictions_at + _JURISDICTION.size * len(jurisdictions)
+    strings_at = sub_agents_at + _SUB_AGENT.size * len(sub_agents)
+    table = strings.pack()
+    residual_at = strings_at + len(table)
+    residual = canonical_json(rest)
+    header = _HEADER.pack(MAGIC, VERSION, 0, flags, residual_at + len(residual), agent_id, provider,
+                          len(jurisdictions), len(sub_agents), jurisdictions_at, sub_agents_at, strings_at,
+                          residual_at, *hashes)
+    return b"".join([header, *jurisdictions, *sub_agents, table, residual])
+
+
+def decode(data) -> dict:
+    """The manifest a CBMF encoding was made from."""
+    return BinaryManifest(data).to_manifest()
+
+
+def digest(manifest: dict) -> str:
+    """sha256 of encode(manifest), as "sha256:<hex>"."""
+    return "sha256:" + hashlib.sha256(encode(manifest)).hexdigest()
+
+
+# ─────────────────────────────────────────────────────────
+# ZERO-COPY ACCESS
+# ─────────────────────────────────────────────────────────
+
+def _bool(flags: int, present: int, true: int):
+    return bool(flags & true) if flags & present else None
+
+
+class BinaryManifest:
+    """Read-only field access over CBMF bytes, without decoding the rest.
+
+    buf may be bytes, a memoryview or an mmap; offset locates the encoding
+    inside it. A field that did not fit its typed slot (a non-bool
+    compliant, a timestamp in another format) reads as None here and is
+    still present in to_manifest().
+    """
+
+    __slots__ = ("mv", "_flags", "_id", "_provider", "_counts", "_offsets", "_hashes", "_strings")
+
+    def __init__(self, buf, offset: int = 0):
+        (magic, version, _, self._flags, length, self._id, self._provider, n_jurisdictions, n_subs,
+         jurisdictions_at, subs_at, strings_at, residual_at, current, attested) = _HEADER.unpack_from(buf, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} CBMF manifest")
+        self.mv = memoryview(buf)[offset:offset + length]
+        self._counts = (n_jurisdictions, n_subs)
+        self._offsets = (jurisdictions_at, subs_at, strings_at, residual_at)
+        self._hashes = (current, attested)
+        self._strings = None
+
+    def __len__(self) -> int:
+        return len(self.mv)
+
+    def string(self, index: int):
+        if index == NO_STRING:
+            return None
+        base = self._offsets[2]
+        if self._strings is None:
+            self._strings = base + 4 + 4 * (_U32.unpack_from(self.mv, base)[0] + 1)
+        start, end = _U32_PAIR.unpack_from(self.mv, base + 4 + 4 * index)
+        return str(self.mv[self._strings + start:self._strings + end], "utf-8")
+
+    @property
+    def id(self) -> str:
+        return self.string(self._id)
+
+    @property
+    def provider_name(self) -> str:
+        return self.string(self._provider)
+
+    @property
+    def gpai_compliant(self) -> bool:
+        return _bool(self._flags, GPAI, GPAI_TRUE)
+
+    @property
+    def uses_sub_agents(self) -> bool:
+        return _bool(self._flags, USES_SUBS, USES_SUBS_TRUE)
+
+    @property
+    def current_hash(self) -> str:
+        return "sha256:" + self._hashes[0].hex() if self._flags & CURRENT_HASH else None
+
+    @property
+    def hash_at_attestation(self) -> str:
+        return "sha256:" + self._hashes[1].hex() if self._flags & ATTESTED_HASH else None
+
+    # ── jurisdictions ──
+
+    @property
+    def jurisdiction_count(self) -> int:
+        return self._counts[0]
+
+    def _code(self, code: int, flags: int):
+        if not flags & J_CODE:
+            return None
+        return JURISDICTIONS[code] if code >= 0 else self.string(-1 - code)
+
+    def jurisdiction(self, i: int) -> Jurisdiction:
+        code, flags, attested, expires, url = _JURISDICTION.unpack_from(self.mv, self._offsets[0] + i * _JURISDICTION.size)
+        return Jurisdiction(
+            code=self._code(code, flags),
+            compliant=_bool(flags, J_COMPLIANT, J_COMPLIANT_TRUE),
+            third_party_audit=_bool(flags, J_AUDIT, J_AUDIT_TRUE),
+            automated_verification=_bool(flags, J_AUTOMATED, J_AUTOMATED_TRUE),
+            attestation_us=attested if flags & J_ATTESTED else None,
+            expiry_us=expires if flags & J_EXPIRES else None,
+            questionnaire_url=self.string(url),
+        )
+
+    def jurisdictions(self) -> list:
+        return [self.jurisdiction(i) for i in range(self._counts[0])]
+
+    def _jurisdiction_records(self):
+        base = self._offsets[0]
+        return _JURISDICTION.iter_unpack(self.mv[base:base + self._counts[0] * _JURISDICTION.size])
+
+    def jurisdiction_codes(self) -> list:
+        return [self._code(code, flags) for code, flags, *_ in self._jurisdiction_records()]
+
+    def declares(self, code: str) -> bool:
+        return code in self.jurisdiction_codes()
+
+    def _timestamps(self, slot: int, present: int) -> list:
+        return [r[slot] for r in self._jurisdiction_records() if r[1] & present]
+
+    @property
+    def oldest_attestation_us(self) -> int:
+        """Earliest attestation_date, or None if no jurisdiction has one."""
+        return min(self._timestamps(2, J_ATTESTED), default=None)
+
+    @property
+    def earliest_expiry_us(self) -> int:
+        return min(self._timestamps(3, J_EXPIRES), default=None)
+
+    # ── sub-agents ──
+
+    @property
+    def sub_agent_count(self) -> int:
+        return self._counts[1]
+
+    def sub_agent(self, i: int) -> SubAgent:
+        agent_id, url, flags = _SUB_AGENT.unpack_from(self.mv, self._offsets[1] + i * _SUB_AGENT.size)
+        return SubAgent(self.string(agent_id), self.string(url), _bool(flags, S_VERIFIED, S_VERIFIED_TRUE))
+
+    def sub_agents(self) -> list:
+        return [self.sub_agent(i) for i in range(self._counts[1])]
+
+    # ── whole document ──
+
+    def digest(self) -> str:
+        return "sha256:" + hashlib.sha256(self.mv).hexdigest()
+
+    def to_manifest(self) -> dict:
+        """The full manifest, with every typed field merged back into the residual."""
+        doc = json.loads(str(self.mv[self._offsets[3]:], "utf-8"))
+        flags = self._flags
+        if self._id != NO_STRING:
+            doc["id"] = self.id
+        if self._provider != NO_STRING or flags & GPAI:
+            model = doc["model_provider_compliance"]
+            if self._provider != NO_STRING:
+                model["provider_name"] = self.provider_name
+            if flags & GPAI:
+                model["gpai_compliant"] = self.gpai_compliant
+        if flags & (CURRENT_HASH | ATTESTED_HASH):
+            codebase = doc["codebase_verification"]
+            if flags & CURRENT_HASH:
+                codebase["current_hash"] = self.current_hash
+            if flags & ATTESTED_HASH:
+                codebase["hash_at_attestation"] = self.hash_at_attestation
+        if flags & USES_SUBS:
+            doc["sub_agent_compliance"]["uses_sub_agents"] = self.uses_sub_agents
+
+        if flags & HAS_JURISDICTIONS:
+            base, size = self._offsets[0], _JURISDICTION.size
+            for i, j in enumerate(doc["compliance_attestations"]["jurisdictions"]):
+                code, jflags, attested, expires, url = _JURISDICTION.unpack_from(self.mv, base + i * size)
+                if jflags & J_CODE:
+                    j["jurisdiction"] = self._code(code, jflags)
+                if jflags & J_COMPLIANT:
+                    j["compliant"] = bool(jflags & J_COMPLIANT_TRUE)
+                if jflags & J_AUDIT:
+                    j["third_party_audit"] = bool(jflags & J_AUDIT_TRUE)
+                if jflags & J_AUTOMATED:
+                    j["automated_verification"] = bool(jflags & J_AUTOMATED_TRUE)
+                if jflags & J_ATTESTED:
+                    j["attestation_date"] = format_timestamp(attested, bool(jflags & J_ATTESTED_ISO))
+                if jflags & J_EXPIRES:
+                    j["expiry_date"] = format_timestamp(expires, bool(jflags & J_EXPIRES_ISO))
+                if url != NO_STRING:
+                    j["questionnaire_url"] = self.string(url)
+
+        if flags & HAS_SUB_AGENTS:
+            base, size = self._offsets[1], _SUB_AGENT.size
+            for i, s in enumerate(doc["sub_agent_compliance"]["declared_sub_agents"]):
+                agent_id, url, sflags = _SUB_AGENT.unpack_from(self.mv, base + i * size)
+                if agent_id != NO_STRING:
+                    s["agent_id"] = self.string(agent_id)
+                if url != NO_STRING:
+                    s["compliance_url"] = self.string(url)
+                if sflags & S_VERIFIED:
+                    s["compliance_verified"] = bool(sflags & S_VERIFIED_TRUE)
+        return doc
+
+
+def main(argv=None):
+    paths = argv if argv is not None else sys.argv[1:]
+    if not paths:
+        sys.exit("usage: python manifest_binary.py manifest.json [...]")
+    for path in paths:
+        with open(path) as f:
+            manifest = json.load(f)
+        data = encode(manifest)
+        view = BinaryManifest(data)
+        exact = view.to_manifest() == manifest
+        print(f"{path}: {len(canonical_json(manifest)):,} B JSON -> {len(data):,} B CBMF, "
+              f"{view.digest()}, round-trip {'exact' if exact else 'MISMATCH'}")
+        print(f"  id={view.id} provider={view.provider_name} jurisdictions={view.jurisdiction_codes()} "
+              f"sub_agents={view.sub_agent_count}")
+
+
+if __name__ == "__main__":
+    main()
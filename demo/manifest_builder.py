@@ -0,0 +1,433 @@
+"""
+Manifest Builder
+
+Turns questionnaire answers (the /questionnaire/generate form, or stored
+responses) into a CBAAC manifest. The routing table is derived from the
+questionnaires themselves: every question id is routed to the
+questionnaire(s) that declare it, and security certification answers to
+their manifest fields, so a submission is mapped in one pass over its
+fields.
+
+Run with: python manifest_builder.py responses.jsonl [-o manifests.jsonl]
+Bulk mode: python manifest_builder.py batch responses.jsonl --key signer.pem --signer <did> (validated,
+parallel, signed; see --help)
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+QUESTIONNAIRE_DIR = Path(__file__).parent.parent / "questionnaires"
+QUESTIONNAIRE_URL = "https://raw.githubusercontent.com/mattpagett/CBAAC/main/questionnaires/{}.json"
+
+
+class Jurisdiction(NamedTuple):
+    code: str             # the manifest's "jurisdiction" value
+    regulations: tuple
+    questionnaire: str    # questionnaire file stem
+
+
+# Jurisdiction checkbox value -> what its questionnaire attests
+JURISDICTIONS = {
+    "eu": Jurisdiction("EU", ("GDPR", "EU AI Act"), "eu-gdpr-aiact"),
+    "japan": Jurisdiction("Japan", ("APPI", "METI AI Guidelines"), "japan-appi-meti"),
+    "korea": Jurisdiction("Korea", ("AI Basic Act", "PIPA"), "korea-ai-basic-act"),
+}
+CULTURAL_QUESTIONNAIRE = "cultural-ethical"
+
+# jurisdictions_selected value -> questionnaire whose required questions it needs answered
+DOMAINS = {
+    **{key: j.questionnaire for key, j in JURISDICTIONS.items()},
+    "cultural": CULTURAL_QUESTIONNAIRE,
+    "security": "security-certifications",
+}
+
+# Security question id -> (security_certifications key, field). A certification is
+# present when its first question (the yes/no gate) was answered.
+SECURITY_FIELDS = {
+    "sec_iso_01": ("iso_42001", "certified"),
+    "sec_iso_02": ("iso_42001", "certification_body"),
+    "sec_iso_03": ("iso_42001", "certificate_url"),
+    "sec_iso_04": ("iso_42001", "valid_until"),
+    "sec_nist_01": ("nist_ai_rmf", "aligned"),
+    "sec_nist_02": ("nist_ai_rmf", "ai_600_1_assessed"),
+    "sec_nist_03": ("nist_ai_rmf", "functions_implemented"),
+    "sec_nist_04": ("nist_ai_rmf", "report_url"),
+    "sec_mlc_01": ("mlcommons_ailuminate", "tested"),
+    "sec_mlc_02": ("mlcommons_ailuminate", "safety_grade"),
+    "sec_mlc_03": ("mlcommons_ailuminate", "jailbreak_tested"),
+    "sec_mlc_04": ("mlcommons_ailuminate", "test_date"),
+    "sec_mlc_05": ("mlcommons_ailuminate", "report_url"),
+    "sec_owasp_01": ("owasp_llm_top10", "tested"),
+    "sec_owasp_02": ("owasp_llm_top10", "vulnerabilities_tested"),
+    "sec_owasp_03": ("owasp_llm_top10", "vulnerabilities_found"),
+    "sec_owasp_04": ("owasp_llm_top10", "report_url"),
+    "sec_sgv_01": ("singapore_ai_verify", "tested"),
+    "sec_sgv_02": ("singapore_ai_verify", "principles_tested"),
+    "sec_sgv_03": ("singapore_ai_verify", "report_url"),
+    "sec_red_01": ("red_team_testing", "tested"),
+    "sec_red_02": ("red_team_testing", "tester_type"),
+    "sec_red_03": ("red_team_testing", "tester_name"),
+    "sec_red_04": ("red_team_testing", "prompt_injection_resistant"),
+    "sec_red_05": ("red_team_testing", "jailbreak_resistant"),
+    "sec_red_06": ("red_team_testing", "test_date"),
+}
+
+# Submission fields that are not questionnaire answers; build() reads each as text
+FORM_FIELDS = ("jurisdictions_selected", "cert_type", "agent_id", "agent_name", "agent_description",
+               "agent_version", "provider_name", "provider_url", "model_provider", "model_name",
+               "gpai_compliant", "codebase_hash", "auditor_org", "auditor_did", "auditor_accreditation",
+               "auditor_email", "auditor_signature", "auditor_pubkey_url")
+
+MULTI_TYPES = frozenset({"multi_select"})
+URL_RE = re.compile(r"https?://\S+\Z")
+EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+\Z")
+CONDITION_RE = re.compile(r"\s*(\w+)\s*==\s*(.+?)\s*\Z")
+
+
+class Route(NamedTuple):
+    owners: tuple         # questionnaire stems that declare the question
+    type: str
+    options: frozenset    # allowed select values, or None
+    required: bool
+    depends_on: tuple     # (question id, expected answer), or None
+    max: float            # upper bound for number answers, or None
+
+
+class BuiltManifest(NamedTuple):
+    manifest: dict
+    responses: int        # questionnaire answers routed into it
+
+
+def _whole_number(value) -> int:
+    """A number answer as an int; raises ValueError for fractions, booleans and non-numbers."""
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"not a whole number: {value!r}")
+    return int(value)
+
+
+def _coerce(q_type: str, value):
+    """A security answer as its manifest field expects it; None means unanswered."""
+    if q_type == "boolean":
+        return value == "yes" if value is not None else False
+    if q_type == "number":
+        return _whole_number(value or 0)
+    if q_type in MULTI_TYPES:
+        return value if value is not None else []
+    return value if value is not None else ""
+
+
+def _is_yes(value) -> bool:
+    return value is True or value == "yes"
+
+
+def _depends_on(q: dict) -> tuple:
+    """(question id, expected answer) from depends_on, condition or conditional, or None."""
+    if isinstance(q.get("depends_on"), dict) and q["depends_on"]:
+        return next(iter(q["depends_on"].items()))
+    condition = q.get("condition") or q.get("conditional")
+    match = CONDITION_RE.match(condition) if isinstance(condition, str) else None
+    if match is None:
+        return None
+    q_id, expected = match.groups()
+    if expected in ("true", "false"):
+        return q_id, expected == "true"
+    return q_id, expected.strip("'\"")
+
+
+def _type_error(route: Route, value, whole: bool = False):
+    """Why value is not a valid answer for the question, or None.
+
+    whole: a number answer must be a whole number, as _coerce() makes it.
+    """
+    t = route.type
+    if t == "boolean":
+        return None if isinstance(value, bool) or value in ("yes", "no") else "expected yes/no"
+    if t in ("select", "single_select"):
+        if not isinstance(value, str):
+            return "expected one option"
+        return None if route.options is None or value in route.options else f"{value!r} is not an option"
+    if t in MULTI_TYPES:
+        if not all(isinstance(v, str) for v in value):
+            return "expected a list of options"
+        unknown = [v for v in value if route.options is not None and v not in route.options]
+        return f"{unknown[0]!r} is not an option" if unknown else None
+    if t == "url":
+        return None if isinstance(value, str) and URL_RE.match(value) else "expected an http(s) URL"
+    if t == "email":
+        return None if isinstance(value, str) and EMAIL_RE.match(value) else "expected an email address"
+    if t == "number":
+        try:
+            number = _whole_number(value) if whole else float(value)
+        except (OverflowError, TypeError, ValueError):
+            return "expected a whole number" if whole else "expected a number"
+        return f"exceeds maximum {route.max:g}" if route.max is not None and number > route.max else None
+    if t == "date":
+        try:
+            date.fromisoformat(value[:10])
+        except (TypeError, ValueError):
+            return "expected an ISO date"
+        return None
+    if t == "text_array":
+        return None if isinstance(value, list) and all(isinstance(v, str) for v in value) else "expected a list of strings"
+    if t in ("array", "object_array"):
+        return None if isinstance(value, list) and all(isinstance(v, dict) for v in value) else "expected a list of objects"
+    return None if isinstance(value, str) else "expected text"
+
+
+def _did(url: str) -> str:
+    return f"did:web:{url.replace('https://', '').replace('http://', '')}"
+
+
+def load_questionnaires(questionnaire_dir=QUESTIONNAIRE_DIR) -> dict:
+    """{file stem: questionnaire} for every questionnaire JSON in a directory."""
+    questionnaires = {}
+    for path in sorted(Path(questionnaire_dir).glob("*.json")):
+        with open(path) as f:
+            questionnaires[path.stem] = json.load(f)
+    return questionnaires
+
+
+class ManifestBuilder:
+    """Routes questionnaire fields to manifest paths with a table compiled from the questionnaires."""
+
+    def __init__(self, questionnaires: dict):
+        self.questionnaires = questionnaires
+        owners, questions = {}, {}
+        self.required = {}    # questionnaire stem -> ids of its required questions
+        for stem, questionnaire in questionnaires.items():
+            for section in (questionnaire.get("sections") or {}).values():
+                for q in section.get("questions", ()):
+                    owners.setdefault(q["id"], []).append(stem)
+                    questions.setdefault(q["id"], q)
+                    if q.get("required"):
+                        self.required.setdefault(stem, []).append(q["id"])
+        self.routes = {}
+        for q_id, stems in owners.items():
+            q = questions[q_id]
+            options = q.get("options")
+            self.routes[q_id] = Route(
+                tuple(stems), q.get("type", "boolean"),
+                frozenset(o for o in options if isinstance(o, str)) if options else None,
+                bool(q.get("required")), _depends_on(q), q.get("max"))
+        # certification -> [(field, question id, type)] in manifest field order
+        self.certifications = {}
+        for q_id, (certification, field) in SECURITY_FIELDS.items():
+            route = self.routes.get(q_id)
+            self.certifications.setdefault(certification, []).append(
+                (field, q_id, route.type if route else "text"))
+        # Number answers build() stores as ints
+        self.whole_numbers = frozenset(q_id for fields in self.certifications.values()
+                                       for _, q_id, q_type in fields if q_type == "number")
+
+    @classmethod
+    def load(cls, questionnaire_dir=QUESTIONNAIRE_DIR) -> "ManifestBuilder":
+        return cls(load_questionnaires(questionnaire_dir))
+
+    def answers(self, fields) -> tuple:
+        """One pass over the fields: ({question id: answer}, {other field: value}).
+
+        fields is a mapping (multi_select answers as lists) or anything with
+        multi_items(), like a submitted form, where a multi_select repeats.
+        """
+        answers, other = {}, {}
+        items = fields.multi_items() if hasattr(fields, "multi_items") else fields.items()
+        for name, value in items:
+            route = self.routes.get(name)
+            if route is None:
+                other[name] = value
+            elif route.type in MULTI_TYPES:
+                values = answers.setdefault(name, [])
+                values.extend(value) if isinstance(value, list) else values.append(value)
+            elif isinstance(value, bool) and route.type == "boolean":
+                answers[name] = "yes" if value else "no"    # JSON booleans as the form sends them
+            else:
+                answers[name] = value
+        return answers, other
+
+    def validate(self, fields) -> list:
+        """Every problem with a submission's answers, as "question id: message" strings.
+
+        Answers are checked against their question's type, options and
+        maximum; each selected domain's required questions must be answered
+        unless they depend on an answer that was not given. An unanswered
+        boolean is a "no", as an unticked checkbox is. The other fields
+        build() reads must be text. A submission validate() accepts builds.
+        """
+        answers, other = self.answers(fields)
+        errors = [f"{name}: expected text" for name in FORM_FIELDS
+                  if name in other and not isinstance(other[name], str)]
+        domains = other.get("jurisdictions_selected", "")
+        selected = [d for d in domains.split(",") if d] if isinstance(domains, str) else []
+        if not selected and isinstance(domains, str):
+            errors.append("jurisdictions_selected: no domain selected")
+        for domain in selected:
+            if domain not in DOMAINS:
+                errors.append(f"jurisdictions_selected: unknown domain {domain!r}")
+            elif DOMAINS[domain] not in self.questionnaires:
+                errors.append(f"jurisdictions_selected: no questionnaire for {domain!r}")
+        for q_id, value in answers.items():
+            error = _type_error(self.routes[q_id], value, q_id in self.whole_numbers)
+            if error:
+                errors.append(f"{q_id}: {error}")
+        for domain in selected:
+            for q_id in self.required.get(DOMAINS.get(domain), ()):
+                route = self.routes[q_id]
+                if route.type == "boolean" or answers.get(q_id) not in (None, "", []):
+                    continue
+                if route.depends_on is not None:
+                    dep_id, expected = route.depends_on
+                    given = answers.get(dep_id)
+                    if not (_is_yes(given) == expected if isinstance(expected, bool) else
+                            given == expected or isinstance(given, list) and expected in given):
+                        continue
+                errors.append(f"{q_id}: required")
+        return errors
+
+    def build(self, fields, now: datetime = None) -> BuiltManifest:
+        """The manifest for one submission, as /questionnaire/generate returns it."""
+        answers, other = self.answers(fields)
+        now = (now or datetime.now(timezone.utc)).isoformat()
+        cert_type = other.get("cert_type", "self_certified")
+        selected = set(other.get("jurisdictions_selected", "").split(","))
+        is_third_party = cert_type == "third_party"
+        is_sign_to_code = cert_type == "sign_to_code"
+
+        responses = {}     # questionnaire stem -> {question id: answer}, in submission order
+        for q_id, value in answers.items():
+            for stem in self.routes[q_id].owners:
+                responses.setdefault(stem, {})[q_id] = value
+
+        jurisdictions = []
+        for key, j in JURISDICTIONS.items():
+            if key in selected:
+                jurisdictions.append({
+                    "jurisdiction": j.code,
+                    "compliant": True,
+                    "regulations": list(j.regulations),
+                    "questionnaire_url": QUESTIONNAIRE_URL.format(j.questionnaire),
+                    "third_party_audit": is_third_party,
+                    "automated_verification": cert_type == "auto_verified",
+                    "self_certified": cert_type == "self_certified",
+                    "sign_to_code": is_sign_to_code,
+                    "certification_date": now,
+                    "responses": responses.get(j.questionnaire, {}),
+                })
+
+        cultural_benchmarks = None
+        if "cultural" in selected:
+            cultural_responses = responses.get(CULTURAL_QUESTIONNAIRE, {})
+            cultural_benchmarks = {
+                "tested_cultures": answers.get("cult_02", []),
+                "certified": len(cultural_responses) > 0,
+                "certification_type": cert_type,
+                "responses": cultural_responses,
+            }
+
+        security = None
+        if "security" in selected:
+            security = {}
+            for certification, fields_ in self.certifications.items():
+                gate = fields_[0][1]
+                security[certification] = {
+                    field: _coerce(q_type, answers.get(q_id)) for field, q_id, q_type in fields_
+                } if answers.get(gate) else None
+
+        provider_url = other.get("provider_url", "yourcompany.com")
+        manifest = {
+            "@context": [
+                "https://spec.projectnanda.org/agentfacts/v1",
+                "../schema/compliance-extension.json"
+            ],
+
+            "// STANDARD NANDA AGENTFACTS FIELDS": "===",
+            "id": f"nanda:{other.get('agent_id', 'your-agent-001')}",
+            "agent_name": f"urn:agent:{other.get('provider_name', 'yourcompany').lower().replace(' ', '')}:"
+                          f"{other.get('agent_name', 'YourAgent')}",
+            "label": other.get("agent_name", "Your Agent"),
+            "description": other.get("agent_description", "AI agent description"),
+            "version": other.get("agent_version", "1.0.0"),
+
+            "provider": {
+                "name": other.get("provider_name", "Your Company"),
+                "url": other.get("provider_url", "https://yourcompany.com"),
+                "did": _did(provider_url),
+            },
+
+            "// CBAAC COMPLIANCE EXTENSION": "===",
+            "certification_type": cert_type,
+            "compliance_attestations": {
+                "jurisdictions": jurisdictions,
+                "cultural_benchmarks": cultural_benchmarks
+            },
+
+            "security_certifications": security,
+
+            "third_party_audit": {
+                "auditor_org": other.get("auditor_org", ""),
+                "auditor_did": other.get("auditor_did", ""),
+                "auditor_accreditation": other.get("auditor_accreditation", ""),
+                "auditor_email": other.get("auditor_email", ""),
+                "audit_date": now,
+                "signature": other.get("auditor_signature", ""),
+                "public_key_url": other.get("auditor_pubkey_url", ""),
+                "verification_status": "signed" if other.get("auditor_signature") else "pending"
+            } if is_third_party else None,
+
+            "model_provider_compliance": {
+                "provider_name": other.get("model_provider", ""),
+                "model_name": other.get("model_name", ""),
+                "gpai_compliant": other.get("gpai_compliant") == "on"
+            },
+
+            "codebase_verification": {
+                "hash": other.get("codebase_hash", "sha256:..."),
+                "hash_algorithm": "sha256",
+                "signed_by": _did(provider_url),
+                "signed_at": now,
+                "sign_to_code_enabled": is_sign_to_code
+            } if is_sign_to_code or other.get("codebase_hash") else None
+        }
+        manifest = {k: v for k, v in manifest.items() if v is not None}
+        return BuiltManifest(manifest, len(answers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build manifests from stored questionnaire responses (JSONL).")
+    parser.add_argument("input", help="JSONL file, one submission's fields per line")
+    parser.add_argument("--output", "-o", help="manifest JSONL (default: stdout)")
+    parser.add_argument("--questionnaires", default=QUESTIONNAIRE_DIR, help="questionnaire directory")
+    args = parser.parse_args(argv)
+
+    builder = ManifestBuilder.load(args.questionnaires)
+    out = open(args.output, "w") if args.output else sys.stdout
+    count, start = 0, time.perf_counter()
+    try:
+        with open(args.input) as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    fields = json.loads(line)
+                except ValueError as e:
+                    sys.exit(f"{args.input}:{lineno}: {e}")
+                out.write(json.dumps(builder.build(fields).manifest, separators=(",", ":")) + "\n")
+                count += 1
+    finally:
+        if args.output:
+            out.close()
+    seconds = time.perf_counter() - start
+    print(f"Built {count:,} manifests in {seconds:.2f}s ({count / (seconds or 1e-9):,.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["batch"]:
+        import batch_generate
+        batch_generate.main(sys.argv[2:])
+    else:
+        main()
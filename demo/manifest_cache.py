@@ -0,0 +1,161 @@
+"""
+Manifest Fetch Cache
+
+An LRU cache of compliance manifests that sits in front of any fetcher from
+chain_verifier, so hot partner agents are served from memory instead of a
+network round-trip to /.well-known/compliance.json.
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from chain_verifier import FetchResponse
+from policy_engine import parse_date
+
+DEFAULT_TTL = 300        # seconds; used when a manifest carries no dates
+MIN_TTL = 30
+MAX_TTL = 24 * 3600
+HEURISTIC_FRACTION = 0.1  # RFC 9111 §4.2.2: 10% of the time since last change
+
+MAX_AGE_RE = re.compile(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*\"?(\d+)", re.I)
+
+
+class CacheEntry(NamedTuple):
+    manifest: dict
+    size: int
+    etag: str
+    expires: float  # time.monotonic() deadline
+
+
+def last_changed(manifest: dict):
+    """Newest attestation_date / last_verified in a manifest, or None."""
+    dates = [j.get("attestation_date")
+             for j in (manifest.get("compliance_attestations") or {}).get("jurisdictions") or ()]
+    dates += [s.get("last_verified")
+              for s in (manifest.get("sub_agent_compliance") or {}).get("declared_sub_agents") or ()]
+    parsed = []
+    for d in dates:
+        try:
+            parsed.append(parse_date(d))
+        except (TypeError, ValueError):
+            continue
+    return max(parsed, default=None)
+
+
+def freshness_lifetime(manifest: dict, cache_control: str = "", default_ttl: float = DEFAULT_TTL) -> float:
+    """Seconds a manifest may be served from cache without revalidation.
+
+    An explicit Cache-Control max-age wins (no-cache means 0). Otherwise the
+    lifetime is 10% of the time since the manifest last changed, judged by
+    its newest attestation_date / last_verified, clamped to [MIN_TTL, MAX_TTL]:
+    recently re-attested agents are revalidated often, stable ones rarely.
+    """
+    directives = cache_control.lower()
+    if "no-cache" in directives:
+        return 0
+    match = MAX_AGE_RE.search(directives)
+    if match:
+        return int(match.group(1))
+    changed = last_changed(manifest) if manifest else None
+    if changed is None:
+        return default_ttl
+    age = (datetime.now(timezone.utc) - changed).total_seconds()
+    return min(MAX_TTL, max(MIN_TTL, age * HEURISTIC_FRACTION))
+
+
+class ManifestCache:
+    """Caching fetcher: LRU by entry count and bytes, with ETag revalidation.
+
+    Wraps another fetcher. If the inner fetcher has fetch_response() (as
+    HTTPFetcher does), Cache-Control and ETag headers are honoured and stale
+    entries are revalidated with If-None-Match; otherwise entries are timed
+    by freshness_lifetime() alone. Concurrent fetches of one URL share a
+    single upstream request.
+    """
+
+    def __init__(self, fetcher, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: float = DEFAULT_TTL, clock=time.monotonic):
+        self.fetcher = fetcher
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.inflight = {}
+        self.hits = self.misses = self.revalidated = self.evictions = 0
+
+    async def fetch(self, url: str, agent_id: str = None):
+        entry = self.entries.get(url)
+        if entry is not None and entry.expires > self.clock():
+            self.entries.move_to_end(url)
+            self.hits += 1
+            return entry.manifest
+
+        task = self.inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(url, agent_id, entry))
+            self.inflight[url] = task
+            task.add_done_callback(lambda _: self.inflight.pop(url, None))
+        # shield: one cancelled caller must not cancel the fetch others await
+        return await asyncio.shield(task)
+
+    async def _refresh(self, url, agent_id, entry):
+        response = await self._fetch_upstream(url, agent_id, entry)
+        if response.not_modified and entry is not None:
+            self.revalidated += 1
+            self._store(url, entry.manifest, entry.size, response.etag or entry.etag, response.cache_control)
+            return entry.manifest
+        self.misses += 1
+        if response.manifest is not None and "no-store" not in response.cache_control.lower():
+            self._store(url, response.manifest, response.size, response.etag, response.cache_control)
+        else:
+            self.invalidate(url)
+        return response.manifest
+
+    async def _fetch_upstream(self, url, agent_id, entry) -> FetchResponse:
+        if hasattr(self.fetcher, "fetch_response"):
+            return await self.fetcher.fetch_response(url, entry.etag if entry else None)
+        manifest = await self.fetcher.fetch(url, agent_id)
+        size = len(json.dumps(manifest, separators=(",", ":"))) if manifest is not None else 0
+        return FetchResponse(manifest, size)
+
+    def _store(self, url, manifest, size, etag, cache_control):
+        ttl = freshness_lifetime(manifest, cache_control, self.default_ttl)
+        if size > self.max_bytes:
+            self.invalidate(url)
+            return
+        old = self.entries.pop(url, None)
+        if old is not None:
+            self.bytes -= old.size
+        self.entries[url] = CacheEntry(manifest, size, etag, self.clock() + ttl)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, url: str):
+        """Drop one URL from the cache."""
+        entry = self.entries.pop(url, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+        }
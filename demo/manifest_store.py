@@ -0,0 +1,390 @@
+"""
+Memory-Mapped Manifest Store
+
+An append-only log of binary manifests (manifest_binary) for registries far
+larger than a directory of JSON files. Each record is
+
+    magic "CBMR", payload length, version, attestation tier, flags, crc32
+    followed by the CBMF bytes (or, for a deletion, the agent id)
+
+and the file is read through mmap, so get_view() hands out a BinaryManifest
+over the mapped bytes without copying or parsing them.
+
+Writing a new version appends a complete record before the indexes point at
+it; a record torn by a crash fails its checksum and is cut off when the store
+is next opened, leaving the previous version in place. A bad record with
+valid records after it is corruption, not a torn append: opening raises
+CorruptLog and leaves the file untouched. replace() makes the swap
+conditional on the version the caller read.
+
+Indexes, rebuilt from the log on open straight from the mapped records:
+  id -> (offset, version)
+  declared jurisdiction code -> ids
+  provider_name -> ids
+  attestation tier -> ids
+  earliest expiry_date, oldest attestation_date -> ids, in time order
+
+so "every agent missing EU" or "every self-certified Anthropic-backed agent"
+is answered from set operations on the indexes, never by reading manifests.
+
+Run with: python manifest_store.py store.cbms import mock_agents/*.json
+          python manifest_store.py store.cbms query --missing EU --provider Anthropic --tier orange
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from bisect import bisect_left, insort
+from collections import defaultdict
+from pathlib import Path
+
+import manifest_binary
+from policy_engine import get_attestation_level
+
+MAGIC = b"CBMR"
+TIERS = ("green", "yellow", "orange", "red")
+_TIER_CODES = {tier: i for i, tier in enumerate(TIERS)}
+_RECORD = struct.Struct("<4sIIBBxxI")  # magic, payload length, version, tier, flags, crc32 of payload
+DELETED = 1
+
+
+class VersionConflict(Exception):
+    """replace() found a different current version than the caller expected."""
+
+
+class CorruptLog(ValueError):
+    """A record in the middle of the log fails its checks; the file is left as it was."""
+
+
+class _TimeIndex:
+    """(µs, id) pairs in time order; ids with no timestamp are left out.
+
+    The ordered list is built on the first query, so loading a large log
+    sorts once instead of inserting one entry at a time.
+    """
+
+    def __init__(self):
+        self.keys = {}       # id -> µs
+        self.entries = None  # sorted (µs, id), once queried
+
+    def set(self, agent_id: str, us):
+        self.discard(agent_id)
+        if us is not None:
+            self.keys[agent_id] = us
+            if self.entries is not None:
+                insort(self.entries, (us, agent_id))
+
+    def discard(self, agent_id: str):
+        us = self.keys.pop(agent_id, None)
+        if us is not None and self.entries is not None:
+            del self.entries[bisect_left(self.entries, (us, agent_id))]
+
+    def before(self, us: int) -> set:
+        if self.entries is None:
+            self.entries = sorted((t, agent_id) for agent_id, t in self.keys.items())
+        return {agent_id for _, agent_id in self.entries[:bisect_left(self.entries, (us, ""))]}
+
+
+class ManifestStore:
+    """Append-only, memory-mapped manifests keyed by id, with secondary indexes.
+
+    Query methods return new sets of agent ids. Readers may hold a
+    BinaryManifest from get_view() across later writes: records are never
+    rewritten in place, only superseded (until compact()).
+    """
+
+    def __init__(self, path, durable: bool = False):
+        self.path = Path(path)
+        self.durable = durable  # fsync after every append
+        self._lock = threading.RLock()
+        self._open()
+
+    # ─────────────────────────────────────────────────────
+    # LOG
+    # ─────────────────────────────────────────────────────
+
+    def _open(self):
+        self.path.touch(exist_ok=True)
+        self._file = open(self.path, "r+b")
+        self._map = None
+        self._remap()
+        self.offsets = {}  # id -> (record offset, version)
+        self._keys = {}    # id -> (jurisdiction codes, provider_name, tier), for unindexing
+        self.by_jurisdiction = defaultdict(set)
+        self.by_provider = defaultdict(set)
+        self.by_tier = defaultdict(set)
+        self.expiry = _TimeIndex()
+        self.attested = _TimeIndex()
+        self.appended = 0
+
+        end = self._replay()
+        if end < self._file.seek(0, os.SEEK_END):
+            following = self._next_record(end)
+            if following is not None:
+                self._file.close()
+                raise CorruptLog(f"{self.path}: bad record at byte {end}, valid records follow from byte {following}")
+            self._file.truncate(end)  # torn tail from an interrupted append
+            self._remap()
+        self._file.seek(end)
+
+    def _remap(self):
+        size = os.fstat(self._file.fileno()).st_size
+        # A superseded map stays alive for any views still pointing into it
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+    def _mapped(self, offset: int):
+        """The current map, remapped first if offset lies beyond it (appends are mapped lazily)."""
+        if offset >= len(self._map):
+            with self._lock:
+                if offset >= len(self._map):
+                    self._remap()
+        return self._map
+
+    def _record(self, offset: int):
+        """(length, version, tier, flags, payload offset) of the record at offset, or None if incomplete."""
+        if offset + _RECORD.size > len(self._map):
+            return None
+        magic, length, version, tier, flags, crc = _RECORD.unpack_from(self._map, offset)
+        start = offset + _RECORD.size
+        if magic != MAGIC or start + length > len(self._map):
+            return None
+        if zlib.crc32(memoryview(self._map)[start:start + length]) != crc:
+            return None
+        return length, version, tier, flags, start
+
+    def _next_record(self, offset: int):
+        """Offset of the first intact record after offset, or None if none follows."""
+        while (offset := self._map.find(MAGIC, offset + 1)) != -1:
+            if self._record(offset) is not None:
+                return offset
+        return None
+
+    def _replay(self) -> int:
+        offset = 0
+        while (record := self._record(offset)) is not None:
+            length, version, tier, flags, start = record
+            if flags & DELETED:
+                self._unindex(str(self._map[start:start + length], "utf-8"))
+            else:
+                self._index(manifest_binary.BinaryManifest(self._map, start), offset, version, tier)
+            offset = start + length
+        return offset
+
+    def _append(self, payload: bytes, version: int, tier: int, flags: int) -> int:
+        offset = self._file.tell()
+        self._file.write(_RECORD.pack(MAGIC, len(payload), version, tier, flags, zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+        self.appended += 1
+        return offset
+
+    # ─────────────────────────────────────────────────────
+    # INDEXES
+    # ─────────────────────────────────────────────────────
+
+    def _index(self, view, offset: int, version: int, tier: int):
+        agent_id = view.id
+        self._unindex(agent_id)
+        codes, provider = frozenset(view.jurisdiction_codes()), view.provider_name
+        self.offsets[agent_id] = (offset, version)
+        self._keys[agent_id] = (codes, provider, TIERS[tier])
+        for code in codes:
+            self.by_jurisdiction[code].add(agent_id)
+        self.by_provider[provider].add(agent_id)
+        self.by_tier[TIERS[tier]].add(agent_id)
+        self.expiry.set(agent_id, view.earliest_expiry_us)
+        self.attested.set(agent_id, view.oldest_attestation_us)
+
+    def _unindex(self, agent_id: str):
+        if self.offsets.pop(agent_id, None) is None:
+            return
+        codes, provider, tier = self._keys.pop(agent_id)
+        for index, key in [(self.by_jurisdiction, code) for code in codes] + [(self.by_provider, provider),
+                                                                             (self.by_tier, tier)]:
+            index[key].discard(agent_id)
+            if not index[key]:
+                del index[key]
+        self.expiry.discard(agent_id)
+        self.attested.discard(agent_id)
+
+    # ─────────────────────────────────────────────────────
+    # WRITES
+    # ─────────────────────────────────────────────────────
+
+    def put(self, manifest: dict, audit_verified: bool = False) -> int:
+        """Store a new version of the manifest's agent; returns its version number."""
+        return self._write(manifest, None, audit_verified)
+
+    def replace(self, manifest: dict, expected_version: int, audit_verified: bool = False) -> int:
+        """put(), but only if the agent's current version is still expected_version (0: not stored yet)."""
+        return self._write(manifest, expected_version, audit_verified)
+
+    def _write(self, manifest, expected_version, audit_verified) -> int:
+        agent_id = manifest.get("id")
+        if not isinstance(agent_id, str) or not agent_id:
+            raise ValueError("manifest has no id")
+        payload = manifest_binary.encode(manifest)
+        tier = _TIER_CODES[get_attestation_level(manifest, audit_verified)[0]]
+        with self._lock:
+            current = self.version(agent_id)
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(f"{agent_id}: expected version {expected_version}, found {current}")
+            offset = self._append(payload, current + 1, tier, 0)
+            self._index(manifest_binary.BinaryManifest(payload), offset, current + 1, tier)
+            return current + 1
+
+    def delete(self, agent_id: str) -> bool:
+        with self._lock:
+            if agent_id not in self.offsets:
+                return False
+            self._append(agent_id.encode(), self.version(agent_id) + 1, _TIER_CODES["red"], DELETED)
+            self._unindex(agent_id)
+            return True
+
+    def compact(self):
+        """Rewrite the log with only each agent's current record, then swap it in atomically."""
+        self._mapped(self._file.tell() - 1)
+        with self._lock:
+            tmp = Path(f"{self.path}.tmp")
+            with open(tmp, "wb") as out:
+                for offset, _ in sorted(self.offsets.values()):
+                    length = _RECORD.unpack_from(self._map, offset)[1]
+                    out.write(self._map[offset:offset + _RECORD.size + length])
+                out.flush()
+                os.fsync(out.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._open()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ─────────────────────────────────────────────────────
+    # READS
+    # ─────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self.offsets
+
+    def ids(self) -> set:
+        return set(self.offsets)
+
+    def version(self, agent_id: str) -> int:
+        """Current version number, 0 if the agent is not stored."""
+        entry = self.offsets.get(agent_id)
+        return entry[1] if entry else 0
+
+    def get_view(self, agent_id: str) -> manifest_binary.BinaryManifest:
+        """Zero-copy view of the agent's current manifest; KeyError if not stored."""
+        offset, _ = self.offsets[agent_id]
+        return manifest_binary.BinaryManifest(self._mapped(offset), offset + _RECORD.size)
+
+    def get(self, agent_id: str) -> dict:
+        return self.get_view(agent_id).to_manifest()
+
+    def tier(self, agent_id: str) -> str:
+        return self._keys[agent_id][2]
+
+    def declaring(self, code: str) -> set:
+        return self.query(declares=(code,))
+
+    def missing(self, code: str) -> set:
+        return self.query(missing=(code,))
+
+    def with_provider(self, provider_name: str) -> set:
+        """Agents naming provider_name; None selects agents that disclose no provider."""
+        return self.query(provider=provider_name)
+
+    def with_tier(self, tier: str) -> set:
+        return self.query(tier=tier)
+
+    def expiring_before(self, us: int) -> set:
+        """Agents with some jurisdiction's expiry_date before us (µs since epoch)."""
+        return self.query(expiring_before=us)
+
+    def attested_before(self, us: int) -> set:
+        """Agents whose oldest attestation_date is before us (µs since epoch)."""
+        return self.query(attested_before=us)
+
+    def query(self, declares=(), missing=(), provider=..., tier=None, expiring_before=None,
+              attested_before=None) -> set:
+        """Ids matching every given condition, intersected smallest set first.
+
+        provider=None matches agents that disclose no provider; leave it out
+        to match any.
+        """
+        with self._lock:
+            return self._query(declares, missing, provider, tier, expiring_before, attested_before)
+
+    def _query(self, declares, missing, provider, tier, expiring_before, attested_before) -> set:
+        sets = [self.by_jurisdiction.get(code, set()) for code in declares]
+        if provider is not ...:
+            sets.append(self.by_provider.get(provider, set()))
+        if tier is not None:
+            sets.append(self.by_tier.get(tier, set()))
+        if expiring_before is not None:
+            sets.append(self.expiry.before(expiring_before))
+        if attested_before is not None:
+            sets.append(self.attested.before(attested_before))
+        sets.sort(key=len)
+        result = set(sets[0]) if sets else set(self.offsets)
+        for s in sets[1:]:
+            result &= s
+        for code in missing:
+            result -= self.by_jurisdiction.get(code, set())
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append-only, memory-mapped manifest store.")
+    parser.add_argument("store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    put = commands.add_parser("import", help="append manifests from JSON files")
+    put.add_argument("manifests", nargs="+")
+    get = commands.add_parser("get", help="print an agent's current manifest")
+    get.add_argument("agent_id")
+    query = commands.add_parser("query", help="list the ids matching every condition")
+    query.add_argument("--declares", action="append", default=[], metavar="CODE")
+    query.add_argument("--missing", action="append", default=[], metavar="CODE")
+    query.add_argument("--provider")
+    query.add_argument("--tier", choices=TIERS)
+    commands.add_parser("compact", help="drop superseded and deleted records")
+    args = parser.parse_args(argv)
+
+    with ManifestStore(args.store) as store:
+        if args.command == "import":
+            for path in args.manifests:
+                with open(path) as f:
+                    manifest = json.load(f)
+                print(f"{path}: {manifest.get('id')} v{store.put(manifest)}")
+        elif args.command == "get":
+            if args.agent_id not in store:
+                sys.exit(f"{args.agent_id}: not in store")
+            print(json.dumps(store.get(args.agent_id), indent=2))
+        elif args.command == "query":
+            provider = args.provider if args.provider is not None else ...
+            for agent_id in sorted(store.query(args.declares, args.missing, provider, args.tier)):
+                print(agent_id)
+        else:
+            before = store.path.stat().st_size
+            store.compact()
+            print(f"{before:,} -> {store.path.stat().st_size:,} bytes, {len(store):,} manifests")
+
+
+if __name__ == "__main__":
+    main()
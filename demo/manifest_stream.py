@@ -0,0 +1,187 @@
+"""
+Streaming Manifest Reader
+
+Reads a manifest file incrementally and materialises only the paths the
+policy engine reads; everything else (evidence blobs, long descriptions,
+vendor extensions) is scanned past in fixed-size chunks and never decoded.
+Peak memory is bounded by the kept values plus one read buffer, not by the
+file size.
+
+Only the kept values are parsed as JSON, so syntax errors in skipped
+regions go unnoticed beyond bracket and string balance. The result is a
+projection: anything that hashes the manifest or verifies a signature over
+it must load the whole document instead.
+"""
+
+import json
+import os
+import re
+
+# What CompiledPolicy.check()/check_agent(), the chain walk and revocation.revocable() read
+# (third_party_audit and each jurisdiction's audit for the auditor DIDs)
+MANIFEST_PATHS = (
+    "id",
+    "third_party_audit",
+    "compliance_attestations.jurisdictions",
+    "compliance_attestations.cultural_benchmarks",
+    "model_provider_compliance",
+    "sub_agent_compliance",
+    "codebase_verification",
+)
+CHUNK_SIZE = 1 << 16
+STREAM_THRESHOLD = 1 << 20  # bytes; smaller files are cheaper to json.load whole
+
+# A whole string in one match where the buffer holds it, else a bare quote
+_STRUCTURE = re.compile(rb'"(?:[^"\\]++|\\.)*+"|["{}\[\]]', re.DOTALL)
+_STRING_END = re.compile(rb'["\\]')
+_SCALAR_END = re.compile(rb'[,\]}\s]')
+_WHITESPACE = b" \t\r\n"
+
+
+class _Scanner:
+    """A byte buffer over a binary file that refills on demand.
+
+    While a capture is open, the bytes consumed since it started are kept so
+    the value can be decoded once it ends.
+    """
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.pieces = None
+        self.capture_start = 0
+
+    def fill(self) -> bool:
+        """Append the next chunk, keeping buf[pos:]; False at end of file."""
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return False
+        if self.pieces is not None:
+            self.pieces.append(self.buf[self.capture_start:self.pos])
+            self.capture_start = 0
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> bytes:
+        """The next non-whitespace byte, without consuming it."""
+        while True:
+            while self.pos < len(self.buf):
+                c = self.buf[self.pos:self.pos + 1]
+                if c not in _WHITESPACE:
+                    return c
+                self.pos += 1
+            if not self.fill():
+                raise ValueError("unexpected end of JSON input")
+
+    def expect(self, c: bytes):
+        if self.peek() != c:
+            raise ValueError(f"expected {c.decode()!r} at byte {self.f.tell() - len(self.buf) + self.pos}")
+        self.pos += 1
+
+    def skip_string(self):
+        """Consume the rest of a string whose opening quote was consumed."""
+        while True:
+            m = _STRING_END.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+            elif m.group() == b'"':
+                self.pos = m.end()
+                return
+            elif m.end() < len(self.buf):
+                self.pos = m.end() + 1  # the escaped character
+                continue
+            else:
+                self.pos = m.start()  # keep the backslash for the next chunk
+            if not self.fill():
+                raise ValueError("unterminated string")
+
+    def skip_value(self):
+        c = self.peek()
+        self.pos += 1
+        if c == b'"':
+            self.skip_string()
+        elif c in b"{[":
+            depth = 1
+            while depth:
+                m = _STRUCTURE.search(self.buf, self.pos)
+                if m is None:
+                    self.pos = len(self.buf)
+                    if not self.fill():
+                        raise ValueError("unterminated object or array")
+                    continue
+                self.pos = m.end()
+                ch = self.buf[m.start()]
+                if ch == 0x22 and m.end() - m.start() == 1:  # '"', string runs past the buffer
+                    self.skip_string()
+                elif ch in b"{[":
+                    depth += 1
+                elif ch in b"}]":
+                    depth -= 1
+        else:
+            while (m := _SCALAR_END.search(self.buf, self.pos)) is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    return
+            self.pos = m.start()
+
+    def read_value(self):
+        """Decode the next value, buffering only its own bytes."""
+        self.peek()
+        self.pieces, self.capture_start = [], self.pos
+        try:
+            self.skip_value()
+            self.pieces.append(self.buf[self.capture_start:self.pos])
+            return json.loads(b"".join(self.pieces))
+        finally:
+            self.pieces = None
+
+
+def _walk_object(scanner: _Scanner, prefix: str, paths: frozenset, prefixes: frozenset, out: dict):
+    scanner.expect(b"{")
+    if scanner.peek() == b"}":
+        scanner.pos += 1
+        return
+    while True:
+        if scanner.peek() != b'"':
+            raise ValueError("expected an object key")
+        key = scanner.read_value()
+        scanner.expect(b":")
+        path = prefix + key
+        if path in paths:
+            out[key] = scanner.read_value()
+        elif path in prefixes and scanner.peek() == b"{":
+            _walk_object(scanner, path + ".", paths, prefixes, out.setdefault(key, {}))
+        else:
+            scanner.skip_value()
+        c = scanner.peek()
+        scanner.pos += 1
+        if c == b"}":
+            return
+        if c != b",":
+            raise ValueError(f"expected ',' or '}}', found {c!r}")
+
+
+def stream_manifest(f, paths=MANIFEST_PATHS, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Read the given dotted paths from the JSON object in binary file f.
+
+    Returns a dict holding just those paths (absent ones are left out), with
+    the same nesting as the source document.
+    """
+    paths = frozenset(paths)
+    prefixes = frozenset(p.rsplit(".", i)[0] for p in paths for i in range(1, p.count(".") + 1))
+    scanner = _Scanner(f, chunk_size)
+    out = {}
+    _walk_object(scanner, "", paths, prefixes, out)
+    return out
+
+
+def load_manifest(path, paths=MANIFEST_PATHS, threshold: int = STREAM_THRESHOLD) -> dict:
+    """json.load for small files; stream_manifest() for files of threshold bytes or more."""
+    if os.path.getsize(path) < threshold:
+        with open(path) as f:
+            return json.load(f)
+    with open(path, "rb") as f:
+        return stream_manifest(f, paths)
@@ -0,0 +1,248 @@
+"""
+Verification Metrics
+
+Counters and latency histograms for the verification hot paths, rendered in
+the Prometheus text exposition format (the demo server serves them from
+/metrics):
+
+    cbaac_rule_seconds{check, rule}              each policy rule in check()/check_agent()
+    cbaac_verdicts_total{check, result}          evaluated verdicts, pass or fail
+    cbaac_failure_reasons_total{check, reason}   failure reasons, digits collapsed to N
+    cbaac_attestation_level_total{level}         get_attestation_level() tiers from check_agent()
+    cbaac_chain_walk_seconds{result}             whole verify_chain() walks
+    cbaac_chain_hop_seconds{status}              one sub-agent: fetch plus check
+    cbaac_fetch_seconds{fetcher, outcome}        each manifest fetch during a chain walk
+    cbaac_route_seconds{method, route, status}   HTTP requests, by route template (RouteMetrics)
+
+Disabled, every instrumented call site costs one attribute test and records
+nothing, so the hooks stay in place in production. Library use starts
+disabled and the demo server starts enabled; CBAAC_METRICS=1/0 overrides
+either, and METRICS.enable()/disable() switch at runtime. Instruments are
+updated from the event loop thread without locks.
+"""
+
+import os
+import re
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+# Seconds; rules take microseconds, routes and fetches milliseconds to seconds
+DEFAULT_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SERIES = 1_000     # label combinations per instrument; beyond it new ones are folded into "other"
+OTHER = "other"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+@lru_cache(maxsize=4096)
+def reason_label(reason: str) -> str:
+    """A failure reason with its variable numbers collapsed, so reasons group by kind."""
+    return re.sub(r"\d+", "N", reason)
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        values = self.values
+        if labels not in values and len(values) >= MAX_SERIES:
+            labels = (OTHER,) * len(labels)
+        values[labels] = values.get(labels, 0) + amount
+
+    def clear(self):
+        self.values.clear()
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {value:g}"
+
+
+class _Series:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)    # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+
+    def clear(self):
+        self.counts = [0] * len(self.counts)
+        self.sum = 0.0
+
+
+class Histogram:
+    """Latency distribution per label combination, in cumulative Prometheus buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def labels(self, *labels) -> _Series:
+        """The series for one label combination; hot paths may hold on to it (clear() keeps it valid)."""
+        series = self.series.get(labels)
+        if series is None:
+            if len(self.series) >= MAX_SERIES:
+                labels = (OTHER,) * len(labels)
+                series = self.series.get(labels)
+                if series is not None:
+                    return series
+            series = self.series[labels] = _Series(self.buckets)
+        return series
+
+    def observe(self, seconds: float, *labels):
+        self.labels(*labels).observe(seconds)
+
+    def clear(self):
+        for series in self.series.values():
+            series.clear()
+
+    def samples(self):
+        for labels, series in sorted(self.series.items()):
+            if series.sum == 0 and not any(series.counts):
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {series.sum:.9g}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Metrics:
+    """A set of instruments, the switch that gates recording into them, and their exposition."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.instruments = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        instrument = Counter(name, help, labels)
+        self.instruments.append(instrument)
+        return instrument
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        instrument = Histogram(name, help, labels, buckets)
+        self.instruments.append(instrument)
+        return instrument
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        for instrument in self.instruments:
+            instrument.clear()
+
+    def render(self) -> str:
+        """Every instrument in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for instrument in self.instruments:
+            lines.append(f"# HELP {instrument.name} {instrument.help}")
+            lines.append(f"# TYPE {instrument.name} {instrument.kind}")
+            lines.extend(instrument.samples())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def env_enabled(default: bool) -> bool:
+    """CBAAC_METRICS as a switch, or default when it is unset."""
+    value = os.environ.get("CBAAC_METRICS")
+    return default if value is None else value.lower() in ("1", "true", "on", "yes")
+
+
+METRICS = Metrics(enabled=env_enabled(False))
+
+RULE_SECONDS = METRICS.histogram("cbaac_rule_seconds", "Time spent in one policy rule.", ("check", "rule"))
+VERDICTS = METRICS.counter("cbaac_verdicts_total", "Policy verdicts evaluated.", ("check", "result"))
+FAILURE_REASONS = METRICS.counter("cbaac_failure_reasons_total", "Reasons given for failing verdicts.",
+                                  ("check", "reason"))
+ATTESTATION_LEVELS = METRICS.counter("cbaac_attestation_level_total", "Attestation tiers assigned by check_agent.",
+                                     ("level",))
+CHAIN_WALK_SECONDS = METRICS.histogram("cbaac_chain_walk_seconds", "Time to verify a whole agent chain.",
+                                       ("result",))
+CHAIN_HOP_SECONDS = METRICS.histogram("cbaac_chain_hop_seconds", "Time to fetch and check one sub-agent.",
+                                      ("status",))
+FETCH_SECONDS = METRICS.histogram("cbaac_fetch_seconds", "Time to fetch one manifest during a chain walk.",
+                                  ("fetcher", "outcome"))
+ROUTE_SECONDS = METRICS.histogram("cbaac_route_seconds", "HTTP request latency by route.",
+                                  ("method", "route", "status"))
+
+
+def record_verdict(check: str, result: dict):
+    """Count one verdict and its failure reasons."""
+    VERDICTS.inc(check, "pass" if result["pass"] else "fail")
+    for reason in result["reasons"]:
+        FAILURE_REASONS.inc(check, reason_label(reason))
+
+
+# ─────────────────────────────────────────────────────────
+# HTTP
+# ─────────────────────────────────────────────────────────
+
+def route_template(scope: dict) -> str:
+    """The path template of the route a request matched, e.g. /agent/{agent_key}."""
+    if "endpoint" not in scope:
+        return "unmatched"
+    route = scope.get("route")
+    if route is None:
+        # Starlette versions that leave the route out of the scope: find it by its endpoint
+        route = next((r for r in getattr(scope.get("router"), "routes", ())
+                      if getattr(r, "endpoint", None) is scope["endpoint"]), None)
+    if getattr(route, "path", None) is not None:
+        return route.path
+    # No route object at all: put parameters back segment by segment, never inside static text
+    params = {str(value): "{" + name + "}" for name, value in (scope.get("path_params") or {}).items()}
+    return "/".join(params.get(segment, segment) for segment in scope.get("path", "").split("/"))
+
+
+class RouteMetrics:
+    """ASGI middleware timing every HTTP request into cbaac_route_seconds."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS.enabled:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            ROUTE_SECONDS.observe(time.perf_counter() - start, scope["method"], route_template(scope), str(status))
@@ -0,0 +1,400 @@
+"""
+Compiled Policy Engine
+
+Precompiles a company policy (company_a_policy.json format) once into a flat
+list of check closures, so evaluating a manifest is a single loop with no
+repeated policy lookups.
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime
+from functools import cached_property, lru_cache
+from typing import Callable, NamedTuple
+
+import metrics
+from metrics import METRICS
+
+EMPTY = {}
+DAY = 86400
+# What check() raises on a manifest it cannot read: wrong value types, impossible dates
+MALFORMED = (AttributeError, KeyError, TypeError, ValueError)
+
+
+class ManifestView(NamedTuple):
+    """The manifest sections every check reads, extracted once per manifest."""
+    manifest: dict
+    attestations: dict
+    jurisdictions: list
+    model_info: dict
+    sub_agents: dict
+    codebase: dict
+
+
+class Check(NamedTuple):
+    """A named check: fn(view, now, reasons, warnings) appends any findings.
+
+    now is POSIX seconds, so date arithmetic stays in floats. (name, params)
+    identifies the check's behaviour, so two policies that compile a check
+    with equal params compile the same check.
+    """
+    name: str
+    fn: Callable
+    params: tuple = ()
+
+
+def view_manifest(manifest: dict) -> ManifestView:
+    attestations = manifest.get("compliance_attestations") or EMPTY
+    # tuple.__new__ skips the generated Python-level NamedTuple constructor
+    return tuple.__new__(ManifestView, (
+        manifest,
+        attestations,
+        attestations.get("jurisdictions") or [],
+        manifest.get("model_provider_compliance") or EMPTY,
+        manifest.get("sub_agent_compliance") or EMPTY,
+        manifest.get("codebase_verification") or EMPTY,
+    ))
+
+
+def parse_date(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, accepting a trailing Z."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(value: str) -> float:
+    """parse_date() as POSIX seconds, cached since attestation dates repeat across checks."""
+    return parse_date(value).timestamp()
+
+
+def canonical_json(obj) -> bytes:
+    """Deterministic JSON encoding: sorted keys, no insignificant whitespace."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def digest(obj) -> str:
+    """sha256 of canonical_json(obj), as "sha256:<hex>"."""
+    return "sha256:" + hashlib.sha256(canonical_json(obj)).hexdigest()
+
+
+def get_attestation_level(manifest: dict, audit_verified: bool = False) -> tuple:
+    """Determine attestation tier: green/yellow/orange/red
+
+    Green needs a verified third-party audit signature (see
+    audit_signatures.AuditVerifier); a third_party_audit flag alone no
+    longer earns it.
+    """
+    attestations = manifest.get("compliance_attestations", {})
+    jurisdictions = attestations.get("jurisdictions", [])
+
+    has_automated = any(j.get("automated_verification") for j in jurisdictions)
+    has_self_cert = any(j.get("compliant") for j in jurisdictions)
+
+    if audit_verified:
+        return ("green", "🟢 Third-party audited")
+    elif has_automated:
+        return ("yellow", "🟡 Auto-verified")
+    elif has_self_cert:
+        return ("orange", "🟠 Self-certified")
+    else:
+        return ("red", "🔴 Unverified")
+
+
+# Dotted policy keys and manifest paths each check reads, by check name.
+# A change under any of them can change that check's outcome.
+CHECK_READS = {
+    "required_jurisdictions": (("regulatory_requirements.required_jurisdictions",),
+                               ("compliance_attestations.jurisdictions",)),
+    "blocked_jurisdictions": (("regulatory_requirements.blocked_jurisdictions",),
+                              ("compliance_attestations.jurisdictions",)),
+    "attestation_freshness": (("regulatory_requirements.max_attestation_age_days",),
+                              ("compliance_attestations.jurisdictions",)),
+    "provider_disclosed": (("model_provider_requirements.require_provider_disclosed",),
+                           ("model_provider_compliance.provider_name",)),
+    "gpai_compliance": (("model_provider_requirements.require_gpai_compliance",),
+                        ("model_provider_compliance.gpai_compliant",)),
+    "blocked_provider": (("model_provider_requirements.blocked_providers",),
+                         ("model_provider_compliance.provider_name",)),
+    "sub_agent_disclosure": (("sub_agent_requirements.require_sub_agent_disclosure",),
+                             ("sub_agent_compliance.uses_sub_agents", "sub_agent_compliance.declared_sub_agents")),
+    "sub_agent_verified": ((), ("sub_agent_compliance.declared_sub_agents",)),
+    "codebase_hash": (("regulatory_requirements.require_codebase_hash",),
+                      ("codebase_verification.current_hash",)),
+    "hash_match": (("regulatory_requirements.require_hash_match",),
+                   ("codebase_verification.current_hash", "codebase_verification.hash_at_attestation")),
+    "cultural_certification": (("cultural_requirements.require_cultural_certification",),
+                               ("compliance_attestations.cultural_benchmarks",)),
+}
+
+
+# ─────────────────────────────────────────────────────────
+# CHAIN CHECKS (verify_chain.check_compliance semantics)
+# ─────────────────────────────────────────────────────────
+
+def _compile_chain_checks(policy: dict) -> list:
+    reg = policy.get("regulatory_requirements", {})
+    model_reqs = policy.get("model_provider_requirements", {})
+    sub_reqs = policy.get("sub_agent_requirements", {})
+    checks = []
+
+    required = tuple(reg.get("required_jurisdictions", []))
+    if required:
+        def required_jurisdictions(v, now, reasons, warnings):
+            declared = {j.get("jurisdiction") for j in v.jurisdictions}
+            for req in required:
+                if req not in declared:
+                    reasons.append(f"Required jurisdiction missing: {req}")
+        checks.append(Check("required_jurisdictions", required_jurisdictions, (required,)))
+
+    blocked = frozenset(reg.get("blocked_jurisdictions", []))
+    if blocked:
+        def blocked_jurisdictions(v, now, reasons, warnings):
+            for j in v.jurisdictions:
+                if j.get("jurisdiction") in blocked:
+                    reasons.append(f"Blocked jurisdiction: {j.get('jurisdiction')}")
+        checks.append(Check("blocked_jurisdictions", blocked_jurisdictions, (blocked,)))
+
+    max_age = reg.get("max_attestation_age_days", 365)
+    def attestation_freshness(v, now, reasons, warnings):
+        for j in v.jurisdictions:
+            if j.get("attestation_date"):
+                age_days = int((now - parse_timestamp(j["attestation_date"])) // DAY)
+                if age_days > max_age:
+                    reasons.append(f"Attestation too old for {j['jurisdiction']}: {age_days} days")
+    checks.append(Check("attestation_freshness", attestation_freshness, (max_age,)))
+
+    if model_reqs.get("require_provider_disclosed"):
+        def provider_disclosed(v, now, reasons, warnings):
+            if not v.model_info.get("provider_name"):
+                reasons.append("Model provider not disclosed")
+        checks.append(Check("provider_disclosed", provider_disclosed))
+
+    if model_reqs.get("require_gpai_compliance"):
+        def gpai_compliance(v, now, reasons, warnings):
+            if not v.model_info.get("gpai_compliant"):
+                reasons.append("Model not GPAI compliant")
+        checks.append(Check("gpai_compliance", gpai_compliance))
+
+    blocked_providers = frozenset(model_reqs.get("blocked_providers", []))
+    if blocked_providers:
+        def blocked_provider(v, now, reasons, warnings):
+            if v.model_info.get("provider_name") in blocked_providers:
+                reasons.append(f"Blocked model provider: {v.model_info['provider_name']}")
+        checks.append(Check("blocked_provider", blocked_provider, (blocked_providers,)))
+
+    if sub_reqs.get("require_sub_agent_disclosure"):
+        def sub_agent_disclosure(v, now, reasons, warnings):
+            if v.sub_agents.get("uses_sub_agents") and not v.sub_agents.get("declared_sub_agents"):
+                reasons.append("Sub-agents used but not declared")
+        checks.append(Check("sub_agent_disclosure", sub_agent_disclosure))
+
+    def sub_agent_verified(v, now, reasons, warnings):
+        for sub in v.sub_agents.get("declared_sub_agents") or ():
+            if not sub.get("compliance_verified"):
+                warnings.append(f"Sub-agent {sub.get('agent_id')} compliance not verified")
+    checks.append(Check("sub_agent_verified", sub_agent_verified))
+
+    if reg.get("require_codebase_hash"):
+        def codebase_hash(v, now, reasons, warnings):
+            if not v.codebase.get("current_hash"):
+                reasons.append("Codebase hash not provided")
+        checks.append(Check("codebase_hash", codebase_hash))
+
+    if reg.get("require_hash_match"):
+        def hash_match(v, now, reasons, warnings):
+            current = v.codebase.get("current_hash")
+            attested = v.codebase.get("hash_at_attestation")
+            if current and attested and current != attested:
+                reasons.append("Codebase hash mismatch - code changed since attestation")
+        checks.append(Check("hash_match", hash_match))
+
+    return checks
+
+
+# ─────────────────────────────────────────────────────────
+# DEMO CHECKS (app.check_agent semantics)
+# ─────────────────────────────────────────────────────────
+
+def _compile_agent_checks(policy: dict) -> list:
+    checks = []
+
+    required = tuple(policy.get("regulatory_requirements", {}).get("required_jurisdictions", []))
+    if required:
+        def required_jurisdictions(v, now, reasons, warnings):
+            declared = {j["jurisdiction"] for j in v.jurisdictions if j.get("compliant")}
+            missing = [r for r in required if r not in declared]
+            if missing:
+                reasons.append(f"Missing required jurisdictions: {', '.join(missing)}")
+        checks.append(Check("required_jurisdictions", required_jurisdictions, (required,)))
+
+    if policy.get("model_provider_requirements", {}).get("require_gpai_compliance"):
+        def gpai_compliance(v, now, reasons, warnings):
+            if not v.model_info.get("gpai_compliant"):
+                reasons.append("Model not GPAI compliant")
+        checks.append(Check("gpai_compliance", gpai_compliance))
+
+    if policy.get("cultural_requirements", {}).get("require_cultural_certification"):
+        def cultural_certification(v, now, reasons, warnings):
+            cultural = v.attestations.get("cultural_benchmarks")
+            if not cultural or not cultural.get("certified"):
+                warnings.append("No cultural certification")
+        checks.append(Check("cultural_certification", cultural_certification))
+
+    def sub_agent_verified(v, now, reasons, warnings):
+        for sub in v.sub_agents.get("declared_sub_agents", []):
+            if not sub.get("compliance_verified"):
+                warnings.append(f"Sub-agent '{sub.get('agent_id', 'unknown')}' not verified")
+    checks.append(Check("sub_agent_verified", sub_agent_verified))
+
+    return checks
+
+
+def _run_traced(named: tuple, timed: tuple, v: ManifestView, now: float, reasons: list, warnings: list) -> dict:
+    """Run (name, fn) pairs as the plain loop runs fns and return {rule name: "pass" | "warn" | "fail"}.
+
+    timed holds each rule's metrics series when metrics are enabled, else None.
+    """
+    rules = {}
+    if timed is None:
+        for name, fn in named:
+            failed, warned = len(reasons), len(warnings)
+            fn(v, now, reasons, warnings)
+            rules[name] = "fail" if len(reasons) > failed else "warn" if len(warnings) > warned else "pass"
+        return rules
+    clock = time.perf_counter
+    for (name, fn), (series, _) in zip(named, timed):
+        failed, warned = len(reasons), len(warnings)
+        start = clock()
+        fn(v, now, reasons, warnings)
+        series.observe(clock() - start)
+        rules[name] = "fail" if len(reasons) > failed else "warn" if len(warnings) > warned else "pass"
+    return rules
+
+
+def _run_timed(timed: tuple, v: ManifestView, now: float, reasons: list, warnings: list):
+    """Run (series, fn) pairs as the plain loop runs fns, timing each rule into its series."""
+    clock = time.perf_counter
+    for series, fn in timed:
+        start = clock()
+        fn(v, now, reasons, warnings)
+        series.observe(clock() - start)
+
+
+class CompiledPolicy:
+    """A policy compiled once and evaluated against many manifests.
+
+    With metrics enabled, every rule is timed and every verdict counted
+    (see metrics.py); disabled, that costs one flag test per call.
+    With trace=True a result also carries "rules": each rule's outcome, as
+    decision_log records it.
+    """
+
+    def __init__(self, policy: dict):
+        self.policy = policy
+        self.log_on_failure = bool((policy.get("on_failure") or {}).get("log"))
+        self.max_attestation_age_days = policy.get("regulatory_requirements", {}).get("max_attestation_age_days", 365)
+        self.chain_checks = tuple(_compile_chain_checks(policy))
+        self.agent_checks = tuple(_compile_agent_checks(policy))
+        self._chain_fns = tuple(c.fn for c in self.chain_checks)
+        self._agent_fns = tuple(c.fn for c in self.agent_checks)
+        self._chain_named = tuple((c.name, c.fn) for c in self.chain_checks)
+        self._agent_named = tuple((c.name, c.fn) for c in self.agent_checks)
+
+    @cached_property
+    def _chain_timed(self) -> tuple:
+        return tuple((metrics.RULE_SECONDS.labels("chain", c.name), c.fn) for c in self.chain_checks)
+
+    @cached_property
+    def _agent_timed(self) -> tuple:
+        return tuple((metrics.RULE_SECONDS.labels("agent", c.name), c.fn) for c in self.agent_checks)
+
+    @cached_property
+    def digest(self) -> str:
+        """Content digest of the source policy document."""
+        return digest(self.policy)
+
+    def check(self, manifest: dict, now: datetime = None, trace: bool = False) -> dict:
+        """Equivalent to verify_chain.check_compliance(manifest, policy)."""
+        if not manifest:
+            result = {"pass": False, "reasons": ["No manifest found"], "warnings": []}
+            if trace:
+                result["rules"] = {}
+            if METRICS.enabled:
+                metrics.record_verdict("chain", result)
+            return result
+        v = view_manifest(manifest)
+        now = now.timestamp() if now else time.time()
+        reasons, warnings = [], []
+        if trace:
+            timed = self._chain_timed if METRICS.enabled else None
+            rules = _run_traced(self._chain_named, timed, v, now, reasons, warnings)
+        elif METRICS.enabled:
+            _run_timed(self._chain_timed, v, now, reasons, warnings)
+        else:
+            for fn in self._chain_fns:
+                fn(v, now, reasons, warnings)
+            return {"pass": not reasons, "reasons": reasons, "warnings": warnings}
+        result = {"pass": not reasons, "reasons": reasons, "warnings": warnings}
+        if trace:
+            result["rules"] = rules
+        if METRICS.enabled:
+            metrics.record_verdict("chain", result)
+        return result
+
+    def check_agent(self, manifest: dict, now: datetime = None, audit_verified: bool = False,
+                    trace: bool = False) -> dict:
+        """Equivalent to app.check_agent(manifest, policy), tiered by audit_verified."""
+        level, level_text = get_attestation_level(manifest, audit_verified)
+        v = view_manifest(manifest)
+        rules = {}
+        if not v.jurisdictions:
+            result = {"pass": False, "reasons": ["No jurisdiction compliance declared"], "warnings": [],
+                      "level": level, "level_text": level_text}
+        else:
+            now = now.timestamp() if now else time.time()
+            reasons, warnings = [], []
+            if trace:
+                timed = self._agent_timed if METRICS.enabled else None
+                rules = _run_traced(self._agent_named, timed, v, now, reasons, warnings)
+            elif METRICS.enabled:
+                _run_timed(self._agent_timed, v, now, reasons, warnings)
+            else:
+                for fn in self._agent_fns:
+                    fn(v, now, reasons, warnings)
+            result = {"pass": not reasons, "reasons": reasons, "warnings": warnings,
+                      "level": level, "level_text": level_text}
+        if trace:
+            result["rules"] = rules
+        if METRICS.enabled:
+            metrics.record_verdict("agent", result)
+            metrics.ATTESTATION_LEVELS.inc(level)
+        return result
+
+    def failed_checks(self, manifest: dict, now: datetime = None, agent: bool = False) -> tuple:
+        """Names of the checks that add a reason for this manifest, in check order."""
+        now = now.timestamp() if now else time.time()
+        v = view_manifest(manifest or EMPTY)
+        failed = []
+        for check in (self.agent_checks if agent else self.chain_checks):
+            reasons = []
+            check.fn(v, now, reasons, [])
+            if reasons:
+                failed.append(check.name)
+        return tuple(failed)
+
+    def valid_until(self, manifest: dict, now: datetime = None, agent: bool = False):
+        """Earliest POSIX time at which the clock alone could change this verdict.
+
+        That is the next attestation to cross max_attestation_age_days (only
+        check() tests attestation age; pass agent=True for check_agent()) or
+        to reach its expiry_date. None if no such boundary lies ahead.
+        """
+        now = now.timestamp() if now else time.time()
+        boundaries = []
+        for j in view_manifest(manifest or EMPTY).jurisdictions:
+            if j.get("attestation_date") and not agent:
+                boundaries.append(parse_timestamp(j["attestation_date"]) + (self.max_attestation_age_days + 1) * DAY)
+            if j.get("expiry_date"):
+                boundaries.append(parse_timestamp(j["expiry_date"]))
+        return min((b for b in boundaries if b > now), default=None)
@@ -0,0 +1,98 @@
+"""
+Policy What-If Sweeps
+
+Evaluates many policy variants over the same manifests at the cost of one.
+Every distinct check across the variants (same name, same params) runs once
+per manifest; each manifest is reduced to a bitmask of failed checks, and a
+variant passes a manifest iff none of its own checks' bits are set. Cost is
+checks x manifests, plus variants x distinct failure patterns.
+"""
+
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import product
+
+from policy_engine import CompiledPolicy, view_manifest
+
+# The six /recheck checkboxes, in form order
+RECHECK_TOGGLES = ("require_gdpr", "require_ai_act", "require_gpai",
+                   "require_hash", "require_cultural", "require_subagent_compliance")
+
+
+def recheck_policy(require_gdpr: bool = False, require_ai_act: bool = False, require_gpai: bool = False,
+                   require_hash: bool = False, require_cultural: bool = False,
+                   require_subagent_compliance: bool = False) -> dict:
+    """The custom policy /recheck builds from its checkboxes."""
+    return {
+        "regulatory_requirements": {
+            "required_jurisdictions": ["EU"] if require_gdpr else [],
+            "require_gdpr_compliance": require_gdpr,
+            "require_ai_act_compliance": require_ai_act,
+            "require_codebase_hash": require_hash,
+            "require_hash_match": require_hash,
+        },
+        "model_provider_requirements": {
+            "require_gpai_compliance": require_gpai,
+        },
+        "cultural_requirements": {
+            "require_cultural_certification": require_cultural,
+        },
+        "sub_agent_requirements": {
+            "require_compliance_declaration": require_subagent_compliance,
+        }
+    }
+
+
+def recheck_variants() -> dict:
+    """All 64 /recheck checkbox combinations, keyed by their toggle tuples."""
+    return {flags: recheck_policy(**dict(zip(RECHECK_TOGGLES, flags)))
+            for flags in product((False, True), repeat=len(RECHECK_TOGGLES))}
+
+
+def sweep(manifests, variants: dict, agent: bool = False, now: datetime = None) -> dict:
+    """Evaluate every policy variant over manifests in one pass.
+
+    variants maps any hashable label to a policy dict. With agent=True the
+    check_agent() semantics apply (as on /recheck), otherwise check().
+    Returns {"total", "checks", "pass_counts": {label: count},
+    "fail_counts": {(name, params): count}}, where checks lists the
+    distinct (name, params) checks evaluated.
+    """
+    now = now or datetime.now(timezone.utc)
+    ts = now.timestamp()
+
+    # Bit 0 is the gate every variant shares: an empty manifest (check) or
+    # one without jurisdictions (check_agent) fails before any check runs.
+    bits, fns, variant_masks = {}, [], {}
+    for label, policy in variants.items():
+        compiled = CompiledPolicy(policy)
+        mask = 1
+        for check in compiled.agent_checks if agent else compiled.chain_checks:
+            key = (check.name, check.params)
+            if key not in bits:
+                bits[key] = len(fns) + 1
+                fns.append(check.fn)
+            mask |= 1 << bits[key]
+        variant_masks[label] = mask
+
+    patterns = Counter()
+    total = 0
+    for manifest in manifests:
+        total += 1
+        v = view_manifest(manifest or {})
+        if not manifest or (agent and not v.jurisdictions):
+            patterns[1] += 1
+            continue
+        failed = 0
+        for bit, fn in enumerate(fns, 1):
+            reasons = []
+            fn(v, ts, reasons, [])
+            if reasons:
+                failed |= 1 << bit
+        patterns[failed] += 1
+
+    pass_counts = {label: sum(count for failed, count in patterns.items() if not failed & mask)
+                   for label, mask in variant_masks.items()}
+    fail_counts = {key: sum(count for failed, count in patterns.items() if failed >> bit & 1)
+                   for key, bit in bits.items()}
+    return {"total": total, "checks": list(bits), "pass_counts": pass_counts, "fail_counts": fail_counts}
@@ -0,0 +1,187 @@
+"""
+Manifest & Questionnaire Registry
+
+Loads the policy, mock agent manifests and questionnaires once, validates
+them, and serves immutable parsed copies so request handlers never touch the
+filesystem. A background watcher polls file mtimes and swaps in a fresh
+snapshot when anything changes.
+
+Each manifest's digest is taken over its canonical binary encoding
+(manifest_binary), and its pretty-printed JSON is rendered once per snapshot
+rather than on every page view.
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import manifest_binary
+from policy_engine import CompiledPolicy
+
+DEMO_DIR = Path(__file__).parent
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation; still a dict for json.dumps and .get()."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("registry documents are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(obj):
+    """Deep-freeze parsed JSON: dicts become FrozenDicts, lists become tuples."""
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+class Snapshot(NamedTuple):
+    """One consistent, immutable view of every document the demo serves."""
+    policy: dict
+    compiled_policy: CompiledPolicy
+    manifests: dict        # file stem -> manifest
+    manifest_digests: dict # file stem -> manifest_binary.digest(manifest)
+    manifest_json: dict    # file stem -> json.dumps(manifest, indent=2)
+    questionnaires: dict   # file stem -> questionnaire
+    loaded_at: float
+
+
+# ─────────────────────────────────────────────────────────
+# VALIDATION
+# ─────────────────────────────────────────────────────────
+
+def _validate_policy(path, doc):
+    if not isinstance(doc.get("regulatory_requirements"), dict):
+        raise ValueError(f"{path}: policy has no regulatory_requirements object")
+
+
+def _validate_manifest(path, doc):
+    if not doc.get("id"):
+        raise ValueError(f"{path}: manifest has no id")
+    attestations = doc.get("compliance_attestations") or {}
+    if not isinstance(attestations, dict):
+        raise ValueError(f"{path}: compliance_attestations is not an object")
+    for j in attestations.get("jurisdictions") or []:
+        if not isinstance(j, dict) or "jurisdiction" not in j:
+            raise ValueError(f"{path}: jurisdiction entry without a jurisdiction code")
+
+
+def _validate_questionnaire(path, doc):
+    sections = doc.get("sections")
+    if not isinstance(sections, dict):
+        raise ValueError(f"{path}: questionnaire has no sections object")
+    for key, section in sections.items():
+        if not isinstance(section, dict):
+            raise ValueError(f"{path}: section {key} is not an object")
+        for q in section.get("questions", []):
+            if not isinstance(q, dict) or not q.get("id"):
+                raise ValueError(f"{path}: question without an id in section {key}")
+
+
+def _load(path, validate):
+    with open(path) as f:
+        doc = json.load(f)
+    if not isinstance(doc, dict):
+        raise ValueError(f"{path}: not a JSON object")
+    validate(path, doc)
+    return doc
+
+
+class Registry:
+    """Holds the current Snapshot and reloads it when a watched file changes."""
+
+    def __init__(self, demo_dir=DEMO_DIR):
+        self.demo_dir = Path(demo_dir)
+        self.policy_path = self.demo_dir / "company_a_policy.json"
+        self.manifest_dir = self.demo_dir / "mock_agents"
+        self.questionnaire_dir = self.demo_dir.parent / "questionnaires"
+        self.reloads = 0
+        self.last_error = None
+        self.listeners = []  # called with each new Snapshot after a reload
+        self._mtimes = self._scan()
+        self.snapshot = self._build()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _paths(self):
+        return ([self.policy_path]
+                + sorted(self.manifest_dir.glob("*.json"))
+                + sorted(self.questionnaire_dir.glob("*.json")))
+
+    def _scan(self) -> dict:
+        mtimes = {}
+        for path in self._paths():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            mtimes[path] = (stat.st_mtime_ns, stat.st_size)
+        return mtimes
+
+    def _build(self) -> Snapshot:
+        policy = freeze(_load(self.policy_path, _validate_policy))
+        manifests = {p.stem: freeze(_load(p, _validate_manifest)) for p in sorted(self.manifest_dir.glob("*.json"))}
+        questionnaires = {p.stem: freeze(_load(p, _validate_questionnaire))
+                          for p in sorted(self.questionnaire_dir.glob("*.json"))}
+        return Snapshot(
+            policy=policy,
+            compiled_policy=CompiledPolicy(policy),
+            manifests=manifests,
+            manifest_digests={k: manifest_binary.digest(m) for k, m in manifests.items()},
+            manifest_json={k: json.dumps(m, indent=2) for k, m in manifests.items()},
+            questionnaires=questionnaires,
+            loaded_at=time.time(),
+        )
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild the snapshot if any file was added, removed or modified.
+
+        A document that fails to load, validate or build (for any reason)
+        leaves the previous snapshot in place; the error is kept in
+        last_error and watching goes on. A listener that raises is
+        reported and skipped, so the others still run and watching goes on.
+        """
+        mtimes = self._scan()
+        if mtimes == self._mtimes:
+            return False
+        self._mtimes = mtimes
+        try:
+            snapshot = self._build()
+        except Exception as e:
+            self.last_error = e
+            return False
+        self.snapshot = snapshot
+        self.last_error = None
+        self.reloads += 1
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"registry: reload listener {getattr(listener, '__name__', listener)!s} failed: {e!r}",
+                      file=sys.stderr)
+        return True
+
+    def start_watching(self, interval: float = 1.0):
+        """Poll file mtimes every interval seconds in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        def watch():
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+        self._thread = threading.Thread(target=watch, name="registry-watcher", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,235 @@
+"""
+Compiled Manifest Schema Validation
+
+Compiles schema/compliance-extension.json once into straight-line Python:
+every type, required, enum, pattern and format test becomes an inline
+comparison against constants, with no schema walking at validation time.
+Two functions are generated from the same schema: first_error() stops at the
+first violation (the hot path before a policy check) and errors() collects
+every violation (for reports).
+
+Supports the keywords the compliance schema uses: type, properties,
+required, items, enum, pattern and format (date-time, uri; a date-time
+must also be a real calendar date and time). Annotation keywords are
+ignored; any other validation keyword is refused at compile time with a
+ValueError rather than silently skipped.
+
+Run with: python schema_validator.py manifest.json [...]
+"""
+
+import json
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+SCHEMA_PATH = Path(__file__).parent.parent / "schema" / "compliance-extension.json"
+
+ANNOTATIONS = frozenset({"$schema", "$id", "title", "description", "version", "examples", "default", "$comment"})
+
+# RFC 3339 date-time, as JSON Schema's "date-time" format requires
+DATE_TIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[Tt]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:[Zz]|[+-]\d{2}:\d{2})$")
+URI_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:[^\s]*$")
+
+
+@lru_cache(maxsize=4096)
+def is_date_time(value: str) -> bool:
+    """RFC 3339 shape and a real calendar date and time (no 2025-13-45, no 25:61).
+
+    Leap seconds (:60) are refused too: datetime, and so the policy engine, cannot parse them.
+    Cached, since timestamps repeat across a batch.
+    """
+    if not DATE_TIME_RE.match(value):
+        return False
+    try:
+        datetime.fromisoformat(value.upper().replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    return True
+
+
+# format -> predicate on the (already type-checked) string
+FORMATS = {"date-time": is_date_time, "uri": URI_RE.match}
+
+TYPE_TESTS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, (list, tuple))",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "null": "{v} is None",
+}
+
+
+class ValidationError(NamedTuple):
+    path: str      # dotted, with [i] for array items; "" for the document itself
+    message: str
+
+    def __str__(self):
+        return f"{self.path or '<root>'}: {self.message}"
+
+
+# ─────────────────────────────────────────────────────────
+# CODE GENERATION
+# ─────────────────────────────────────────────────────────
+
+class _Generator:
+    def __init__(self, fail_fast: bool):
+        self.fail_fast = fail_fast
+        self.lines = []
+        self.constants = {}
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value) -> str:
+        name = self.name("_c")
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth: int, line: str):
+        self.lines.append("    " * depth + line)
+
+    def error(self, depth: int, path: str, message: str):
+        error = f"_Error(f{path!r}, {message!r})"
+        self.emit(depth, f"return {error}" if self.fail_fast else f"errors.append({error})")
+
+    def node(self, schema: dict, v: str, path: str, depth: int):
+        unknown = set(schema) - ANNOTATIONS - {"type", "properties", "required", "items", "enum", "pattern", "format"}
+        if unknown:
+            raise ValueError(f"unsupported schema keywords at {path or '<root>'}: {sorted(unknown)}")
+
+        types = schema.get("type")
+        types = [types] if isinstance(types, str) else types
+        if types is not None:
+            test = " or ".join(TYPE_TESTS[t].format(v=v) for t in types)
+            self.emit(depth, f"if not ({test}):")
+            self.error(depth + 1, path, f"expected {' or '.join(types)}")
+            if not self._has_checks(schema):
+                return
+            self.emit(depth, "else:")
+            depth += 1
+        elif not self._has_checks(schema):
+            return
+        # Keywords for one instance type only apply to values of that type;
+        # the guard is dropped when "type" already established it.
+        known = types[0] if types is not None and len(types) == 1 else None
+
+        def guarded(kind: str, test: str) -> int:
+            if known == kind:
+                return depth
+            self.emit(depth, f"if {test.format(v=v)}:")
+            return depth + 1
+
+        if "enum" in schema:
+            allowed = schema["enum"]
+            if all(isinstance(a, str) for a in allowed):
+                self.emit(depth, f"if {v} not in {self.constant(frozenset(allowed))}:")
+            else:
+                self.emit(depth, f"if not any({v} == a and type({v}) is type(a) for a in {self.constant(tuple(allowed))}):")
+            self.error(depth + 1, path, f"must be one of {', '.join(map(json.dumps, allowed))}")
+
+        tests = []
+        if "pattern" in schema:
+            tests.append((f"{self.constant(re.compile(schema['pattern']))}.search({v})",
+                          f"does not match {schema['pattern']}"))
+        if schema.get("format") in FORMATS:
+            tests.append((f"{self.constant(FORMATS[schema['format']])}({v})",
+                          f"not a valid {schema['format']}"))
+        if tests:
+            inner = guarded("string", TYPE_TESTS["string"])
+            for test, message in tests:
+                self.emit(inner, f"if not {test}:")
+                self.error(inner + 1, path, message)
+
+        if "required" in schema or "properties" in schema:
+            inner = guarded("object", TYPE_TESTS["object"])
+            for key in schema.get("required", ()):
+                self.emit(inner, f"if {key!r} not in {v}:")
+                self.error(inner + 1, path, f"missing required property {key!r}")
+            for key, sub in schema.get("properties", {}).items():
+                if not self._has_checks(sub) and "type" not in sub:
+                    continue
+                child = self.name("v")
+                self.emit(inner, f"if {key!r} in {v}:")
+                self.emit(inner + 1, f"{child} = {v}[{key!r}]")
+                self.node(sub, child, _join(path, key), inner + 1)
+            self.emit(inner, "pass")
+
+        if "items" in schema:
+            inner = guarded("array", TYPE_TESTS["array"])
+            index, item = self.name("i"), self.name("v")
+            self.emit(inner, f"for {index}, {item} in enumerate({v}):")
+            self.node(schema["items"], item, path + f"[{{{index}}}]", inner + 1)
+            self.emit(inner + 1, "pass")
+
+    @staticmethod
+    def _has_checks(schema: dict) -> bool:
+        return any(k in schema for k in ("properties", "required", "items", "enum", "pattern", "format"))
+
+
+def _join(path: str, key: str) -> str:
+    key = key.replace("{", "{{").replace("}", "}}")
+    return f"{path}.{key}" if path else key
+
+
+def generate(schema: dict, fail_fast: bool) -> tuple:
+    """(source, constants) of a validate(doc) function for schema."""
+    gen = _Generator(fail_fast)
+    gen.emit(0, "def validate(doc):")
+    if not fail_fast:
+        gen.emit(1, "errors = []")
+    gen.node(schema, "doc", "", 1)
+    gen.emit(1, "return None" if fail_fast else "return errors")
+    return "\n".join(gen.lines) + "\n", gen.constants
+
+
+def compile_schema(schema: dict, fail_fast: bool):
+    source, constants = generate(schema, fail_fast)
+    namespace = {"_Error": ValidationError, **constants}
+    exec(compile(source, f"<schema validator fail_fast={fail_fast}>", "exec"), namespace)
+    validate = namespace["validate"]
+    validate.source = source
+    return validate
+
+
+class SchemaValidator:
+    """A schema compiled into a fail-fast and a collect-all validation function."""
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self.first_error = compile_schema(schema, fail_fast=True)   # doc -> ValidationError | None
+        self.errors = compile_schema(schema, fail_fast=False)       # doc -> [ValidationError, ...]
+
+    def is_valid(self, doc) -> bool:
+        return self.first_error(doc) is None
+
+
+def load_validator(path=SCHEMA_PATH) -> SchemaValidator:
+    with open(path) as f:
+        return SchemaValidator(json.load(f))
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:])
+    if not paths:
+        sys.exit("usage: python schema_validator.py manifest.json [...]")
+    validator = load_validator()
+    invalid = 0
+    for path in paths:
+        with open(path) as f:
+            errors = validator.errors(json.load(f))
+        invalid += bool(errors)
+        print(f"{path}: {'valid' if not errors else f'{len(errors)} error(s)'}")
+        for error in errors:
+            print(f"  {error}")
+    sys.exit(1 if invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""The demo modules import each other as top-level modules, as when run from demo/."""
+
+import sys
+from pathlib import Path
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+if str(DEMO_DIR) not in sys.path:
+    sys.path.insert(0, str(DEMO_DIR))
@@ -0,0 +1,75 @@
+"""Audit signatures: only allowlisted auditors verify, and only they are ever resolved."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+import audit_signatures  # noqa: E402
+from audit_signatures import (  # noqa: E402
+    INVALID, UNKNOWN_KEY, VERIFIED, AuditVerifier, Ed25519PrivateKey, KeyCache, sign_manifest,
+)
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+_BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def did_key(private_key) -> str:
+    raw = b"\xed\x01" + private_key.public_key().public_bytes_raw()
+    n, out = int.from_bytes(raw, "big"), ""
+    while n:
+        n, r = divmod(n, 58)
+        out = _BASE58[r] + out
+    return "did:key:z" + out
+
+
+@pytest.fixture
+def sketchy():
+    with open(DEMO_DIR / "mock_agents" / "agent_d_sketchy.json") as f:
+        return json.load(f)
+
+
+def test_self_issued_did_key_is_not_trusted(sketchy):
+    key = Ed25519PrivateKey.generate()
+    signed = sign_manifest(sketchy, key, did_key(key))
+    assert AuditVerifier().status(signed) == UNKNOWN_KEY
+
+
+def test_unlisted_did_is_never_resolved(sketchy):
+    key = Ed25519PrivateKey.generate()
+    resolved = []
+    keys = KeyCache(resolve=lambda did: resolved.append(did) or b"")
+    signed = sign_manifest(sketchy, key, "did:web:attacker.example")
+    assert AuditVerifier(keys).status(signed) == UNKNOWN_KEY
+    assert resolved == []
+
+
+def test_accredited_did_is_resolved(sketchy):
+    key = Ed25519PrivateKey.generate()
+    auditor = did_key(key)
+    keys = KeyCache(accredited={auditor})
+    signed = sign_manifest(sketchy, key, auditor)
+    assert AuditVerifier(keys).status(signed) == VERIFIED
+    signed["label"] = "tampered after signing"
+    assert AuditVerifier(keys).status(signed) == INVALID
+
+
+def test_pinned_key_never_resolved(sketchy):
+    key = Ed25519PrivateKey.generate()
+    keys = KeyCache({"did:web:auditor.example": key.public_key().public_bytes_raw()},
+                    resolve=lambda did: pytest.fail(f"resolved {did}"))
+    assert AuditVerifier(keys).status(sign_manifest(sketchy, key, "did:web:auditor.example")) == VERIFIED
+
+
+def test_auditor_file_pins_and_accredits(tmp_path):
+    key = Ed25519PrivateKey.generate()
+    jwk = {"kty": "OKP", "crv": "Ed25519",
+           "x": audit_signatures.base64.urlsafe_b64encode(key.public_key().public_bytes_raw()).decode().rstrip("=")}
+    path = tmp_path / "auditors.json"
+    path.write_text(json.dumps({"did:web:pinned.example": jwk, "did:web:resolved.example": None}))
+    keys = audit_signatures.load_key_cache(path)
+    assert set(keys.trusted) == {"did:web:pinned.example"}
+    assert keys.accredited == {"did:web:resolved.example"}
+    assert keys.allowed() == {"did:web:pinned.example", "did:web:resolved.example"}
@@ -0,0 +1,170 @@
+"""verify_chain() over in-process stub fetchers: dedupe, cycles, depth, failures and fail-fast."""
+
+import asyncio
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from chain_verifier import DirectoryFetcher, StubFetcher, verify_chain
+from policy_engine import CompiledPolicy
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+TEMPLATE = json.loads((DEMO_DIR / "mock_agents" / "agent_b_travel.json").read_text())
+
+
+def url(agent_id: str) -> str:
+    return f"https://{agent_id}.example.test/.well-known/compliance.json"
+
+
+def agent(agent_id: str, *subs: str) -> dict:
+    """A manifest that passes the demo policy, declaring the given sub-agents."""
+    manifest = copy.deepcopy(TEMPLATE)
+    manifest["id"] = agent_id
+    manifest["sub_agent_compliance"] = {
+        "uses_sub_agents": bool(subs),
+        "declared_sub_agents": [{"agent_id": s, "compliance_url": url(s)} for s in subs],
+    }
+    return manifest
+
+
+def policy(max_depth: int = 5) -> CompiledPolicy:
+    doc = json.loads((DEMO_DIR / "company_a_policy.json").read_text())
+    doc["sub_agent_requirements"] = {**doc["sub_agent_requirements"],
+                                     "verify_sub_agent_compliance": True, "max_chain_depth": max_depth}
+    return CompiledPolicy(doc)
+
+
+class DelayedFetcher(StubFetcher):
+    """StubFetcher with a per-URL delay, to force the order fetches finish in."""
+
+    def __init__(self, manifests: dict, delays: dict):
+        super().__init__(manifests)
+        self.delays = delays
+
+    async def fetch(self, url: str, agent_id: str = None):
+        await asyncio.sleep(self.delays.get(url, 0))
+        return await super().fetch(url, agent_id)
+
+
+class FailingFetcher(StubFetcher):
+    """StubFetcher that raises for some URLs and never answers for others."""
+
+    def __init__(self, manifests: dict, broken=(), hanging=()):
+        super().__init__(manifests)
+        self.broken, self.hanging = set(broken), set(hanging)
+
+    async def fetch(self, url: str, agent_id: str = None):
+        if url in self.broken:
+            raise ConnectionError("connection refused")
+        if url in self.hanging:
+            await asyncio.sleep(3600)
+        return await super().fetch(url, agent_id)
+
+
+def walk(root: dict, agents: dict, fetcher=None, **kwargs) -> dict:
+    fetcher = fetcher or StubFetcher({url(k): v for k, v in agents.items()})
+    kwargs.setdefault("fail_fast", False)
+    return asyncio.run(verify_chain(root, kwargs.pop("policy", None) or policy(), fetcher, **kwargs))
+
+
+def statuses(result: dict) -> dict:
+    return {(n["agent_id"], n["depth"]): n["status"] for n in result["nodes"]}
+
+
+def test_clean_chain_passes():
+    result = walk(agent("root", "a", "b"), {"a": agent("a", "c"), "b": agent("b"), "c": agent("c")})
+    assert result["pass"]
+    assert statuses(result) == {("root", 0): "verified", ("a", 1): "verified",
+                                ("b", 1): "verified", ("c", 2): "verified"}
+
+
+def test_shared_sub_agent_is_fetched_once():
+    agents = {"a": agent("a", "c"), "b": agent("b", "c"), "c": agent("c")}
+    fetcher = StubFetcher({url(k): v for k, v in agents.items()})
+    result = walk(agent("root", "a", "b"), agents, fetcher)
+    assert result["pass"]
+    assert fetcher.requests.count(url("c")) == 1
+    assert sorted(n["status"] for n in result["nodes"] if n["agent_id"] == "c") == ["duplicate", "verified"]
+
+
+def test_cycle_is_reported_not_followed():
+    agents = {"a": agent("a", "b"), "b": agent("b", "a")}
+    fetcher = StubFetcher({url(k): v for k, v in agents.items()})
+    result = walk(agent("root", "a"), agents, fetcher)
+    assert result["pass"]
+    assert statuses(result)[("a", 3)] == "cycle"
+    assert fetcher.requests.count(url("a")) == 1
+    assert any("Sub-agent cycle" in w for w in result["warnings"])
+
+
+def test_chain_deeper_than_max_depth_fails():
+    agents = {"a": agent("a", "b"), "b": agent("b", "c"), "c": agent("c")}
+    result = walk(agent("root", "a"), agents, policy=policy(max_depth=2))
+    assert not result["pass"]
+    assert statuses(result)[("b", 2)] == "depth_exceeded"
+
+
+@pytest.mark.parametrize("slow", ["a", "b", "c"])
+def test_agent_is_reached_at_its_shallowest_depth(slow):
+    # x sits at depth 2 under a and at depth 3 under b → c; max_chain_depth 3 only allows the former
+    agents = {"a": agent("a", "x"), "b": agent("b", "c"), "c": agent("c", "x"), "x": agent("x")}
+    fetcher = DelayedFetcher({url(k): v for k, v in agents.items()}, {url(slow): 0.05})
+    result = walk(agent("root", "a", "b"), agents, fetcher, policy=policy(max_depth=3))
+    assert result["pass"], result["reasons"]
+    assert statuses(result)[("x", 2)] == "verified"
+    assert statuses(result)[("x", 3)] == "duplicate"
+
+
+def test_unreachable_sub_agents_fail_the_chain():
+    agents = {"a": agent("a"), "b": agent("b"), "c": agent("c")}
+    fetcher = FailingFetcher({url(k): v for k, v in agents.items()}, broken=[url("b")], hanging=[url("c")])
+    result = walk(agent("root", "a", "b", "c", "missing"), agents, fetcher, hop_timeout=0.05)
+    found = statuses(result)
+    assert not result["pass"]
+    assert found[("a", 1)] == "verified"
+    assert found[("b", 1)] == found[("c", 1)] == "unreachable"
+    assert found[("missing", 1)] == "verified"      # fetched nothing: "No manifest found"
+    assert any("missing: No manifest found" == r for r in result["reasons"])
+    assert any("timed out" in r for r in result["reasons"])
+
+
+def test_malformed_manifests_fail_their_node_only():
+    bad_date = agent("dated")
+    bad_date["compliance_attestations"]["jurisdictions"][0]["attestation_date"] = "2025-13-45T00:00:00Z"
+    agents = {"array": [1, 2], "dated": bad_date, "ok": agent("ok")}
+    result = walk(agent("root", "array", "dated", "ok"), agents)
+    found = statuses(result)
+    assert not result["pass"]
+    assert found[("array", 1)] == found[("dated", 1)] == "malformed"
+    assert found[("ok", 1)] == "verified"
+    assert any(r.startswith("array: Malformed manifest") for r in result["reasons"])
+
+
+def test_fail_fast_stops_the_walk():
+    failing = agent("bad")
+    failing["model_provider_compliance"]["provider_name"] = ""
+    agents = {"bad": failing, "slow": agent("slow", "deep"), "deep": agent("deep")}
+    fetcher = DelayedFetcher({url(k): v for k, v in agents.items()}, {url("slow"): 0.5})
+    result = walk(agent("root", "bad", "slow"), agents, fetcher, fail_fast=True)
+    assert not result["pass"]
+    assert [n["agent_id"] for n in result["nodes"]] == ["root", "bad"]
+    assert url("deep") not in fetcher.requests
+
+
+@pytest.mark.parametrize("escape", [
+    "https://../company_a_policy.json",
+    "https://../../../../../../etc/passwd",
+    "https://host.test/../../company_a_policy.json",
+    "https:///company_a_policy.json",
+])
+def test_directory_fetcher_stays_inside_its_mirror(tmp_path, escape):
+    mirror = tmp_path / "mirror"
+    (mirror / "host.test").mkdir(parents=True)
+    (mirror / "host.test" / "agent.json").write_text(json.dumps(agent("mirrored")))
+    (tmp_path / "company_a_policy.json").write_text("{}")
+    fetcher = DirectoryFetcher(mirror)
+    assert fetcher.resolve("https://host.test/agent.json") == (mirror / "host.test" / "agent.json").resolve()
+    assert fetcher.resolve(escape) is None
+    assert asyncio.run(fetcher.fetch(escape)) is None
@@ -0,0 +1,51 @@
+"""Columnar evaluation must fail exactly the rows and rules CompiledPolicy.check() fails."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import columnar
+from benchmarks import load_demo, synthetic_manifests
+from policy_engine import CompiledPolicy
+
+NOW = datetime.now(timezone.utc)
+
+
+def _variants(policy: dict) -> list:
+    reg = policy["regulatory_requirements"]
+    model = policy["model_provider_requirements"]
+    return [
+        policy,
+        {**policy, "regulatory_requirements": {**reg, "required_jurisdictions": ["EU", "Korea"]}},
+        {**policy, "regulatory_requirements": {**reg, "blocked_jurisdictions": ["UK"],
+                                               "max_attestation_age_days": 90}},
+        {**policy, "regulatory_requirements": {**reg, "require_codebase_hash": False, "require_hash_match": False}},
+        {**policy, "model_provider_requirements": {**model, "blocked_providers": ["Mistral", "Unknown"]}},
+        {**policy, "model_provider_requirements": {}, "sub_agent_requirements": {}},
+    ]
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    policy, mock_agents = load_demo()
+    manifests = mock_agents + list(synthetic_manifests(3_000, seed=7))
+    return policy, manifests, columnar.ManifestTable(manifests)
+
+
+@pytest.mark.parametrize("variant", range(6))
+@pytest.mark.parametrize("days_ahead", [0, 200])
+def test_rule_masks_match_scalar_checks(fleet, variant, days_ahead):
+    policy, manifests, table = fleet
+    now = NOW + timedelta(days=days_ahead)
+    assert columnar.parity_mismatches(table, manifests, _variants(policy)[variant], now) == []
+
+
+@pytest.mark.parametrize("variant", range(6))
+def test_evaluate_matches_check_verdicts(fleet, variant):
+    policy, manifests, table = fleet
+    policy = _variants(policy)[variant]
+    compiled = CompiledPolicy(policy)
+    expected = [compiled.check(m, NOW)["pass"] for m in manifests]
+    assert columnar.evaluate(table, policy, NOW).tolist() == expected
@@ -0,0 +1,63 @@
+"""DecisionLog failures: a bad record is lost alone, failed writes are retried, close() terminates."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import decision_log
+from decision_log import CLOSE_RETRIES, DecisionLog, read_decisions
+from policy_engine import CompiledPolicy
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+RESULT = {"pass": False, "reasons": ["Missing EU"], "warnings": []}
+
+
+@pytest.fixture(scope="module")
+def policy():
+    return CompiledPolicy(json.loads((DEMO_DIR / "company_a_policy.json").read_text()))
+
+
+def log_many(log, policy, n, bad=()):
+    for i in range(n):
+        manifest = {"id": f"a{i}", "unencodable": {1, 2}} if i in bad else {"id": f"a{i}"}
+        log.decide(policy, RESULT, manifest=manifest, agent_id=f"a{i}")
+
+
+def test_unencodable_record_is_lost_alone(tmp_path, policy):
+    with DecisionLog(tmp_path, every_decision=True) as log:
+        log_many(log, policy, 50, bad={10})
+        assert log.flush(timeout=5)
+    assert log.stats()["lost"] == 1 and log.stats()["written"] == 49
+    assert [r["agent_id"] for r in read_decisions(tmp_path)] == [f"a{i}" for i in range(50) if i != 10]
+
+
+def test_failed_fsync_is_retried_in_a_fresh_segment(tmp_path, policy, monkeypatch):
+    failures = iter([OSError("disk full")] * 2)
+    real_fsync = decision_log.os.fsync
+
+    def flaky_fsync(fd):
+        error = next(failures, None)
+        if error:
+            raise error
+        real_fsync(fd)
+
+    monkeypatch.setattr(decision_log.os, "fsync", flaky_fsync)
+    with DecisionLog(tmp_path, every_decision=True, flush_interval=0.01) as log:
+        log_many(log, policy, 30)
+        assert log.flush(timeout=5)
+    stats = log.stats()
+    assert stats["written"] == 30 and stats["lost"] == 0 and stats["write_errors"] == 2
+    assert {r["agent_id"] for r in read_decisions(tmp_path)} == {f"a{i}" for i in range(30)}
+
+
+def test_close_gives_up_on_a_dead_disk(tmp_path, policy, monkeypatch):
+    def dead_fsync(fd):
+        raise OSError("I/O error")
+
+    monkeypatch.setattr(decision_log.os, "fsync", dead_fsync)
+    log = DecisionLog(tmp_path, every_decision=True, flush_interval=0.01)
+    log_many(log, policy, 20)
+    log.close()
+    stats = log.stats()
+    assert stats["written"] == 0 and stats["lost"] == 20 and stats["write_errors"] >= CLOSE_RETRIES
@@ -0,0 +1,48 @@
+"""ExpiryScheduler: a raising listener neither stops the others nor the scheduler thread."""
+
+import json
+import threading
+from pathlib import Path
+
+from expiry_scheduler import ExpiryScheduler
+from policy_engine import CompiledPolicy, parse_timestamp
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+
+
+def manifest(agent_id: str, expiry: str) -> dict:
+    return {"id": agent_id, "compliance_attestations": {"jurisdictions": [
+        {"jurisdiction": "EU", "compliant": True, "expiry_date": expiry}]}}
+
+
+def policy():
+    return CompiledPolicy(json.loads((DEMO_DIR / "company_a_policy.json").read_text()))
+
+
+def broken(event):
+    raise RuntimeError("listener bug")
+
+
+def test_raising_listener_is_skipped():
+    seen = []
+    scheduler = ExpiryScheduler(policy(), listeners=[broken, seen.append], clock=lambda: 0.0)
+    scheduler.schedule("a", manifest("a", "2030-01-01T00:00:00Z"))
+    scheduler.schedule("b", manifest("b", "2030-02-01T00:00:00Z"))
+    events = scheduler.run_due(parse_timestamp("2030-03-01T00:00:00Z"))
+    assert [e.key for e in events] == [e.key for e in seen] == ["a", "b"]
+
+
+def test_scheduler_thread_survives_a_raising_listener():
+    now = [parse_timestamp("2030-01-01T00:00:00Z")]
+    fired = threading.Semaphore(0)
+    scheduler = ExpiryScheduler(policy(), listeners=[broken, lambda event: fired.release()], clock=lambda: now[0])
+    scheduler.start(max_sleep=0.01)
+    try:
+        scheduler.schedule("a", manifest("a", "2030-01-01T00:00:01Z"))
+        now[0] += 2
+        assert fired.acquire(timeout=5)
+        scheduler.schedule("b", manifest("b", "2030-01-01T00:00:03Z"))
+        now[0] += 2
+        assert fired.acquire(timeout=5)
+    finally:
+        scheduler.stop()
@@ -0,0 +1,42 @@
+"""CBMF: decode(encode(m)) == m, including record counts beyond 16 bits."""
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+import manifest_binary
+from benchmarks import synthetic_manifests
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+MOCK_AGENTS = sorted((DEMO_DIR / "mock_agents").glob("*.json"))
+
+
+@pytest.mark.parametrize("path", MOCK_AGENTS, ids=lambda p: p.stem)
+def test_mock_agents_round_trip(path):
+    manifest = json.loads(path.read_text())
+    data = manifest_binary.encode(manifest)
+    assert manifest_binary.decode(data) == manifest
+    assert manifest_binary.BinaryManifest(data).id == manifest["id"]
+
+
+def test_synthetic_manifests_round_trip():
+    for manifest in synthetic_manifests(500, seed=11):
+        if isinstance(manifest, dict):
+            assert manifest_binary.decode(manifest_binary.encode(manifest)) == manifest
+
+
+def test_counts_beyond_u16_round_trip():
+    manifest = json.loads((DEMO_DIR / "mock_agents" / "agent_b_travel.json").read_text())
+    template = manifest["sub_agent_compliance"]["declared_sub_agents"][0]
+    subs = [{**template, "agent_id": f"nanda:sub-{i}", "compliance_url": f"https://sub-{i}.test/c.json"}
+            for i in range(70_000)]
+    manifest["sub_agent_compliance"]["declared_sub_agents"] = subs
+    manifest["compliance_attestations"]["jurisdictions"] *= 66_000
+    data = manifest_binary.encode(manifest)
+    view = manifest_binary.BinaryManifest(data)
+    assert view.sub_agent_count == 70_000 and view.jurisdiction_count == 66_000
+    assert view.sub_agent(69_999).agent_id == "nanda:sub-69999"
+    assert manifest_binary.decode(data) == manifest
+    assert manifest_binary.digest(copy.deepcopy(manifest)) == view.digest()
@@ -0,0 +1,99 @@
+"""ManifestBuilder: answer routing, security coercion and submission validation."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from manifest_builder import ManifestBuilder
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class Form:
+    """multi_items() over repeated fields, as a submitted form has."""
+
+    def __init__(self, *items):
+        self.items_ = list(items)
+
+    def multi_items(self):
+        return list(self.items_)
+
+
+@pytest.fixture(scope="module")
+def builder():
+    return ManifestBuilder.load()
+
+
+def jurisdiction(manifest, code):
+    (j,) = [j for j in manifest["compliance_attestations"]["jurisdictions"] if j["jurisdiction"] == code]
+    return j
+
+
+def test_korea_answers_routed(builder):
+    built = builder.build({"jurisdictions_selected": "korea", "kr_01": "general", "kr_11": "yes"}, NOW)
+    korea = jurisdiction(built.manifest, "Korea")
+    assert korea["regulations"] == ["AI Basic Act", "PIPA"]
+    assert korea["responses"] == {"kr_01": "general", "kr_11": "yes"}
+    assert built.responses == 2
+
+
+def test_shared_question_goes_to_every_owner(builder):
+    built = builder.build({"jurisdictions_selected": "eu,japan", "sec_01": "yes"}, NOW)
+    assert jurisdiction(built.manifest, "EU")["responses"] == {"sec_01": "yes"}
+    assert jurisdiction(built.manifest, "Japan")["responses"] == {"sec_01": "yes"}
+
+
+def test_multi_select_keeps_every_value(builder):
+    form = Form(("jurisdictions_selected", "eu"), ("gdpr_01", "name"), ("gdpr_01", "email"),
+                ("gdpr_03", "consent"))
+    responses = jurisdiction(builder.build(form, NOW).manifest, "EU")["responses"]
+    assert responses == {"gdpr_01": ["name", "email"], "gdpr_03": "consent"}
+    assert builder.answers({"gdpr_01": ["name", "phone"]})[0] == {"gdpr_01": ["name", "phone"]}
+
+
+def test_security_fields_coerced(builder):
+    manifest = builder.build({
+        "jurisdictions_selected": "security",
+        "sec_owasp_01": "yes", "sec_owasp_02": ["LLM01: Prompt Injection"], "sec_owasp_03": "2",
+    }, NOW).manifest
+    security = manifest["security_certifications"]
+    assert security["owasp_llm_top10"] == {
+        "tested": True, "vulnerabilities_tested": ["LLM01: Prompt Injection"],
+        "vulnerabilities_found": 2, "report_url": "",
+    }
+    assert security["iso_42001"] is None
+
+
+def test_unselected_domains_left_out(builder):
+    manifest = builder.build({"jurisdictions_selected": "eu", "kr_01": "general"}, NOW).manifest
+    assert [j["jurisdiction"] for j in manifest["compliance_attestations"]["jurisdictions"]] == ["EU"]
+    assert "security_certifications" not in manifest
+
+
+def test_validate_accepts_complete_submission(builder):
+    fields = {"jurisdictions_selected": "security", "sec_owasp_01": "yes", "sec_owasp_03": "3"}
+    assert builder.validate(fields) == []
+
+
+@pytest.mark.parametrize("fields, error", [
+    ({"jurisdictions_selected": "security", "sec_owasp_01": "yes", "sec_owasp_03": "1.5"}, "sec_owasp_03:"),
+    ({"jurisdictions_selected": "security", "sec_owasp_01": "yes", "sec_owasp_03": True}, "sec_owasp_03:"),
+    ({"jurisdictions_selected": ["eu"]}, "jurisdictions_selected: expected text"),
+    ({"jurisdictions_selected": "eu", "provider_name": 42}, "provider_name: expected text"),
+    ({"jurisdictions_selected": ""}, "jurisdictions_selected: no domain selected"),
+    ({"jurisdictions_selected": "mars"}, "jurisdictions_selected: unknown domain 'mars'"),
+    ({"jurisdictions_selected": "korea", "kr_01": "huge"}, "kr_01:"),
+])
+def test_validate_rejects(builder, fields, error):
+    assert any(e.startswith(error) for e in builder.validate(fields))
+
+
+def test_validate_requires_answers(builder):
+    errors = builder.validate({"jurisdictions_selected": "korea"})
+    assert "kr_01: required" in errors
+    assert not any(e.startswith("kr_03") for e in errors)    # an unanswered boolean is a "no"
+
+
+def test_fractional_cultural_number_allowed(builder):
+    fields = {"jurisdictions_selected": "security", "env_01": "yes", "env_02": "0.25"}
+    assert not any(e.startswith("env_02") for e in builder.validate(fields))
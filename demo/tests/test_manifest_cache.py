@@ -0,0 +1,119 @@
+"""ManifestCache: TTL freshness, ETag revalidation, LRU bounds and request coalescing."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from chain_verifier import FetchResponse, StubFetcher
+from manifest_cache import MAX_TTL, MIN_TTL, ManifestCache, freshness_lifetime
+
+URL = "https://a.example.test/.well-known/compliance.json"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ETagFetcher:
+    """fetch_response() upstream that answers 304 when the caller's ETag is current."""
+
+    def __init__(self, manifest: dict, etag: str = '"v1"', cache_control: str = "max-age=60"):
+        self.manifest, self.etag, self.cache_control = manifest, etag, cache_control
+        self.requests = []
+
+    async def fetch_response(self, url: str, etag: str = None) -> FetchResponse:
+        self.requests.append(etag)
+        if etag == self.etag:
+            return FetchResponse(None, 0, self.etag, self.cache_control, not_modified=True)
+        return FetchResponse(self.manifest, 100, self.etag, self.cache_control)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fresh_entries_are_served_without_refetching():
+    clock = Clock()
+    upstream = StubFetcher({URL: {"id": "a"}})
+    cache = ManifestCache(upstream, default_ttl=60, clock=clock)
+    assert run(cache.fetch(URL)) == {"id": "a"}
+    clock.now = 59
+    assert run(cache.fetch(URL)) == {"id": "a"}
+    assert upstream.requests == [URL]
+    clock.now = 61
+    run(cache.fetch(URL))
+    assert upstream.requests == [URL, URL]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_stale_entries_are_revalidated_with_their_etag():
+    clock = Clock()
+    upstream = ETagFetcher({"id": "a"})
+    cache = ManifestCache(upstream, clock=clock)
+    first = run(cache.fetch(URL))
+    clock.now = 61
+    assert run(cache.fetch(URL)) is first
+    assert upstream.requests == [None, '"v1"']
+    assert cache.stats()["revalidated"] == 1
+
+    upstream.manifest, upstream.etag = {"id": "a", "version": 2}, '"v2"'
+    clock.now = 200
+    assert run(cache.fetch(URL)) == {"id": "a", "version": 2}
+
+
+def test_no_store_responses_are_not_cached():
+    upstream = ETagFetcher({"id": "a"}, cache_control="no-store")
+    cache = ManifestCache(upstream, clock=Clock())
+    run(cache.fetch(URL))
+    run(cache.fetch(URL))
+    assert upstream.requests == [None, None]
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    urls = [f"https://{c}.example.test/c.json" for c in "abc"]
+    upstream = StubFetcher({u: {"id": u} for u in urls})
+    cache = ManifestCache(upstream, max_entries=2, clock=Clock())
+    run(cache.fetch(urls[0]))
+    run(cache.fetch(urls[1]))
+    run(cache.fetch(urls[0]))      # a is now the most recently used
+    run(cache.fetch(urls[2]))
+    assert list(cache.entries) == [urls[0], urls[2]]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound_evicts_and_skips_oversized_manifests():
+    upstream = StubFetcher({URL: {"id": "a", "blob": "x" * 1000}, "small": {"id": "b"}})
+    cache = ManifestCache(upstream, max_bytes=500, clock=Clock())
+    run(cache.fetch(URL))
+    run(cache.fetch("small"))
+    assert list(cache.entries) == ["small"]
+    assert cache.bytes <= 500
+
+
+def test_concurrent_fetches_share_one_upstream_request():
+    upstream = StubFetcher({URL: {"id": "a"}}, delay=0.01)
+    cache = ManifestCache(upstream, clock=Clock())
+
+    async def many():
+        return await asyncio.gather(*(cache.fetch(URL) for _ in range(20)))
+
+    assert run(many()) == [{"id": "a"}] * 20
+    assert upstream.requests == [URL]
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime({}, "max-age=120") == 120
+    assert freshness_lifetime({}, "no-cache, max-age=120") == 0
+    assert freshness_lifetime({}, "", default_ttl=42) == 42
+
+    def attested(days_ago: float) -> dict:
+        date = (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        return {"compliance_attestations": {"jurisdictions": [{"attestation_date": date}]}}
+
+    assert freshness_lifetime(attested(0)) == MIN_TTL
+    assert 0.1 * 86400 - 5 < freshness_lifetime(attested(1)) < 0.1 * 86400 + 5
+    assert freshness_lifetime(attested(400)) == MAX_TTL
@@ -0,0 +1,45 @@
+"""ManifestStore recovery: a torn tail is cut off, corruption mid-log is reported and kept."""
+
+import os
+
+import pytest
+
+from benchmarks import synthetic_manifests
+from manifest_store import _RECORD, CorruptLog, ManifestStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = tmp_path / "store.cbms"
+    manifests = [m for m in synthetic_manifests(120, seed=3) if m and m.get("id")][:100]
+    with ManifestStore(path) as store:
+        offsets = []
+        for manifest in manifests:
+            store.put(manifest)
+            offsets.append(store.offsets[manifest["id"]][0])
+    return path, offsets, len(manifests)
+
+
+def test_torn_tail_is_truncated(store_path):
+    path, offsets, n = store_path
+    size = path.stat().st_size
+    os.truncate(path, size - 5)
+    with ManifestStore(path) as store:
+        assert len(store) == n - 1
+        assert path.stat().st_size == offsets[-1]
+        store.put({"id": "nanda:after-recovery"})
+    with ManifestStore(path) as store:
+        assert "nanda:after-recovery" in store and len(store) == n
+
+
+def test_corrupt_record_mid_log_keeps_the_data(store_path):
+    path, offsets, n = store_path
+    size = path.stat().st_size
+    with open(path, "r+b") as f:
+        f.seek(offsets[10] + _RECORD.size + 3)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0x01]))
+    with pytest.raises(CorruptLog, match=f"byte {offsets[10]}"):
+        ManifestStore(path)
+    assert path.stat().st_size == size
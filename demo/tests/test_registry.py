@@ -0,0 +1,61 @@
+"""Registry hot reload: a bad document keeps the previous snapshot and watching goes on."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from registry import Registry
+
+DEMO_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def registry(tmp_path):
+    demo = tmp_path / "demo"
+    demo.mkdir()
+    shutil.copy(DEMO_DIR / "company_a_policy.json", demo)
+    shutil.copytree(DEMO_DIR / "mock_agents", demo / "mock_agents")
+    shutil.copytree(DEMO_DIR.parent / "questionnaires", tmp_path / "questionnaires")
+    return Registry(demo)
+
+
+def rewrite(path, text):
+    stat = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.mark.parametrize("doc", ["[]", '"text"', '{"regulatory_requirements": []}', "{not json"])
+def test_bad_policy_keeps_previous_snapshot(registry, doc):
+    before = registry.snapshot
+    rewrite(registry.policy_path, doc)
+    assert registry.reload_if_changed() is False
+    assert registry.snapshot is before
+    assert isinstance(registry.last_error, ValueError)
+
+
+@pytest.mark.parametrize("doc", ['{"id": "x", "compliance_attestations": {"jurisdictions": [5]}}',
+                                 '{"id": "x", "compliance_attestations": ["EU"]}'])
+def test_bad_manifest_keeps_previous_snapshot(registry, doc):
+    before = registry.snapshot
+    rewrite(registry.manifest_dir / "agent_b_travel.json", doc)
+    assert registry.reload_if_changed() is False
+    assert registry.snapshot is before and registry.last_error is not None
+
+
+def test_unexpected_build_error_is_recorded(registry, monkeypatch):
+    monkeypatch.setattr(registry, "_build", lambda: {}["boom"])
+    rewrite(registry.policy_path, registry.policy_path.read_text())
+    assert registry.reload_if_changed() is False
+    assert isinstance(registry.last_error, KeyError)
+
+
+def test_recovers_after_a_bad_reload(registry):
+    good = registry.policy_path.read_text()
+    rewrite(registry.policy_path, "[]")
+    registry.reload_if_changed()
+    rewrite(registry.policy_path, good)
+    assert registry.reload_if_changed() is True
+    assert registry.last_error is None and registry.reloads == 1
@@ -0,0 +1,61 @@
+"""RevocationIndex background filter rebuilds racing load() and each other."""
+
+import threading
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+import audit_signatures  # noqa: E402
+import revocation  # noqa: E402
+from revocation import DELTA_TYPE, LIST_TYPE, RevocationIndex  # noqa: E402
+
+KEY = audit_signatures.Ed25519PrivateKey.generate()
+ISSUER = "did:web:revocations.example"
+
+
+def full(sequence: int, n: int = 100) -> dict:
+    return revocation.sign({"type": LIST_TYPE, "sequence": sequence, "agent_ids": [f"a{i}" for i in range(n)],
+                            "auditor_dids": [f"did:web:d{i}" for i in range(n)], "codebase_hashes": []}, KEY, ISSUER)
+
+
+def delta(base: int, **remove) -> dict:
+    return revocation.sign({"type": DELTA_TYPE, "base_sequence": base, "sequence": base + 1,
+                            "add": {}, "remove": remove}, KEY, ISSUER)
+
+
+@pytest.fixture
+def gated(monkeypatch):
+    """An index whose filter rebuilds block until the gate is set; thread errors are collected."""
+    index = RevocationIndex(audit_signatures.KeyCache({ISSUER: KEY.public_key().public_bytes_raw()}))
+    index.load(full(1))
+    index.filter()
+    gate, errors, real_filter = threading.Event(), [], revocation._filter
+    monkeypatch.setattr(revocation, "_filter", lambda values, rate: gate.wait(5) and real_filter(values, rate))
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    return index, gate, errors
+
+
+def test_load_during_rebuild_discards_it(gated):
+    index, gate, errors = gated
+    index.apply_delta(delta(1, agent_ids=[f"a{i}" for i in range(50)]))
+    index.load(full(5))
+    gate.set()
+    index.wait()
+    assert errors == []
+    assert index.filters is None and index.rebuilds == 0
+    assert all(removed == 0 for removed in index.removed.values())
+
+
+def test_wait_joins_every_rebuild(gated):
+    index, gate, errors = gated
+    index.apply_delta(delta(1, agent_ids=[f"a{i}" for i in range(50)]))
+    index.apply_delta(delta(2, auditor_dids=[f"did:web:d{i}" for i in range(50)]))
+    index.apply_delta(delta(3, agent_ids=[f"a{i}" for i in range(50, 80)]))  # agent_ids already in progress
+    assert len(index._rebuilding) == 2
+    stale = dict(index.filters)
+    gate.set()
+    index.wait()
+    assert errors == [] and not index._rebuilding and index.rebuilds == 2
+    assert all(index.filters[kind] is not stale[kind] for kind in ("agent_ids", "auditor_dids"))
+    assert 0 <= index.removed["agent_ids"] <= 30
@@ -0,0 +1,83 @@
+"""Demo server routes, rendered through the real app; skipped where python-fasthtml is not installed."""
+
+import pytest
+
+pytest.importorskip("fasthtml")
+testclient = pytest.importorskip("starlette.testclient")
+
+import app as demo_app  # noqa: E402
+
+AGENT_KEYS = list(demo_app.AGENT_FILES) + ["nope"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    with testclient.TestClient(demo_app.app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("path", [
+    "/", "/certify", "/demo", "/demo?scenario=compliant", "/demo?scenario=mixed",
+    "/recheck/sweep", "/metrics",
+] + [f"/agent/{key}" for key in AGENT_KEYS])
+def test_get_routes_render(client, path):
+    r = client.get(path)
+    assert r.status_code == 200
+    assert r.text
+
+
+def test_styles_versioned_and_revalidated(client):
+    r = client.get("/styles")
+    assert r.status_code == 200
+    assert "immutable" in r.headers["cache-control"]
+    assert client.get("/styles", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+
+@pytest.mark.parametrize("path", ["/demo?scenario=mixed", "/agent/agent_b"])
+def test_page_etag_answers_304(client, path):
+    r = client.get(path)
+    etag = r.headers["etag"]
+    again = client.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    # htmx requests get the bare fragment, so the full page's ETag does not match them
+    assert client.get(path, headers={"If-None-Match": etag, "HX-Request": "true"}).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/demo", "/agent/agent_b"])
+def test_direct_get_is_a_full_page(client, path):
+    page = client.get(path)
+    assert "<html" in page.text and "/styles?v=" in page.text
+    fragment = client.get(path, headers={"HX-Request": "true"})
+    assert "<html" not in fragment.text
+    assert fragment.headers["etag"] != page.headers["etag"]
+
+
+def test_recheck_renders_chain(client):
+    r = client.post("/recheck", data={"require_gdpr": "true", "require_ai_act": "true",
+                                      "require_subagent_compliance": "true"})
+    assert r.status_code == 200
+    assert "Agent B (Travel)" in r.text
+    assert "SAMPLE_AGENT_B_TRAVEL Corp" in r.text
+
+
+@pytest.mark.parametrize("jurisdiction", ["eu", ["korea", "eu"], ["eu", "japan", "korea", "cultural", "security"]])
+@pytest.mark.parametrize("cert_type", ["self_certified", "third_party"])
+def test_questionnaire_load(client, jurisdiction, cert_type):
+    r = client.post("/questionnaire/load", data={"jurisdiction": jurisdiction, "cert_type": cert_type})
+    assert r.status_code == 200
+    assert "Step 2: Complete the Questionnaire" in r.text
+
+
+def test_questionnaire_load_needs_jurisdiction(client):
+    r = client.post("/questionnaire/load", data={"cert_type": "self_certified"})
+    assert r.status_code == 200
+    assert "Please select at least one jurisdiction." in r.text
+
+
+def test_questionnaire_generate(client):
+    r = client.post("/questionnaire/generate", data={
+        "provider_name": "Example Corp", "jurisdictions_selected": "eu", "cert_type": "self_certified",
+    })
+    assert r.status_code == 200
+    assert "Example Corp" in r.text
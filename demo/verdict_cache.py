@@ -0,0 +1,111 @@
+"""
+Verdict Cache
+
+Memoizes policy verdicts by content: the key is (policy digest, manifest
+digest as manifest_binary.digest() computes it), so an unchanged manifest checked against an unchanged policy is
+evaluated once. Verdicts expire at the first attestation boundary found by
+CompiledPolicy.valid_until(), so a cached pass never outlives the
+attestations it was based on.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import manifest_binary
+from policy_engine import CompiledPolicy
+
+DEFAULT_MAX_AGE = 3600  # seconds; bounds verdicts with no attestation boundary ahead
+
+
+def _copy(result: dict) -> dict:
+    # Callers append to reasons/warnings (e.g. chain cycle notes); keep the cached lists intact
+    return {**result, "reasons": list(result["reasons"]), "warnings": list(result["warnings"])}
+
+
+class VerdictCache:
+    """LRU cache of check()/check_agent() results keyed by content digests.
+
+    Hashing a manifest costs more than checking a small one, so callers that
+    already hold a manifest's digest (e.g. from a registry that loaded it)
+    should pass it as manifest_digest.
+
+    Thread-safe: the expiry scheduler invalidates from its own thread while
+    request handlers look up. Verdicts are computed outside the lock.
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_age: float = DEFAULT_MAX_AGE, clock=time.time):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.by_manifest = defaultdict(set)  # manifest digest -> keys of its cached verdicts
+        self.hits = self.misses = self.expired = 0
+        self._lock = threading.Lock()
+
+    def check(self, manifest: dict, policy: CompiledPolicy, manifest_digest: str = None) -> dict:
+        """Cached CompiledPolicy.check(manifest)."""
+        return self._lookup(manifest, policy, manifest_digest, agent=False)
+
+    def check_agent(self, manifest: dict, policy: CompiledPolicy, manifest_digest: str = None,
+                    audit_verified: bool = False) -> dict:
+        """Cached CompiledPolicy.check_agent(manifest, audit_verified=audit_verified)."""
+        return self._lookup(manifest, policy, manifest_digest, agent=True, audit_verified=audit_verified)
+
+    def _lookup(self, manifest, policy, manifest_digest, agent, audit_verified=False):
+        key = (policy.digest, manifest_digest or manifest_binary.digest(manifest), agent, audit_verified)
+        now = self.clock()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy(result)
+                self.expired += 1
+                self._drop(key)
+            self.misses += 1
+
+        result = policy.check_agent(manifest, audit_verified=audit_verified) if agent else policy.check(manifest)
+        boundary = policy.valid_until(manifest, agent=agent) if manifest else None
+        expires = now + self.max_age if boundary is None else min(now + self.max_age, boundary)
+        with self._lock:
+            self.entries[key] = (expires, result)
+            self.by_manifest[key[1]].add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+        return _copy(result)
+
+    def _drop(self, key):
+        # Callers hold the lock
+        if self.entries.pop(key, None) is None:
+            return
+        keys = self.by_manifest.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_manifest[key[1]]
+
+    def invalidate_policy(self, policy: CompiledPolicy):
+        """Drop every verdict computed under this policy."""
+        with self._lock:
+            for key in [k for k in self.entries if k[0] == policy.digest]:
+                self._drop(key)
+
+    def invalidate_manifest(self, manifest_digest: str) -> int:
+        """Drop every verdict on this manifest, under any policy; returns how many were dropped."""
+        with self._lock:
+            keys = self.by_manifest.pop(manifest_digest, ())
+            for key in keys:
+                self.entries.pop(key, None)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.by_manifest.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses, "expired": self.expired}